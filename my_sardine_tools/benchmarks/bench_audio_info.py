@@ -0,0 +1,81 @@
+"""
+Benchmark: header-only duration reader vs soundfile.
+
+Writes a few thousand short files in the formats found in sample libraries
+and times reading their durations with `read_header()` and `sf.info()`.
+
+Usage:
+    python benchmarks/bench_audio_info.py [n_files] [samples_dir]
+
+If samples_dir is given, its audio files are benchmarked instead.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+from my_sardine_tools.audio_info import read_header, read_info
+
+FORMATS = [
+    ("wav", {"subtype": "PCM_16"}),
+    ("wav", {"subtype": "PCM_24"}),
+    ("wav", {"format": "WAVEX", "subtype": "FLOAT"}),
+    ("aiff", {"subtype": "PCM_16"}),
+    ("flac", {"subtype": "PCM_16"}),
+]
+
+
+def write_files(directory: Path, n_files: int) -> list[Path]:
+    rng = np.random.default_rng(0)
+    files = []
+    for i in range(n_files):
+        suffix, kwargs = FORMATS[i % len(FORMATS)]
+        path = directory / f"sample{i:05d}.{suffix}"
+        data = rng.uniform(-0.5, 0.5, (int(rng.integers(2000, 20000)), 2))
+        sf.write(str(path), data, 44100, **kwargs)
+        files.append(path)
+    return files
+
+
+def bench(name, func, files):
+    start = time.perf_counter()
+    durations = [func(path) for path in files]
+    elapsed = time.perf_counter() - start
+    print(f"{name:<14} {elapsed * 1000:9.1f} ms  {elapsed / len(files) * 1e6:7.1f} us/file")
+    return durations
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if len(sys.argv) > 2:
+            files = sorted(
+                f
+                for f in Path(sys.argv[2]).rglob("*")
+                if f.suffix.lower() in [".wav", ".aif", ".aiff", ".flac", ".mp3"]
+            )
+        else:
+            files = write_files(Path(temp_dir), n_files)
+
+        header_hits = 0
+        for path in files:
+            try:
+                read_header(path)
+                header_hits += 1
+            except ValueError:
+                pass
+        print(f"{len(files)} files, {header_hits} readable from the header alone\n")
+
+        expected = bench("sf.info", lambda path: sf.info(str(path)).duration, files)
+        actual = bench("read_info", lambda path: read_info(path).duration, files)
+
+        mismatches = sum(abs(a - b) > 1e-9 for a, b in zip(actual, expected))
+        print(f"\nduration mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
+from .budget import grain_budget_info, set_grain_budget
+from .control import live_control, stop_live_control
+from .dispatch import batch, disable_lookahead, enable_lookahead
+from .modulation import modulate, set_control_rate
+from .morphing import morph
+from .patterns import P, pattern_cache_info, pattern_length
 from .playback import create_player, loop, start, stop
 from .samples import calculate_sample_lengths, cut, granulate
 from .senders import D, ZD_mono, d, zd_mono
 from .state import State
+from .watch import watch_samples
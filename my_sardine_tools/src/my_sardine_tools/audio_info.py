@@ -0,0 +1,267 @@
+import struct
+from pathlib import Path
+from typing import NamedTuple
+
+import soundfile as sf
+
+# WAVE format tags
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# AIFC compression types stored as plain PCM/float, with their byte order
+_AIFC_FORMATS = {
+    b"NONE": (">", "i"),
+    b"twos": (">", "i"),
+    b"sowt": ("<", "i"),
+    b"fl32": (">", "f"),
+    b"FL32": (">", "f"),
+    b"fl64": (">", "f"),
+    b"FL64": (">", "f"),
+}
+
+# Nothing in a sane header is further away than this
+_MAX_HEADER_BYTES = 1 << 20
+
+
+class AudioInfo(NamedTuple):
+    """
+    Basic stream information of an audio file.
+
+    data_offset and sample_format are only set for uncompressed files whose
+    samples can be memory-mapped directly, e.g.
+    np.memmap(path, sample_format, "r", data_offset, (frames, channels)).
+    """
+
+    frames: int
+    channels: int
+    samplerate: int
+    data_offset: int | None = None
+    sample_format: str | None = None
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.samplerate
+
+
+def _numpy_format(byte_order: str, kind: str, bits: int) -> str | None:
+    """numpy dtype string for a sample encoding, or None if it has no native dtype."""
+    if kind == "f" and bits in (32, 64):
+        return f"{byte_order}f{bits // 8}"
+    if kind == "i" and bits == 8:
+        return "i1"
+    if kind == "i" and bits in (16, 32):
+        return f"{byte_order}i{bits // 8}"
+    if kind == "u" and bits == 8:
+        return "u1"
+    return None  # e.g. 24-bit PCM
+
+
+def _read_wav(f, file_size: int) -> AudioInfo:
+    riff_id, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+    if wave_id != b"WAVE":
+        raise ValueError("not a WAVE file")
+
+    fmt = None
+    ds64_data_size = None
+    fact_frames = None
+
+    while f.tell() < min(file_size, _MAX_HEADER_BYTES):
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            break
+        chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+        chunk_start = f.tell()
+
+        if chunk_id == b"ds64":
+            # RF64/BW64: 64-bit sizes live here, the 32-bit fields hold 0xFFFFFFFF
+            _, ds64_data_size, _ = struct.unpack("<QQQ", f.read(24))
+        elif chunk_id == b"fmt ":
+            data = f.read(chunk_size)
+            format_tag, channels, samplerate, _, block_align, bits = struct.unpack(
+                "<HHIIHH", data[:16]
+            )
+            if format_tag == _WAVE_FORMAT_EXTENSIBLE and len(data) >= 26:
+                # The real format tag is the first two bytes of the SubFormat GUID
+                (format_tag,) = struct.unpack("<H", data[24:26])
+            fmt = (format_tag, channels, samplerate, block_align, bits)
+        elif chunk_id == b"fact":
+            (fact_frames,) = struct.unpack("<I", f.read(4))
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("data chunk before fmt chunk")
+            format_tag, channels, samplerate, block_align, bits = fmt
+            if chunk_size == 0xFFFFFFFF and ds64_data_size is not None:
+                chunk_size = ds64_data_size
+            # Streamed/truncated files often overstate the data size
+            data_size = min(chunk_size, file_size - chunk_start)
+
+            if format_tag == _WAVE_FORMAT_PCM:
+                sample_format = _numpy_format("<", "u" if bits == 8 else "i", bits)
+            elif format_tag == _WAVE_FORMAT_IEEE_FLOAT:
+                sample_format = _numpy_format("<", "f", bits)
+            elif fact_frames is not None:
+                # Compressed (ADPCM, ...): only the fact chunk knows the length
+                return AudioInfo(fact_frames, channels, samplerate)
+            else:
+                raise ValueError(f"unsupported WAVE format tag {format_tag:#x}")
+
+            if not block_align or not samplerate or not channels:
+                raise ValueError("invalid fmt chunk")
+            return AudioInfo(
+                data_size // block_align, channels, samplerate, chunk_start, sample_format
+            )
+
+        # Chunks are word aligned
+        f.seek(chunk_start + chunk_size + (chunk_size & 1))
+
+    raise ValueError(f"no data chunk found in {riff_id.decode(errors='replace')} file")
+
+
+def _read_extended(data: bytes) -> float:
+    """Decode an 80-bit IEEE 754 extended float (AIFF sample rate)."""
+    exponent, mantissa = struct.unpack(">HQ", data)
+    sign = -1 if exponent & 0x8000 else 1
+    exponent &= 0x7FFF
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    return sign * mantissa * 2.0 ** (exponent - 16383 - 63)
+
+
+def _read_aiff(f, file_size: int) -> AudioInfo:
+    _, _, form_type = struct.unpack(">4sI4s", f.read(12))
+    if form_type not in (b"AIFF", b"AIFC"):
+        raise ValueError("not an AIFF file")
+
+    comm = None
+    ssnd_offset = None
+
+    while f.tell() < min(file_size, _MAX_HEADER_BYTES) and (comm is None or ssnd_offset is None):
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            break
+        chunk_id, chunk_size = struct.unpack(">4sI", chunk_header)
+        chunk_start = f.tell()
+
+        if chunk_id == b"COMM":
+            data = f.read(chunk_size)
+            channels, frames, bits = struct.unpack(">hIh", data[:8])
+            samplerate = _read_extended(data[8:18])
+            compression = data[18:22] if form_type == b"AIFC" else b"NONE"
+            comm = (channels, frames, bits, samplerate, compression)
+        elif chunk_id == b"SSND":
+            (offset,) = struct.unpack(">I", f.read(4))
+            ssnd_offset = chunk_start + 8 + offset
+
+        f.seek(chunk_start + chunk_size + (chunk_size & 1))
+
+    if comm is None:
+        raise ValueError("no COMM chunk found in AIFF file")
+
+    channels, frames, bits, samplerate, compression = comm
+    if not channels or not samplerate:
+        raise ValueError("invalid COMM chunk")
+
+    sample_format = None
+    if compression in _AIFC_FORMATS and ssnd_offset is not None:
+        byte_order, kind = _AIFC_FORMATS[compression]
+        if compression in (b"fl64", b"FL64"):
+            bits = 64
+        elif kind == "f":
+            bits = 32
+        sample_format = _numpy_format(byte_order, kind, bits)
+    elif compression not in _AIFC_FORMATS:
+        # Compressed AIFC still reports its frame count in COMM
+        ssnd_offset = None
+
+    return AudioInfo(frames, channels, round(samplerate), ssnd_offset, sample_format)
+
+
+def _skip_id3(f) -> None:
+    """Skip an ID3v2 tag some taggers put in front of FLAC streams."""
+    header = f.read(10)
+    if header[:3] == b"ID3" and len(header) == 10:
+        size = 0
+        for byte in header[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        f.seek(10 + size)
+    else:
+        f.seek(0)
+
+
+def _read_flac(f) -> AudioInfo:
+    _skip_id3(f)
+    if f.read(4) != b"fLaC":
+        raise ValueError("not a FLAC file")
+
+    block_header = f.read(4)
+    if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+        raise ValueError("FLAC stream does not start with STREAMINFO")
+
+    data = f.read(34)
+    if len(data) < 18:
+        raise ValueError("truncated STREAMINFO block")
+
+    # 20 bits sample rate, 3 bits channels - 1, 5 bits bits/sample - 1, 36 bits total samples
+    (packed,) = struct.unpack(">Q", data[10:18])
+    samplerate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    frames = packed & 0xFFFFFFFFF
+
+    if not samplerate or not frames:
+        raise ValueError("STREAMINFO does not declare the stream length")
+    return AudioInfo(frames, channels, samplerate)
+
+
+def read_header(path: str | Path) -> AudioInfo:
+    """
+    Read frame count, channels and sample rate straight from a file header.
+
+    Supports WAV/RIFF (including RF64 and WAVE_FORMAT_EXTENSIBLE), AIFF/AIFC and
+    FLAC. Only the header bytes are read, nothing is decoded.
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        AudioInfo for the file
+
+    Raises:
+        ValueError: If the format is not supported or the header is unusual
+                    (use `read_info()` to fall back to soundfile)
+    """
+    with open(path, "rb") as f:
+        magic = f.read(4)
+        f.seek(0, 2)
+        file_size = f.tell()
+        f.seek(0)
+
+        try:
+            if magic in (b"RIFF", b"RF64", b"BW64"):
+                return _read_wav(f, file_size)
+            if magic == b"FORM":
+                return _read_aiff(f, file_size)
+            if magic in (b"fLaC", b"ID3\x03", b"ID3\x04", b"ID3\x02"):
+                return _read_flac(f)
+        except struct.error as e:
+            raise ValueError(f"truncated header: {e}") from e
+
+    raise ValueError(f"unsupported audio format in {path}")
+
+
+def read_info(path: str | Path) -> AudioInfo:
+    """
+    Get stream information for any audio file, using the header parser when
+    possible and soundfile for everything else (mp3, compressed formats...).
+
+    Args:
+        path: Path to the audio file
+
+    Returns:
+        AudioInfo for the file
+    """
+    try:
+        return read_header(path)
+    except ValueError:
+        info = sf.info(str(path))
+        return AudioInfo(info.frames, info.channels, info.samplerate)
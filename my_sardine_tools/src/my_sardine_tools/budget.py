@@ -0,0 +1,173 @@
+import asyncio
+
+from sardine_core.run import bowl
+
+# Seconds between two event loop lag measurements
+_PROBE_INTERVAL = 0.01
+
+
+class LagMonitor:
+    """
+    Measures how late the event loop runs its callbacks.
+
+    A callback is scheduled every `interval` seconds; the time it runs past
+    its due time is the lag every swimmer suffers too. Rises are taken at once,
+    drops are smoothed, so one quiet tick does not hide a busy loop.
+    """
+
+    def __init__(self, interval: float = _PROBE_INTERVAL):
+        self.interval = interval
+        self.lag = 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and not self._loop.is_closed()
+
+    def start(self) -> bool:
+        """
+        Start measuring on the running event loop.
+
+        Returns:
+            False if there is no running loop (outside of Sardine)
+        """
+        if self.running:
+            return True
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        self._schedule()
+        return True
+
+    def stop(self) -> None:
+        self._loop = None
+        self.lag = 0.0
+
+    def _schedule(self) -> None:
+        loop = self._loop
+        due = loop.time() + self.interval
+        loop.call_at(due, self._tick, loop, due)
+
+    def _tick(self, loop: asyncio.AbstractEventLoop, due: float) -> None:
+        if loop is not self._loop:
+            return  # stopped, or restarted on another loop
+        sample = max(0.0, loop.time() - due)
+        self.lag = max(sample, 0.8 * self.lag + 0.2 * sample)
+        self._schedule()
+
+
+class GrainBudget:
+    """
+    Limits the grains granulate() plays when the session is under load.
+
+    - `max_lateness`: when the event loop lags more than this many seconds,
+      new clouds get proportionally fewer grains (twice that lag: half the
+      density, and so on)
+    - `max_rate`: grains per second shared by all the clouds playing at the
+      same time; a cloud only gets what the others leave free
+
+    Only granulate() is shed: D(), loop() and cut() events always go out, so
+    rhythm parts keep priority over textures. Both limits are off by default.
+
+    Example:
+        budget = set_grain_budget(max_rate=2000, max_lateness=0.02)
+        ...
+        grain_budget_info()  # {"requested": 48000, "sent": 41200, "shed": 6800, ...}
+    """
+
+    def __init__(self, max_rate: float | None = None, max_lateness: float | None = None):
+        self.max_rate = max_rate
+        self.max_lateness = max_lateness
+        self.monitor = LagMonitor()
+        # (end time, grains per second) of the clouds admitted by max_rate
+        self._clouds: list[tuple[float, float]] = []
+        self.requested = 0
+        self.sent = 0
+        self.shed = 0
+
+    @property
+    def active(self) -> bool:
+        return self.max_rate is not None or self.max_lateness is not None
+
+    def lateness(self) -> float:
+        """Current event loop lag in seconds (0 outside of Sardine)."""
+        if not self.monitor.running:
+            self.monitor.start()
+        return self.monitor.lag
+
+    def admit(self, n_grains: int, seconds: float) -> int:
+        """
+        Decide how many grains a new cloud may play.
+
+        Args:
+            n_grains: Grains the cloud asks for
+            seconds: Duration of the cloud
+
+        Returns:
+            Number of grains to play (the rest is counted as shed)
+        """
+        allowed = n_grains
+        if self.max_lateness is not None:
+            lateness = self.lateness()
+            if lateness > self.max_lateness:
+                allowed = int(allowed * self.max_lateness / lateness)
+
+        if self.max_rate is not None and seconds > 0:
+            now = bowl.clock.shifted_time
+            self._clouds = [cloud for cloud in self._clouds if cloud[0] > now]
+            free_rate = self.max_rate - sum(rate for _, rate in self._clouds)
+            allowed = min(allowed, max(0, int(free_rate * seconds)))
+            if allowed:
+                self._clouds.append((now + seconds, allowed / seconds))
+
+        self.requested += n_grains
+        self.sent += allowed
+        self.shed += n_grains - allowed
+        return allowed
+
+    def info(self) -> dict:
+        """Counters for checking the budget in a live set."""
+        return {
+            "requested": self.requested,
+            "sent": self.sent,
+            "shed": self.shed,
+            "shed_rate": self.shed / self.requested if self.requested else 0.0,
+            "lateness": self.monitor.lag,
+            "max_rate": self.max_rate,
+            "max_lateness": self.max_lateness,
+        }
+
+    def reset(self) -> None:
+        """Reset the counters and forget the clouds playing."""
+        self._clouds.clear()
+        self.requested = self.sent = self.shed = 0
+
+
+_GRAIN_BUDGET = GrainBudget()
+
+
+def get_grain_budget() -> GrainBudget:
+    """Get the budget shared by every granulate() call."""
+    return _GRAIN_BUDGET
+
+
+def set_grain_budget(
+    max_rate: float | None = None, max_lateness: float | None = None
+) -> GrainBudget:
+    """
+    Set the session's grain limits (see `GrainBudget`); None turns a limit off.
+
+    Returns:
+        The shared GrainBudget
+    """
+    _GRAIN_BUDGET.max_rate = max_rate
+    _GRAIN_BUDGET.max_lateness = max_lateness
+    if max_lateness is None:
+        _GRAIN_BUDGET.monitor.stop()
+    return _GRAIN_BUDGET
+
+
+def grain_budget_info() -> dict:
+    """Counters of the shared grain budget (see `GrainBudget.info()`)."""
+    return _GRAIN_BUDGET.info()
@@ -0,0 +1,139 @@
+from collections.abc import Iterable
+from itertools import chain
+
+from osc4py3 import oscbuildparse
+from osc4py3.as_eventloop import osc_send
+
+from .state import _TIMING_PARAMS, State, _is_number
+
+# Handled by the OSCdef in sc_config.scd: sets controls on every node of an orbit
+CONTROL_ADDRESS = "/sprats/ctl"
+
+# Keys that are not synth controls
+_NOT_CONTROLS = _TIMING_PARAMS | {"orbit", "sound", "n", "midinote", "freq"}
+
+
+class ControlBridge:
+    """
+    Pushes State changes to the voices and effects already playing on an orbit.
+
+    A bound node is watched (see `State.watch()`), so a changed key is sent
+    once per scheduler tick as a /sprats/ctl message [orbit, control, value],
+    with Sardine's aliases applied (lpf -> cutoff...). SuperCollider then sets
+    that control on every node of the orbit's group: sustained voices, their
+    effect modules and the orbit's global effects follow the change without
+    a new event being played. Only numeric values are sent.
+
+    Every voice on the orbit gets the change, so give parts controlled this
+    way an orbit of their own.
+
+    Example:
+        bridge = ControlBridge(dirt)
+        bridge.bind(state.choir.fx, orbit=1, keys=("lpf", "hpf"))
+        state.choir.fx.lpf = 600  # heard right away on the choir's long notes
+    """
+
+    def __init__(self, handler):
+        """
+        Args:
+            handler: Sardine's SuperDirtHandler (`dirt`), used for its OSC
+                     client and aliases
+        """
+        self.handler = handler
+        # id(node) -> (node, keys, callback)
+        self.bindings: dict[int, tuple[State, list, object]] = {}
+        self.sent = 0
+
+    def bind(self, node: State, orbit: int, keys: Iterable[str] | None = None) -> list:
+        """
+        Send changes of some keys of a node to an orbit.
+
+        Args:
+            node: State node holding the parameters
+            orbit: SuperDirt orbit the node's sounds play on
+            keys: Keys to send (default: the numeric keys the node holds now,
+                  except timing, orbit and note keys)
+
+        Returns:
+            The bound keys
+        """
+        if keys is None:
+            keys = [
+                key for key, value in node.items() if key not in _NOT_CONTROLS and _is_number(value)
+            ]
+        keys = list(keys)
+        self.unbind(node)
+
+        def callback(key, value):
+            self.send(orbit, {key: value})
+
+        for key in keys:
+            node.watch(key, callback)
+        self.bindings[id(node)] = (node, keys, callback)
+        return keys
+
+    def unbind(self, node: State) -> None:
+        """Stop sending the changes of a node."""
+        binding = self.bindings.pop(id(node), None)
+        if binding is None:
+            return
+        _, keys, callback = binding
+        for key in keys:
+            node.unwatch(key, callback)
+
+    def send(self, orbit: int, params: dict) -> None:
+        """
+        Set controls on everything playing on an orbit.
+
+        Args:
+            orbit: SuperDirt orbit
+            params: Parameters to set (State keys, aliases are applied)
+        """
+        controls = {
+            key: float(value)
+            for key, value in self.handler._parse_aliases(params).items()
+            if _is_number(value)
+        }
+        if not controls:
+            return
+        message = [orbit, *chain(*sorted(controls.items()))]
+        osc_send(oscbuildparse.OSCMessage(CONTROL_ADDRESS, None, message), self.handler._name)
+        self.sent += 1
+
+
+_BRIDGE: ControlBridge | None = None
+
+
+def live_control(node: State, orbit: int, keys: Iterable[str] | None = None, handler=None) -> list:
+    """
+    Make changes to a State node heard on the notes already playing.
+
+    Needs the /sprats/ctl OSCdef of sc_config.scd. See `ControlBridge`.
+
+    Args:
+        node: State node holding the parameters
+        orbit: SuperDirt orbit the node's sounds play on
+        keys: Keys to send (default: the numeric keys the node holds now)
+        handler: SuperDirt handler to send through (default: Sardine's `dirt`)
+
+    Returns:
+        The bound keys
+
+    Example:
+        live_control(state.choir.fx, orbit=1, keys=("lpf",))
+        modulate(state.choir.fx, "lpf", "sine", low=500, high=2000, period=8)
+    """
+    global _BRIDGE
+    if _BRIDGE is None:
+        if handler is None:
+            from sardine_core.run import dirt as handler
+        _BRIDGE = ControlBridge(handler)
+    elif handler is not None:
+        _BRIDGE.handler = handler
+    return _BRIDGE.bind(node, orbit, keys)
+
+
+def stop_live_control(node: State) -> None:
+    """Stop sending the changes of a node bound with `live_control()`."""
+    if _BRIDGE is not None:
+        _BRIDGE.unbind(node)
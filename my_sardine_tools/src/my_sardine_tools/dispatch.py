@@ -0,0 +1,238 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from itertools import chain
+
+from osc4py3 import oscbuildparse
+from osc4py3.as_eventloop import osc_send
+from sardine_core.run import D as original_D
+from sardine_core.run import bowl
+
+# Bundles packed into one packet by send_timed(), so datagrams stay well
+# under the UDP size limit (a /dirt/play message is a few hundred bytes)
+_BUNDLES_PER_PACKET = 32
+
+# Short names D() accepts for its indexing arguments
+_INDEX_ALIASES = {"i": "iterator", "d": "divisor", "r": "rate"}
+
+
+class LookaheadDispatcher:
+    """
+    Sends SuperDirt events as OSC bundles stamped with the time they should play.
+
+    Sardine's D() waits until each event is due and then sends it, so any
+    delay on the Python side (a slow swimmer, a GC pause) delays the sound.
+    The dispatcher instead sends every event right away, in a bundle whose
+    timetag is the event's exact time plus `lookahead` seconds, and SuperDirt
+    plays it at that time. Python only has to be less than `lookahead` late.
+
+    Example:
+        dispatcher = enable_lookahead(0.2)
+        D("bd", i=i)              # now sent ahead of time
+        dispatcher.lookahead = 0.1
+        disable_lookahead()
+    """
+
+    def __init__(self, handler, lookahead: float | None = None):
+        """
+        Args:
+            handler: Sardine's SuperDirtHandler (`dirt`), used for its OSC
+                     client, aliases and defaults
+            lookahead: Seconds between an event's time and its timetag
+                       (default: the handler's nudge, which keeps events
+                       aligned with anything still sent by Sardine itself)
+        """
+        self.handler = handler
+        self.lookahead = handler.nudge if lookahead is None else lookahead
+        self.sent = 0
+        self.bundles = 0
+
+    def event_time(self) -> float:
+        """Unix time at which an event sent now should sound."""
+        clock = bowl.clock
+        # sleep() moves shifted_time ahead of the clock without blocking
+        headroom = clock.shifted_time - clock.time
+        return time.time() + headroom + self.lookahead
+
+    def messages(self, *args, **kwargs) -> list[list]:
+        """
+        The /dirt/play messages for one D() call, built the way Sardine builds them.
+
+        Takes the same arguments as Sardine's D().
+
+        Returns:
+            One serialized message per voice (several for chords, none for rests)
+        """
+        for short, name in _INDEX_ALIASES.items():
+            if short in kwargs:
+                kwargs[name] = kwargs.pop(short)
+        return self._build_messages(*args, **kwargs)
+
+    def _build_messages(
+        self,
+        sound,
+        orbit=0,
+        iterator=0,
+        divisor=1,
+        rate=1,
+        **pattern,
+    ) -> list[list]:
+        handler = self.handler
+        if sound is None or handler.apply_conditional_mask_to_bars(pattern=pattern):
+            return []
+
+        clock = bowl.clock
+        pattern = {**handler._defaults, **handler._parse_aliases(pattern)}
+        pattern["sound"] = sound
+        pattern["orbit"] = orbit
+        pattern["cps"] = round(clock.phase, 1)
+        pattern["cycle"] = clock.bar * clock.beats_per_bar + clock.beat
+
+        return [
+            list(chain(*sorted(message.items())))
+            for message in handler.pattern_reduce(pattern, iterator, divisor, rate)
+            if message["sound"] is not None
+        ]
+
+    def send(self, *args, **kwargs) -> None:
+        """Drop-in replacement for Sardine's D() (same arguments)."""
+        messages = self.messages(*args, **kwargs)
+        if not messages:
+            return
+        if _BATCH is None:
+            self.send_bundle(messages, self.event_time())
+            return
+
+        # Group by clock time, so a sleep() inside the batch starts a new bundle
+        group = _BATCH.get(bowl.clock.shifted_time)
+        if group is None:
+            _BATCH[bowl.clock.shifted_time] = (self.event_time(), messages)
+        else:
+            group[1].extend(messages)
+
+    def send_bundle(self, messages: list[list], timestamp: float) -> None:
+        """
+        Send serialized /dirt/play messages in one bundle.
+
+        Args:
+            messages: Flat [key, value, key, value...] lists
+            timestamp: Unix time at which SuperDirt should play them
+        """
+        bundle = oscbuildparse.OSCBundle(
+            oscbuildparse.unixtime2timetag(timestamp),
+            [oscbuildparse.OSCMessage("/dirt/play", None, message) for message in messages],
+        )
+        osc_send(bundle, self.handler._name)
+        self.sent += len(messages)
+        self.bundles += 1
+
+    def send_timed(
+        self,
+        events: list[tuple[float, list[list]]],
+        per_packet: int = _BUNDLES_PER_PACKET,
+    ) -> None:
+        """
+        Send messages that play at different times, several bundles per packet.
+
+        Each (timestamp, messages) pair becomes a bundle with its own timetag;
+        up to `per_packet` of them are nested in one outer bundle.
+
+        Args:
+            events: (timestamp, messages) pairs, sorted by timestamp
+            per_packet: Maximum number of bundles per packet
+        """
+        for start in range(0, len(events), per_packet):
+            chunk = events[start : start + per_packet]
+            bundles = [
+                oscbuildparse.OSCBundle(
+                    oscbuildparse.unixtime2timetag(timestamp),
+                    [oscbuildparse.OSCMessage("/dirt/play", None, m) for m in messages],
+                )
+                for timestamp, messages in chunk
+            ]
+            # Nested timetags must not be earlier than the enclosing one
+            packet = oscbuildparse.OSCBundle(bundles[0].timetag, bundles)
+            osc_send(packet, self.handler._name)
+            self.sent += sum(len(messages) for _, messages in chunk)
+            self.bundles += 1
+
+
+_DISPATCHER: LookaheadDispatcher | None = None
+
+# Messages collected by batch() as {clock time: (timestamp, messages)},
+# None outside of a batch
+_BATCH: dict[float, tuple[float, list[list]]] | None = None
+
+
+def enable_lookahead(lookahead: float | None = None, handler=None) -> LookaheadDispatcher:
+    """
+    Send D(), loop(), cut() and granulate() events as timestamped OSC bundles.
+
+    Args:
+        lookahead: Seconds of headroom given to SuperDirt. Must be larger than
+                   the worst delay on the Python side; larger values add latency
+                   to live changes. Default: Sardine's nudge (`dirt.nudge`),
+                   which keeps these events in time with Players (`Pa >> d(...)`).
+        handler: SuperDirt handler to send through (default: Sardine's `dirt`)
+
+    Returns:
+        The active LookaheadDispatcher
+    """
+    global _DISPATCHER
+    if handler is None:
+        from sardine_core.run import dirt as handler
+    _DISPATCHER = LookaheadDispatcher(handler, lookahead)
+    return _DISPATCHER
+
+
+def disable_lookahead() -> None:
+    """Go back to sending events through Sardine's D()."""
+    global _DISPATCHER
+    _DISPATCHER = None
+
+
+def get_dispatcher() -> LookaheadDispatcher | None:
+    """The active LookaheadDispatcher, or None if lookahead is off."""
+    return _DISPATCHER
+
+
+def send_dirt(*args, **kwargs) -> None:
+    """
+    Send a SuperDirt event, through the lookahead dispatcher when it is enabled.
+
+    Takes the same arguments as Sardine's D().
+    """
+    if _DISPATCHER is None:
+        return original_D(*args, **kwargs)
+    return _DISPATCHER.send(*args, **kwargs)
+
+
+@contextmanager
+def batch() -> Iterator[None]:
+    """
+    Send every SuperDirt event of the block in a single OSC bundle.
+
+    Events sent at the same clock time share one bundle and one timetag, so
+    layered sounds start on exactly the same sample and cost one packet.
+    A sleep() inside the block starts a new bundle. Only has an effect with
+    lookahead enabled; otherwise events go through Sardine one by one.
+    Nested batches join the outer one.
+
+    Example:
+        with batch():
+            D("supersaw", n=60)
+            D("supersquare", n=48)
+    """
+    global _BATCH
+    if _DISPATCHER is None or _BATCH is not None:
+        yield
+        return
+
+    dispatcher = _DISPATCHER
+    _BATCH = {}
+    try:
+        yield
+    finally:
+        groups, _BATCH = _BATCH, None
+    for timestamp, messages in groups.values():
+        dispatcher.send_bundle(messages, timestamp)
@@ -0,0 +1,178 @@
+import re
+from functools import lru_cache
+
+from ziffers.defaults import DEFAULT_DURS
+
+# Ziffers duration characters, in beats (q = 1). Ziffers' own table is in
+# whole notes and also lists dotted variants, which are computed below
+ZIFF_DURATIONS = {char: value * 4 for char, value in DEFAULT_DURS.items() if len(char) == 1}
+
+# A decimal alone changes the duration of the next notes; escaped (<0.25>)
+# it is a prefix of one note. Both are in whole notes, like in Ziffers
+_DECIMAL = re.compile(r"\d+\.\d+")
+
+# What can come before a note: octaves, accidentals, escaped octaves and
+# decimals, duration characters with their dots
+_PREFIX = re.compile(r"[_^]+|[#b]|<-?\d>|<(\d+\.\d+)>|([" + "".join(ZIFF_DURATIONS) + r"])(\.*)")
+
+# Something that plays (or rests) for a duration: degrees (0-9, T, E), random
+# notes (?) and rests (r); chords ("024") are a single event. Operators applied
+# to a group ("(0 1)+2", "*3") are not.
+_EVENT = re.compile(r"^(?![+*%])(?:.*[0-9TE?]|r$)")
+_RANGE = re.compile(r"(-?\d+)\.\.(-?\d+)")
+
+_NOTE_CHAR = r"(?:<-?\d+(?:\.\d+)?>|[^\s\[\]()<>:])"
+_TOKENS = re.compile(
+    r"\[:|:\d*\]|:\d*\)|:\d+"  # repeats: [: :n], (: :n), item:n
+    rf"|{_NOTE_CHAR}*\(:?"  # lists, with the prefixes that apply to all their notes
+    rf"|{_NOTE_CHAR}+"  # notes, "<1>" and "<0.25>" included
+    r"|[\[\]<>)]"
+)
+
+
+def _split_duration(token: str) -> tuple[float | None, str]:
+    """Split a token into its duration prefix (None if there is none) and the rest."""
+    if _DECIMAL.fullmatch(token):
+        return float(token) * 4, ""
+
+    # Durations in a prefix add up: "qe0" is a quarter plus an eighth
+    total = None
+    pos = 0
+    while match := _PREFIX.match(token, pos):
+        decimal, char, dots = match.groups()
+        if decimal:
+            total = (total or 0.0) + float(decimal) * 4
+        elif char:
+            value = ZIFF_DURATIONS[char]
+            if dots:
+                value *= 2.0 - 1.0 / (2 * len(dots))  # as Ziffers computes dots
+            total = (total or 0.0) + value
+        pos = match.end()
+    return total, token[pos:]
+
+
+def _group(tokens: list[str], i: int = 0, repeat: bool = False) -> tuple[list, int, str | None]:
+    """Nest bracketed tokens; returns (items, next index, closing token)."""
+    items = []
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if token == "[:" or token.endswith("(:"):
+            inner, i, closing = _group(tokens, i, repeat=True)
+            times = int(closing[1:-1]) if closing and closing[1:-1] else 2
+            items.append(("repeat", inner, times))
+        elif token.endswith("("):
+            inner, i, _ = _group(tokens, i)
+            items.append(("list", inner, token[:-1]))
+        elif token in ("[", "<"):
+            inner, i, _ = _group(tokens, i)
+            items.append(("subdivide" if token == "[" else "cycle", inner))
+        elif token[0] == ":" and token[1:2].isdigit() and (token[-1].isdigit() or not repeat):
+            # item:n repeats the item before it; ":2]" only closes a [: :2] inside one
+            if items:
+                items.append(("repeat", [items.pop()], int(token[1:].rstrip("])"))))
+            if not token[-1].isdigit():
+                return items, i, token[-1]
+        elif token in ("]", ")", ">") or token.startswith(":"):
+            return items, i, token
+        else:
+            items.append(token)
+    return items, i, None
+
+
+def _is_event(item) -> bool:
+    if isinstance(item, tuple):
+        return True
+    return bool(_EVENT.search(_split_duration(item)[1]))
+
+
+def _flatten(items: list) -> list:
+    """Elements of a subdivision: unprefixed lists and repeats are expanded in place."""
+    flat = []
+    for item in items:
+        if isinstance(item, tuple) and item[0] == "list" and not item[2]:
+            flat.extend(_flatten(item[1]))
+        elif isinstance(item, tuple) and item[0] == "repeat":
+            flat.extend(_flatten(item[1]) * item[2])
+        else:
+            flat.append(item)
+    return flat
+
+
+def _walk(items: list, duration: float, out: list[float]) -> float:
+    """Append the duration of every event to out; returns the duration in effect after."""
+    for item in items:
+        if isinstance(item, str):
+            prefix, rest = _split_duration(item)
+            if not rest:
+                if prefix is not None:
+                    duration = prefix  # "q" alone sets the duration of the next notes
+                continue
+            note_duration = duration if prefix is None else prefix
+            note_range = _RANGE.fullmatch(rest)
+            if note_range:
+                # "0..3" plays every degree from 0 to 3
+                start, end = map(int, note_range.groups())
+                out.extend([note_duration] * (abs(end - start) + 1))
+            elif _EVENT.search(rest):
+                out.append(note_duration)
+            continue
+
+        kind = item[0]
+        if kind == "repeat":
+            for _ in range(item[2]):
+                duration = _walk(item[1], duration, out)
+        elif kind == "list":
+            prefix = _split_duration(item[2])[0] if item[2] else None
+            if prefix is None:
+                duration = _walk(item[1], duration, out)
+            else:
+                _walk(item[1], prefix, out)  # "e(0 1)": only the list's notes
+        elif kind == "subdivide":
+            # The elements share the duration of the bracket evenly
+            parts = [part for part in _flatten(item[1]) if _is_event(part)]
+            for part in parts:
+                _walk([part], duration / len(parts), out)
+        else:  # a cycle plays one of its elements
+            out.append(duration)
+    return duration
+
+
+@lru_cache(maxsize=512)
+def ziff_durations(ziff: str) -> tuple[float, ...]:
+    """
+    Duration in beats of every event of a Ziffers pattern, memoized per string.
+
+    Follows the Ziffers syntax: duration characters (w h q e s... from
+    Ziffers' own table), dots, ties ("qe0" = q + e), decimal durations in
+    whole notes ("0.25 0 1", or "<0.25>0" for one note), sticky durations
+    ("q 0 1 e 2"), durations attached to one note ("e3") or a list
+    ("e(0 1)"), subdivisions ("[0 1 2]"), repeats ("[: 0 1 :3]", "(: 0 1 :)",
+    "0:3", "(0 1):2"), ranges ("0..3") and rests. Chords ("024") and cycles
+    ("<0 1>") count as one event; escaped octaves ("<1>") are not events.
+
+    Example:
+        ziff_durations("q 0 e 1 [2 3] h. r")  # (1.0, 0.5, 0.25, 0.25, 3.0)
+    """
+    items, _, _ = _group(_TOKENS.findall(ziff))
+    out: list[float] = []
+    _walk(items, ZIFF_DURATIONS["q"], out)
+    return tuple(out)
+
+
+@lru_cache(maxsize=512)
+def ziff_sustain(ziff: str, coef: float = 0.5) -> str:
+    """
+    Sustain pattern for a Ziffers pattern: each event's duration times coef.
+
+    Example:
+        ziff_sustain("q 0 e 1 h 2", 0.5)  # "0.5 0.25 1.0"
+    """
+    return " ".join(str(duration * coef) for duration in ziff_durations(ziff))
+
+
+def parse_ziff_duration(note: str) -> float | None:
+    """Duration in beats of the duration characters a token starts with, or None."""
+    if not note:
+        return None
+    return _split_duration(note)[0]
@@ -48,6 +48,23 @@ def create_lfo():
     return state, cutoff_lfo_runner
 
 
+def modulated_parameters():
+    """Example: Many LFOs and envelopes from a single swimmer"""
+    from my_sardine_tools import State, modulate, set_control_rate
+
+    state = State()
+    set_control_rate(1 / 32)  # updates per beat, shared by all modulators
+
+    # Same sweep as create_lfo(), without a swimmer of its own
+    modulate(state.melody.saw, "cutoff", "sine", low=1000, high=8000, period=8)
+    modulate(state.reverb, "room", "random", low=0.3, high=0.9, step=0.2)
+    modulate(state.arp, "pan", "saw", period=4)
+    swell = modulate(state.pad, "amp", "adsr", high=0.05, attack=4, sustain=0.8, release=8)
+
+    # Use it: swell.trigger() ... swell.release()
+    return state, swell
+
+
 def create_transitions():
     """Example: Creating transitions between parameter values"""
     from sardine_core.run import again, swim
@@ -71,6 +88,27 @@ def create_transitions():
     return state, fade_in
 
 
+def morph_scenes():
+    """Example: Crossfading every parameter into another scene"""
+    from my_sardine_tools import State, morph
+
+    state = State()
+    state.melody.saw.cutoff = 1000
+    state.melody.amp = 0.03
+    state.reverb.room = 0.3
+
+    # Store the verse, set up the chorus and store it too
+    verse = state.snapshot()
+    state.melody.saw.cutoff = 8000
+    state.melody.amp = 0.06
+    state.reverb.room = 0.9
+    chorus = state.snapshot()
+    state.restore(verse)
+
+    # Use it: fade = morph(state, chorus, beats=16)  # one swimmer for all parameters
+    return state, lambda beats=16: morph(state, chorus, beats=beats)
+
+
 def global_intensity_control():
     """Example: Control multiple parameters together"""
     from my_sardine_tools import State
@@ -108,5 +146,7 @@ if __name__ == "__main__":
     print("\nAvailable examples:")
     print("  - simple_parameter_changes()")
     print("  - create_lfo()")
+    print("  - modulated_parameters()")
     print("  - create_transitions()")
+    print("  - morph_scenes()")
     print("  - global_intensity_control()")
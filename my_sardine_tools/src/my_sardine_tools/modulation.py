@@ -0,0 +1,347 @@
+import math
+from itertools import count
+
+import numpy as np
+from sardine_core.run import again, die, swim
+
+from .state import State, StatePath
+
+SHAPES = ("sine", "saw", "random", "adsr")
+
+# Default control period in beats (the engine's single swimmer wakes this often)
+_CONTROL_PERIOD = 1 / 32
+
+# Names of the engine swimmers (runners are looked up by function name)
+_ENGINE_IDS = count()
+
+
+class Modulator:
+    """
+    One modulated State leaf, created by `ModulationEngine.add()` / `modulate()`.
+
+    The engine evaluates a unit value (0-1) per shape and writes
+    low + (high - low) * value to `node[key]`:
+
+    - sine, saw: period (beats) and phase (0-1)
+    - random: random walk moving at most `step` (of the range) per beat
+    - adsr: attack, decay, release in beats and a sustain level (0-1),
+      started by `trigger()` and ended by `release()`
+    """
+
+    __slots__ = (
+        "attack", "decay", "engine", "high", "index", "key", "low", "off", "on", "period",
+        "phase", "release_time", "shape", "step", "sustain", "target", "value",
+    )  # fmt: skip
+
+    def __init__(self, engine, target, key, shape, low, high, **params):
+        self.engine = engine
+        self.target = target
+        self.key = key
+        self.shape = shape
+        self.low = low
+        self.high = high
+        self.period = params.get("period", 4.0)
+        self.phase = params.get("phase", 0.0)
+        self.step = params.get("step", 0.5)
+        self.attack = params.get("attack", 0.0)
+        self.decay = params.get("decay", 0.0)
+        self.sustain = params.get("sustain", 1.0)
+        self.release_time = params.get("release", 0.0)
+        # Beats the envelope was triggered / released at (nan: not yet)
+        self.on = math.nan
+        self.off = math.nan
+        # Position of the random walk
+        self.value = params.get("start", 0.5)
+        self.index = -1
+
+    def __repr__(self):
+        return f"Modulator({self.shape}, {self.key!r}, {self.low}-{self.high})"
+
+    def trigger(self) -> None:
+        """Start the envelope (adsr) from the engine's current beat."""
+        self.on = self.engine.beat
+        self.off = math.nan
+        self.engine._set_times(self)
+
+    def release(self) -> None:
+        """Let the envelope (adsr) go into its release."""
+        if not math.isnan(self.on) and math.isnan(self.off):
+            self.off = self.engine.beat
+            self.engine._set_times(self)
+
+    def remove(self) -> None:
+        """Stop modulating this leaf (it keeps its last value)."""
+        self.engine.remove(self)
+
+
+def _adsr(since, attack, decay, sustain):
+    """Envelope level `since` beats after the trigger, without release."""
+    attack_level = np.divide(since, attack, out=np.ones_like(since), where=attack > 0)
+    decay_pos = np.divide(since - attack, decay, out=np.ones_like(since), where=decay > 0)
+    decay_level = 1.0 - (1.0 - sustain) * np.clip(decay_pos, 0.0, 1.0)
+    return np.where(since < attack, attack_level, decay_level)
+
+
+class ModulationEngine:
+    """
+    Runs every LFO and envelope from one swimmer at a fixed control rate.
+
+    Modulator parameters live in NumPy arrays, so each control tick computes
+    all the values of a shape in one operation, then writes only the leaves
+    whose value changed. The scheduler wakes up once per tick whatever the
+    number of modulators.
+
+    Args:
+        p: Control period in beats
+        seed: Seed of the random walks
+
+    Example:
+        engine = ModulationEngine(p=1 / 16)
+        engine.add(state.melody.saw, "cutoff", "sine", low=1000, high=8000, period=8)
+        engine.start()
+    """
+
+    def __init__(self, p: float = _CONTROL_PERIOD, seed: int | None = None):
+        self.p = p
+        self.beat = 0.0
+        self.modulators: list[Modulator] = []
+        self.runner = None
+        self._rng = np.random.default_rng(seed)
+        self._dirty = True
+        self._last = np.empty(0)
+
+    def __len__(self):
+        return len(self.modulators)
+
+    def add(
+        self,
+        target: State | StatePath,
+        key: str,
+        shape: str = "sine",
+        low: float = 0.0,
+        high: float = 1.0,
+        **params,
+    ) -> Modulator:
+        """
+        Modulate a State leaf.
+
+        Args:
+            target: State node holding the leaf, or a `State.path()` handle
+            key: Key of the leaf
+            shape: "sine", "saw", "random" or "adsr"
+            low: Value at the bottom of the shape
+            high: Value at the top of the shape
+            **params: Shape parameters (see `Modulator`)
+
+        Raises:
+            ValueError: If the shape is unknown
+
+        Returns:
+            The Modulator
+        """
+        if shape not in SHAPES:
+            raise ValueError(f"Unknown shape {shape!r}, use one of {', '.join(SHAPES)}")
+        self._sync()
+        modulator = Modulator(self, target, key, shape, low, high, **params)
+        self.modulators.append(modulator)
+        self._dirty = True
+        return modulator
+
+    def remove(self, modulator: Modulator) -> None:
+        if modulator in self.modulators:
+            self._sync()
+            self.modulators.remove(modulator)
+            self._dirty = True
+        if not self.modulators:
+            self.stop()
+
+    def clear(self) -> None:
+        self.modulators.clear()
+        self._dirty = True
+        self.stop()
+
+    def _sync(self) -> None:
+        """Copy the random walk positions back before the arrays are rebuilt."""
+        if not self._dirty:
+            for modulator, value in zip(self.modulators, self._walk.tolist()):
+                modulator.value = value
+
+    def _set_times(self, modulator: Modulator) -> None:
+        if not self._dirty and modulator.index >= 0:
+            self._on[modulator.index] = modulator.on
+            self._off[modulator.index] = modulator.off
+
+    def _build(self) -> None:
+        mods = self.modulators
+        for index, modulator in enumerate(mods):
+            modulator.index = index
+
+        def column(name):
+            return np.array([getattr(modulator, name) for modulator in mods], dtype=float)
+
+        self._low = column("low")
+        self._range = column("high") - self._low
+        self._period = column("period")
+        self._phase = column("phase")
+        self._step = column("step")
+        self._attack = column("attack")
+        self._decay = column("decay")
+        self._sustain = column("sustain")
+        self._release = column("release_time")
+        self._on = column("on")
+        self._off = column("off")
+        self._walk = column("value")
+        self._shapes = {
+            shape: np.flatnonzero([modulator.shape == shape for modulator in mods])
+            for shape in SHAPES
+        }
+        self._last = np.full(len(mods), np.nan)
+        self._dirty = False
+
+    def values(self) -> np.ndarray:
+        """Value of every modulator at the current beat."""
+        if self._dirty:
+            self._build()
+        unit = np.zeros(len(self.modulators))
+
+        idx = self._shapes["sine"]
+        if idx.size:
+            cycle = self.beat / self._period[idx] + self._phase[idx]
+            unit[idx] = 0.5 - 0.5 * np.cos(2 * np.pi * cycle)
+
+        idx = self._shapes["saw"]
+        if idx.size:
+            unit[idx] = np.mod(self.beat / self._period[idx] + self._phase[idx], 1.0)
+
+        idx = self._shapes["random"]
+        if idx.size:
+            unit[idx] = self._walk[idx]
+
+        idx = self._shapes["adsr"]
+        if idx.size:
+            on, off = self._on[idx], self._off[idx]
+            attack, decay, sustain = self._attack[idx], self._decay[idx], self._sustain[idx]
+            held = _adsr(np.nan_to_num(self.beat - on, nan=0.0), attack, decay, sustain)
+            # Released: fade from the level reached when released
+            released = ~np.isnan(off)
+            at_release = _adsr(np.nan_to_num(off - on, nan=0.0), attack, decay, sustain)
+            since_off = np.nan_to_num(self.beat - off, nan=0.0)
+            fade = np.divide(
+                since_off,
+                self._release[idx],
+                out=np.ones_like(since_off),
+                where=self._release[idx] > 0,
+            )
+            level = np.where(released, at_release * np.clip(1.0 - fade, 0.0, 1.0), held)
+            unit[idx] = np.where(np.isnan(on), 0.0, level)
+
+        return self._low + self._range * unit
+
+    def step(self, beats: float) -> int:
+        """
+        Advance the engine and write the modulated leaves.
+
+        Args:
+            beats: Time since the last step, in beats
+
+        Returns:
+            Number of leaves written
+        """
+        if self._dirty:
+            self._build()
+        self.beat += beats
+
+        idx = self._shapes["random"]
+        if idx.size:
+            moves = self._rng.uniform(-1.0, 1.0, idx.size) * self._step[idx] * beats
+            walk = self._walk[idx] + moves
+            # Bounce off the edges of the range
+            walk = np.abs(walk)
+            self._walk[idx] = 1.0 - np.abs(1.0 - walk)
+
+        values = self.values()
+        changed = np.flatnonzero(values != self._last)
+        self._last = values
+        if not changed.size:
+            return 0
+
+        python_values = values.tolist()
+        for index in changed.tolist():
+            modulator = self.modulators[index]
+            target = modulator.target
+            node = target() if isinstance(target, StatePath) else target
+            node[modulator.key] = python_values[index]
+        return changed.size
+
+    def start(self) -> None:
+        """Start the engine's swimmer (once)."""
+        if self.runner is not None:
+            return
+
+        def modulation(p=self.p):
+            if self.runner is None:
+                return
+            self.step(p)
+            again(self.runner, p=self.p)
+
+        modulation.__name__ = f"modulation_{next(_ENGINE_IDS)}"
+        self.runner = swim(modulation, snap=None)
+
+    def stop(self) -> None:
+        if self.runner is not None:
+            die(self.runner)
+            self.runner = None
+
+
+_ENGINE = ModulationEngine()
+
+
+def get_modulation_engine() -> ModulationEngine:
+    """Get the engine shared by every `modulate()` call."""
+    return _ENGINE
+
+
+def set_control_rate(p: float) -> None:
+    """
+    Set how often the shared engine updates its modulators.
+
+    Args:
+        p: Control period in beats (e.g. 1/32)
+    """
+    _ENGINE.p = p
+
+
+def modulate(
+    target: State | StatePath,
+    key: str,
+    shape: str = "sine",
+    low: float = 0.0,
+    high: float = 1.0,
+    **params,
+) -> Modulator:
+    """
+    Modulate a State leaf from the shared engine, starting it if needed.
+
+    Replaces an LFO swimmer per parameter: all the modulators are computed
+    together by one swimmer (see `ModulationEngine`).
+
+    Args:
+        target: State node holding the leaf, or a `State.path()` handle
+        key: Key of the leaf
+        shape: "sine", "saw", "random" or "adsr"
+        low: Value at the bottom of the shape
+        high: Value at the top of the shape
+        **params: Shape parameters (see `Modulator`)
+
+    Returns:
+        The Modulator (remove() it to stop)
+
+    Example:
+        modulate(state.melody.saw, "cutoff", "sine", low=1000, high=8000, period=8)
+        modulate(state.reverb, "room", "random", low=0.3, high=0.9, step=0.2)
+        env = modulate(state.pad, "amp", "adsr", high=0.1, attack=2, decay=1, sustain=0.6, release=4)
+        env.trigger()
+    """
+    modulator = _ENGINE.add(target, key, shape, low, high, **params)
+    _ENGINE.start()
+    return modulator
@@ -0,0 +1,183 @@
+from collections.abc import Callable, Mapping
+from itertools import count
+
+import numpy as np
+from sardine_core.run import again, die, swim
+
+from .state import _TIMING_PARAMS, Snapshot, State, _is_number, _same
+
+_MISSING = object()
+
+# Names of the morph swimmers (runners are looked up by function name)
+_MORPH_IDS = count()
+
+
+class Morph:
+    """
+    Crossfade of every numeric parameter of a State into a target scene.
+
+    The numeric leaves found in both the state and the target are flattened
+    into aligned NumPy arrays once, so each `set()` interpolates all of them
+    in one operation and writes back only the leaves whose value changed.
+    Timing keys (n_steps, p, i) and other values (sounds, patterns...) are
+    not interpolated: they switch to the target in `finish()`.
+
+    Args:
+        state: State node to morph (changed in place)
+        target: Snapshot of that node, or a (nested) dict / State of values
+                to reach; keys missing from a dict target are left alone,
+                a snapshot is restored exactly at the end
+        ease: Optional curve applied to the progress (0-1 to 0-1)
+
+    Example:
+        chorus = state.snapshot()
+        ...
+        fade = Morph(state, chorus)
+        fade.set(0.5)  # every numeric parameter halfway to the chorus
+    """
+
+    def __init__(
+        self,
+        state: State,
+        target: Snapshot | Mapping,
+        ease: Callable[[float], float] | None = None,
+    ):
+        if isinstance(target, Snapshot) and target.root is not state:
+            raise ValueError("The snapshot was taken from another State node")
+        self.state = state
+        self.target = target
+        self.ease = ease
+        # (node, key) of every interpolated leaf, aligned with the arrays
+        self.leaves: list[tuple[State, str]] = []
+        # (node, key, value) to set when the morph ends
+        self._switches: list[tuple[State, str, object]] = []
+        start: list[float] = []
+        end: list[float] = []
+        plain = target.to_dict() if isinstance(target, Snapshot) else target
+        self._flatten(state, plain, start, end)
+
+        self._start = np.array(start, dtype=float)
+        self._end = np.array(end, dtype=float)
+        self._span = self._end - self._start
+        self._is_int = np.array(
+            [isinstance(node[key], (int, np.integer)) for node, key in self.leaves], dtype=bool
+        ) & (self._end == np.rint(self._end))
+        self._last = self._start.copy()
+        self.progress = 0.0
+        self.runner = None
+
+    def _flatten(self, node: State, target: Mapping, start: list, end: list) -> None:
+        for key, goal in target.items():
+            current = dict.get(node, key, _MISSING)
+            if isinstance(goal, Mapping) and isinstance(current, State):
+                self._flatten(current, goal, start, end)
+            elif (
+                key not in _TIMING_PARAMS
+                and _is_number(goal)
+                and _is_number(current)
+                and current != goal
+            ):
+                self.leaves.append((node, key))
+                start.append(current)
+                end.append(goal)
+            elif not _same(current, goal):
+                self._switches.append((node, key, goal))
+
+    def __len__(self):
+        return len(self.leaves)
+
+    def set(self, progress: float) -> int:
+        """
+        Write the values at some point of the morph.
+
+        Args:
+            progress: 0 (where the state started) to 1 (the target)
+
+        Returns:
+            Number of leaves written
+        """
+        self.progress = progress = min(max(progress, 0.0), 1.0)
+        if progress >= 1.0:
+            values = self._end
+        else:
+            if self.ease is not None:
+                progress = self.ease(progress)
+            values = self._start + self._span * progress
+            values = np.where(self._is_int, np.rint(values), values)
+
+        changed = np.flatnonzero(values != self._last)
+        self._last = values
+        if not changed.size:
+            return 0
+
+        python_values = values.tolist()
+        is_int = self._is_int
+        for idx in changed.tolist():
+            node, key = self.leaves[idx]
+            value = python_values[idx]
+            node[key] = int(value) if is_int[idx] else value
+        return changed.size
+
+    def finish(self) -> None:
+        """Jump to the target, including the values that are not interpolated."""
+        self.set(1.0)
+        if isinstance(self.target, Snapshot):
+            self.state.restore(self.target)
+        else:
+            for node, key, value in self._switches:
+                setattr(node, key, value)
+        self._switches.clear()
+
+    def stop(self) -> None:
+        """Stop the morph swimmer where it is."""
+        if self.runner is not None:
+            die(self.runner)
+            self.runner = None
+
+
+def morph(
+    state: State,
+    target: Snapshot | Mapping,
+    beats: float = 4.0,
+    p: float = 0.125,
+    ease: Callable[[float], float] | None = None,
+) -> Morph:
+    """
+    Crossfade a State into another scene over some beats, in one swimmer.
+
+    Replaces a swimmer per parameter: every numeric leaf is interpolated at
+    once each control tick (see `Morph`).
+
+    Args:
+        state: State node to morph
+        target: Snapshot of the node, or a (nested) dict of values to reach
+        beats: Duration of the morph
+        p: Control tick, in beats
+        ease: Optional curve applied to the progress
+
+    Returns:
+        The Morph; call its stop() to freeze the parameters where they are
+
+    Example:
+        verse = state.snapshot()
+        state.melody.saw.cutoff = 8000
+        state.reverb.room = 0.9
+        chorus = state.snapshot()
+        state.restore(verse)
+
+        morph(state, chorus, beats=16)  # verse to chorus in 4 bars
+    """
+    fade = Morph(state, target, ease=ease)
+    n_ticks = max(1, round(beats / p))
+
+    def tick(p=p, i=0):
+        if i >= n_ticks:
+            fade.finish()
+            fade.runner = None
+            return
+        fade.set(i / n_ticks)
+        again(fade.runner, p=p, i=i + 1)
+
+    tick.__name__ = f"morph_{next(_MORPH_IDS)}"
+    fade.runner = swim(tick, snap=None)
+    return fade
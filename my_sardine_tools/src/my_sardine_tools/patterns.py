@@ -0,0 +1,214 @@
+import re
+import threading
+from collections import OrderedDict
+from math import floor
+
+from sardine_core.run import bowl
+
+# Pattern functions whose result only depends on their arguments. Anything else
+# (shuf, drunk, maybe, time/bar/LFO functions, get/set variables...) can change
+# from one parse to the next, so patterns using it are never cached.
+PURE_FUNCTIONS = frozenset(
+    {
+        "dmitri", "voice", "quant", "disco", "invert", "aspeed",
+        "eu", "neu", "mask", "notdot", "euclid", "numclid", "e",
+        "pal", "rev", "leave", "insertp", "insert", "insertprot", "insertrot", "rot",
+        "sin", "usin", "cos", "ucos", "saw", "usaw", "rect", "urect",
+        "clamp", "abs", "max", "min", "mean", "scale", "filt",
+        "if", "nif", "while", "nwhile", "br", "bl",
+    }
+)  # fmt: skip
+
+# rand, random ranges (1~5) and choices (a|b, but not the || union or ^| xor)
+_RANDOM_SYNTAX = re.compile(r"\brand\b|~|(?<![|^])\|(?!\|)")
+_FUNCTION_NAME = re.compile(r"\(\s*([A-Za-z]\w*)")
+
+
+def is_static(pattern: str) -> bool:
+    """
+    Check whether a pattern parses to the same result every time.
+
+    Example:
+        is_static("0.5 0.25!3")      # True
+        is_static("(pal [1:0;8])")   # True
+        is_static("0.5|0.25")        # False, random choice
+        is_static("(shuf 1 2 3)")    # False
+    """
+    if _RANDOM_SYNTAX.search(pattern):
+        return False
+    return all(name in PURE_FUNCTIONS for name in _FUNCTION_NAME.findall(pattern))
+
+
+class PatternCache:
+    """
+    LRU cache of parsed Sardine patterns, keyed by pattern string.
+
+    Static patterns are parsed once and then only indexed; patterns with
+    randomness or time-dependent functions (see `is_static()`) are parsed on
+    every call, exactly like Sardine's P().
+
+    Example:
+        cache = PatternCache(maxsize=256)
+        cache.compile("0.5 0.25")   # [0.5, 0.25], parsed
+        cache.compile("0.5 0.25")   # same list, from the cache
+        cache.info()                # {"hits": 1, "misses": 1, ...}
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._patterns: OrderedDict[str, list] = OrderedDict()
+        # Static-ness of every pattern seen, so the regexes run once per string
+        self._static: dict[str, bool] = {}
+        self._lengths: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.dynamic = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def __contains__(self, pattern: str) -> bool:
+        return pattern in self._patterns
+
+    def compile(self, pattern: str):
+        """
+        Get the parsed form of a pattern (what `bowl.parser.parse()` returns).
+
+        The result is shared between callers, do not modify it.
+        """
+        with self._lock:
+            compiled = self._patterns.get(pattern)
+            if compiled is not None:
+                self._patterns.move_to_end(pattern)
+                self.hits += 1
+                return compiled
+
+            static = self._static.get(pattern)
+            if static is None:
+                if len(self._static) >= 4 * self.maxsize:
+                    self._static.clear()
+                static = self._static[pattern] = is_static(pattern)
+            if static:
+                self.misses += 1
+            else:
+                self.dynamic += 1
+
+        # Parse outside the lock, it is the slow part
+        compiled = bowl.parser.parse(pattern)
+        if not static:
+            return compiled
+
+        with self._lock:
+            self._patterns[pattern] = compiled
+            if len(self._patterns) > self.maxsize:
+                self._patterns.popitem(last=False)
+                self.evictions += 1
+        return compiled
+
+    def length(self, pattern: str) -> int:
+        """
+        Number of steps in a pattern, memoized per pattern string.
+
+        The length of a dynamic pattern is taken from its first parse: randomness
+        picks values, it does not usually change how many there are.
+        """
+        length = self._lengths.get(pattern)
+        if length is None:
+            values = self.compile(pattern)
+            length = len(values) if isinstance(values, list) else 1
+            with self._lock:
+                if len(self._lengths) >= 4 * self.maxsize:
+                    self._lengths.clear()
+                self._lengths[pattern] = length
+        return length
+
+    def info(self) -> dict:
+        """Counters for checking the cache in a live set."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "dynamic": self.dynamic,
+            "evictions": self.evictions,
+            "size": len(self._patterns),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        """Forget every pattern and reset the counters."""
+        with self._lock:
+            self._patterns.clear()
+            self._static.clear()
+            self._lengths.clear()
+            self.hits = self.misses = self.dynamic = self.evictions = 0
+
+
+_PATTERN_CACHE = PatternCache()
+
+
+def get_pattern_cache() -> PatternCache:
+    """Get the cache used by P(), loop() and cut()."""
+    return _PATTERN_CACHE
+
+
+def pattern_cache_info() -> dict:
+    """Hit/miss counters of the shared pattern cache (see `PatternCache.info()`)."""
+    return _PATTERN_CACHE.info()
+
+
+def is_pattern(value) -> bool:
+    """
+    Check if the value is a pattern string.
+    A pattern is any string that cannot be interpreted as a float.
+    """
+    if not isinstance(value, str):
+        return False
+    try:
+        float(value)
+        return False
+    except ValueError:
+        return True
+
+
+def pattern_length(pattern: str) -> int:
+    """
+    Number of steps in a pattern (e.g. 12 for "[0.04 0.015]!!6"), parsed only once.
+    """
+    return _PATTERN_CACHE.length(pattern.replace("None", "."))
+
+
+def infer_n_steps(*values) -> int | None:
+    """
+    Length of the longest pattern among the given values.
+
+    Values that are not pattern strings (numbers, None...) are ignored.
+
+    Returns:
+        The number of steps, or None if no value is a pattern
+    """
+    lengths = [pattern_length(value) for value in values if is_pattern(value)]
+    return max(lengths) if lengths else None
+
+
+def P(pattern: str, i: int = 0, div: int = 1, rate: int = 1):
+    """
+    Drop-in replacement for Sardine's P() that parses each static pattern only once.
+
+    Args:
+        pattern: A pattern to be parsed
+        i: Index for iterators
+        div: Divisor of the index (step through the pattern every `div` steps)
+        rate: Speed of the index
+
+    Returns:
+        The ith element of the pattern
+    """
+    values = _PATTERN_CACHE.compile(pattern)
+    if not isinstance(values, list):
+        return values
+    if not values:
+        raise ValueError(f"Cannot pattern an empty sequence: {values!r}")
+    return values[floor(i * rate / div) % len(values)]
@@ -1,7 +1,39 @@
+from collections.abc import Callable
 from collections.abc import Iterable as IterableClass
+from typing import NamedTuple
 
 from sardine_core.handlers.player import Player
-from sardine_core.run import P, bowl, die, sleep, swim
+from sardine_core.run import D as original_D
+from sardine_core.run import bowl, die, sleep, swim
+
+from .dispatch import batch, send_dirt
+from .patterns import P, infer_n_steps
+from .senders import D
+
+# Sender arguments that are not Sardine patterns (Ziffers has its own syntax)
+_NOT_PATTERNS = frozenset({"ziff"})
+
+# Senders that pick the i-th element of every pattern argument, so their
+# arguments can be resolved ahead of time (other callables get them untouched)
+_STEP_SENDERS = (D, original_D, send_dirt)
+
+# Arguments that change how a step sender indexes its patterns
+_INDEXING_ARGS = frozenset({"d", "r", "divisor", "rate", "loaf", "on"})
+
+# A rest in one of these means no event (what our D's rest handling does)
+_NOTE_ARGS = ("n", "midinote", "freq")
+
+
+class PlannedStep(NamedTuple):
+    """
+    One step of a pre-rendered cycle.
+
+    duration is in beats, or None when it comes from the first sender's
+    return value. events are (sender, kwargs) calls to make.
+    """
+
+    duration: float | None
+    events: list[tuple[Callable, dict]]
 
 
 def create_player(name: str) -> Player:
@@ -20,37 +52,160 @@ def create_player(name: str) -> Player:
     return p
 
 
+def _infer_loop_steps(sender_configs: tuple, p: None | float | str) -> int:
+    n_steps = infer_n_steps(
+        p,
+        *(
+            value
+            for _, kwargs in sender_configs
+            for key, value in kwargs.items()
+            if key not in _NOT_PATTERNS
+        ),
+    )
+    if n_steps is None:
+        raise ValueError("Cannot infer n_steps: no pattern in p or the sender arguments")
+    return n_steps
+
+
+def _resolve_step(sender: Callable, kwargs: dict, j: int) -> dict | None:
+    """
+    Arguments for step j of a sender, with patterns already evaluated.
+
+    Resolved values are wrapped in one-element lists: Sardine indexes those
+    like patterns and keeps lists inside them (chords) polyphonic. Returns
+    None if the step is a rest.
+
+    Numbers are sent as they are, but Sardine parses any string it is given:
+    a resolved string value (a sound name like "bd:3") is joined and parsed
+    again by its maybe_parse on every step. That parse is of a single name,
+    much cheaper than the pattern it came from, but it is not skipped.
+    """
+    call_kwargs = kwargs.copy()
+    call_kwargs["i"] = j
+    if sender not in _STEP_SENDERS or not _INDEXING_ARGS.isdisjoint(kwargs):
+        return call_kwargs
+
+    for key, value in kwargs.items():
+        if isinstance(value, str) and key not in _NOT_PATTERNS:
+            value = P(value, i=j)
+            if value is None and (key == "sound" or (sender is D and key in _NOTE_ARGS)):
+                return None
+            call_kwargs[key] = [value]
+    return call_kwargs
+
+
+def render_cycle(
+    *sender_configs: tuple,
+    n_steps: int | None = None,
+    p: None | float | str = None,
+) -> list[PlannedStep]:
+    """
+    Work out every step of a loop() cycle without playing anything.
+
+    Patterns in the arguments of D are evaluated here, so playing the plan
+    with `play_cycle()` only calls the senders and sleeps. Other senders (cut,
+    custom functions...) are planned with their arguments as they are.
+
+    Args:
+        *sender_configs: Tuples of (sender, kwargs_dict), as for loop()
+        n_steps: Number of steps (default: inferred as in loop())
+        p: Step duration, as for loop()
+
+    Returns:
+        One PlannedStep per step
+    """
+    if n_steps is None:
+        n_steps = _infer_loop_steps(sender_configs, p)
+
+    plan = []
+    for j in range(n_steps):
+        events = []
+        for sender, kwargs in sender_configs:
+            call_kwargs = _resolve_step(sender, kwargs, j)
+            if call_kwargs is not None:
+                events.append((sender, call_kwargs))
+
+        if isinstance(p, str):
+            duration = P(p, i=j)
+        else:
+            duration = p
+
+        plan.append(PlannedStep(duration, events))
+    return plan
+
+
+def play_cycle(plan: list[PlannedStep]) -> float:
+    """
+    Play a cycle rendered by `render_cycle()`.
+
+    Returns:
+        Total duration of the cycle (for use with again())
+    """
+    total_duration = 0
+    step_duration = None
+    for step in plan:
+        with batch():
+            for sender, kwargs in step.events:
+                result = sender(**kwargs)
+                if step.duration is None and result is not None:
+                    step_duration = result
+
+        if step.duration is not None:
+            step_duration = step.duration
+
+        sleep(step_duration)
+        total_duration += step_duration
+
+    return total_duration
+
+
 def loop(
     *sender_configs: tuple,
-    n_steps: int,
+    n_steps: int | None = None,
     p: None | float | str = None,
+    prerender: bool = False,
 ) -> float:
     """
     This function creates a temporal loop that plays through multiple steps of a pattern,
     handling the timing/sleep between steps automatically.
 
+    With lookahead enabled (see `enable_lookahead()`), the events of all the
+    senders in a step are sent as one OSC bundle.
+
     Args:
         *sender_configs: Tuples of (sender_name, kwargs_dict)
         n_steps: Number of steps to play in this cycle
+                 (default: length of the longest pattern in p and the sender kwargs)
         p: Step duration:
            - None: Use return value from first sender (for variable timing)
            - float: Fixed step duration
            - str: Pattern string to evaluate with P() for variable timing
+        prerender: Evaluate every pattern of the cycle first (see `render_cycle()`),
+                   then play it, so the steps themselves do no pattern work.
+                   Worth it for long, busy loops.
 
     Returns:
         Total duration of the loop (for use with again())
     """
+    if n_steps is None:
+        n_steps = _infer_loop_steps(sender_configs, p)
+
+    if prerender:
+        return play_cycle(render_cycle(*sender_configs, n_steps=n_steps, p=p))
+
     total_duration = 0
 
     for j in range(n_steps):
-        for sender, kwargs in sender_configs:
-            call_kwargs = kwargs.copy()
-            call_kwargs["i"] = j
+        # One OSC bundle per step for all the senders (with lookahead enabled)
+        with batch():
+            for sender, kwargs in sender_configs:
+                call_kwargs = kwargs.copy()
+                call_kwargs["i"] = j
 
-            result = sender(**call_kwargs)
+                result = sender(**call_kwargs)
 
-            if p is None and result is not None:
-                step_duration = result
+                if p is None and result is not None:
+                    step_duration = result
 
         if isinstance(p, str):
             step_duration = P(p, i=j)
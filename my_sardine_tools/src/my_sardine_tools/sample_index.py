@@ -0,0 +1,96 @@
+import json
+import os
+from pathlib import Path
+
+INDEX_VERSION = 2
+
+
+def default_index_path() -> Path:
+    """
+    Location of the shared sample index (respects $XDG_CACHE_HOME).
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "my_sardine_tools" / "sample_index.json"
+
+
+class SampleIndex:
+    """
+    Persistent index of metadata probed from audio files.
+
+    Entries are keyed by absolute path and are only trusted while the file's
+    size and mtime still match, so only new or changed files need probing.
+
+    Example:
+        index = SampleIndex()
+        entry = index.get(path)
+        if entry is None:
+            entry = index.put(path, duration=sf.info(str(path)).duration)
+        index.save()
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path is not None else default_index_path()
+        self._entries: dict[str, dict] = {}
+        self._dirty = False
+        self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self) -> None:
+        """Read the index from disk, starting empty if it is missing or unreadable."""
+        try:
+            with self.path.open() as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == INDEX_VERSION:
+            self._entries = data.get("entries", {})
+
+    def save(self) -> None:
+        """Write the index to disk if anything changed since it was loaded."""
+        if not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("w") as f:
+            json.dump({"version": INDEX_VERSION, "entries": self._entries}, f)
+        # Atomic swap so a crash mid-write never leaves a truncated index
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def get(self, file_path: str | Path, stat: os.stat_result | None = None) -> dict | None:
+        """
+        Return the cached entry for a file, or None if it is unknown or stale.
+
+        Args:
+            file_path: Path to the audio file
+            stat: Result of `os.stat()` on the file, if the caller already has it
+        """
+        entry = self._entries.get(os.path.abspath(file_path))
+        if entry is None:
+            return None
+
+        if stat is None:
+            stat = os.stat(file_path)
+        if entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns:
+            return None
+        return entry
+
+    def put(self, file_path: str | Path, stat: os.stat_result | None = None, **fields) -> dict:
+        """
+        Store probed metadata for a file and return the new entry.
+
+        Args:
+            file_path: Path to the audio file
+            stat: Result of `os.stat()` on the file, if the caller already has it
+            **fields: Metadata to store (e.g. duration=1.5)
+        """
+        if stat is None:
+            stat = os.stat(file_path)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, **fields}
+        self._entries[os.path.abspath(file_path)] = entry
+        self._dirty = True
+        return entry
@@ -1,39 +1,304 @@
-import random
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Callable
 
+import numpy as np
 import soundfile as sf
-from sardine_core.run import D, P, bowl, sleep
+from sardine_core.run import bowl, sleep
 
-_SAMPLE_LENGTHS = {}
+from .analysis import detect_onsets, measure_levels
+from .audio_info import read_header
+from .budget import get_grain_budget
+from .dispatch import get_dispatcher, send_dirt
+from .patterns import P, infer_n_steps, is_pattern
+from .sample_index import SampleIndex
+from .store import MAX_FAMILY_LENGTH, STORE_FIELDS, SampleStore
+
+_SAMPLE_STORE = SampleStore()
+
+AUDIO_SUFFIXES = (".wav", ".aif", ".aiff", ".flac", ".mp3")
+
+# Where the last calculate_sample_lengths() looked, so single families can be rescanned
+_SAMPLE_DIRS: list[Path] = []
+_SAMPLE_FAMILIES: list[str] | None = None
+_SAMPLE_INDEX: SampleIndex | None = None
+
+# Families a lazy lookup already scanned
+_SCANNED_FAMILIES: set[str] = set()
+_LAZY = False
+
+# Held while a scan updates the sample index and the store: lazy lookups and the
+# sample watcher thread would otherwise interleave their updates and index saves
+_SCAN_LOCK = threading.RLock()
+
+# Audio analyses run by the last calculate_sample_lengths() (see _ANALYZERS)
+_ANALYSES: tuple[str, ...] = ()
+
+# SuperDirt's amp when none is given
+DIRT_DEFAULT_AMP = 0.4
+
+# Loudness that normalize=True aims for, in dB (roughly LUFS)
+DEFAULT_LOUDNESS = -20.0
+
+
+def get_store() -> SampleStore:
+    """Get the store holding the metadata of every scanned sample."""
+    return _SAMPLE_STORE
+
+
+def set_store(store: SampleStore) -> None:
+    """Replace the sample store, e.g. with one from `SampleStore.load()`."""
+    global _SAMPLE_STORE
+    _SAMPLE_STORE = store
 
 
 def set_lengths(lengths):
-    global _SAMPLE_LENGTHS
-    _SAMPLE_LENGTHS = lengths
+    set_store(SampleStore.from_lengths(lengths))
 
 
 def get_length(sample):
-    if sample not in _SAMPLE_LENGTHS:
-        raise KeyError(
-            f"Sample '{sample}' not found. Did you forget to call `calculate_sample_lengths()`?"
+    if sample not in _SAMPLE_STORE:
+        family = sample.partition(":")[0]
+        with _SCAN_LOCK:
+            # First use of this family: scan just this one folder name
+            if (
+                _LAZY
+                and family not in _SCANNED_FAMILIES
+                and (_SAMPLE_FAMILIES is None or family in _SAMPLE_FAMILIES)
+            ):
+                rescan_family(family)
+        if sample not in _SAMPLE_STORE:
+            raise KeyError(
+                f"Sample '{sample}' not found. Did you forget to call `calculate_sample_lengths()`?"
+            )
+    return _SAMPLE_STORE.get(sample)
+
+
+def get_onsets(sample: str) -> list[float]:
+    """
+    Get the onset (transient) times of a sample in seconds.
+
+    Onsets are detected ahead of time by `calculate_sample_lengths(onsets=True)`,
+    so this is only a lookup.
+
+    Raises:
+        KeyError: If the sample is unknown
+        ValueError: If the sample was scanned without onset detection
+    """
+    get_length(sample)  # raises for unknown samples, scans lazy families
+    onsets = _SAMPLE_STORE.get(sample, "onsets")
+    if onsets is None:
+        raise ValueError(
+            f"No onsets for '{sample}'. Call `calculate_sample_lengths(onsets=True)` first."
         )
-    return _SAMPLE_LENGTHS[sample]
+    return onsets.tolist()
 
 
-def calculate_sample_lengths(samples_dir=None, sample_families=None) -> dict[str, float]:
+def get_gain(sample: str, target: float = DEFAULT_LOUDNESS) -> float:
     """
-    Calculate the lengths of audio samples and store them in a dictionary.
+    Get the amplitude factor that brings a sample to a target loudness.
+
+    Loudness is measured ahead of time by `calculate_sample_lengths(levels=True)`,
+    so this is only a lookup. The gain is limited so the sample's peak never
+    goes past full scale; silent samples get 1.0.
 
     Args:
-        samples_dir: The directory or list of directories containing the sample folders
-                    (default: uses SuperDirt's default location)
-        sample_families: List of sample families to include (e.g., ["bd", "sfx"]). If None, include all.
+        sample: Sample name (e.g., "sfx:0")
+        target: Loudness to aim for in dB (roughly LUFS)
 
-    Returns:
-        Dictionary mapping sample names (e.g., "sfx:0") to their lengths in seconds
+    Raises:
+        KeyError: If the sample is unknown
+        ValueError: If the sample was scanned without level analysis
+    """
+    get_length(sample)  # raises for unknown samples, scans lazy families
+    peak = _SAMPLE_STORE.get(sample, "peak")
+    if math.isnan(peak):
+        raise ValueError(
+            f"No levels for '{sample}'. Call `calculate_sample_lengths(levels=True)` first."
+        )
+    loudness = _SAMPLE_STORE.get(sample, "loudness")
+    if peak <= 0 or math.isnan(loudness):
+        return 1.0
+    return min(10 ** ((target - loudness) / 20), 1 / peak)
+
+
+def scale_amp(amp: float | str | None, gain: float) -> float | str:
+    """
+    Multiply an `amp` argument by a gain.
+
+    Numbers are scaled directly, pattern strings get a multiplication appended,
+    and a missing amp starts from SuperDirt's default (0.4).
+    """
+    if amp is None:
+        amp = DIRT_DEFAULT_AMP
+    if isinstance(amp, str):
+        try:
+            amp = float(amp)
+        except ValueError:
+            return f"[{amp}] * {gain:.6g}"
+    return amp * gain
+
+
+def _normalize_target(normalize: bool | float | None) -> float | None:
+    """Target loudness for a `normalize=` argument, or None to leave levels alone."""
+    if normalize is None or normalize is False:
+        return None
+    if normalize is True:
+        return DEFAULT_LOUDNESS
+    return float(normalize)
+
+
+def normalized_amp(
+    sample: str, amp: float | str | None, normalize: bool | float | None
+) -> float | str | None:
+    """
+    The `amp` to send so a sample plays at the loudness asked for by `normalize=`.
+
+    Args:
+        sample: Sample name (e.g., "sfx:0")
+        amp: The amp argument as given (number, pattern string or None)
+        normalize: True for DEFAULT_LOUDNESS, a target loudness in dB,
+                   or None/False to return amp unchanged
+
+    Example:
+        D("sfx:1", amp=normalized_amp("sfx:1", 0.5, True))
+    """
+    target = _normalize_target(normalize)
+    if target is None:
+        return amp
+    return scale_amp(amp, get_gain(sample, target))
+
+
+def _detect_onsets(file_path: Path) -> dict:
+    try:
+        return {"onsets": detect_onsets(file_path)}
+    except (RuntimeError, ValueError) as e:
+        print(f"Warning: could not detect onsets in {file_path}: {e}")
+        return {"onsets": []}
+
+
+def _measure_levels(file_path: Path) -> dict:
+    try:
+        return measure_levels(file_path)
+    except (RuntimeError, ValueError) as e:
+        print(f"Warning: could not measure levels of {file_path}: {e}")
+        return {"peak": 0.0, "rms": 0.0, "loudness": None}
+
+
+# Analysis name -> (index fields it fills, function computing them from a path)
+_ANALYZERS = {
+    "onsets": (("onsets",), _detect_onsets),
+    "levels": (("peak", "rms", "loudness"), _measure_levels),
+}
+
+
+def _analyze(file_path: Path, analyses: tuple[str, ...]) -> dict:
+    fields = {}
+    for name in analyses:
+        fields.update(_ANALYZERS[name][1](file_path))
+    return fields
+
+
+def _read_metadata(file_path: Path, analyses: tuple[str, ...] = ()) -> dict:
+    """
+    Read duration and stream info of an audio file from its header, falling back
+    to soundfile for formats the header parser does not handle (mp3, compressed AIFC...).
+    Any `analyses` (see _ANALYZERS) read the audio itself.
+    """
+    try:
+        info = read_header(file_path)
+    except ValueError:
+        info = sf.info(str(file_path))
+    metadata = {
+        "duration": info.duration,
+        "frames": info.frames,
+        "channels": info.channels,
+        "samplerate": info.samplerate,
+    }
+    metadata.update(_analyze(file_path, analyses))
+    return metadata
+
+
+def _probe(
+    file_path: Path, sample_index: SampleIndex | None = None, analyses: tuple[str, ...] = ()
+) -> dict:
+    """
+    Get the metadata of an audio file, reusing the index entry if the file is unchanged.
+    """
+    if sample_index is None:
+        return _read_metadata(file_path, analyses)
+
+    stat = file_path.stat()
+    entry = sample_index.get(file_path, stat)
+    if entry is None:
+        return sample_index.put(file_path, stat, **_read_metadata(file_path, analyses))
+
+    # Indexed by a scan that ran fewer analyses: only compute what is missing
+    missing = tuple(
+        name for name in analyses if any(field not in entry for field in _ANALYZERS[name][0])
+    )
+    if missing:
+        entry = sample_index.put(file_path, stat, **(entry | _analyze(file_path, missing)))
+    return entry
+
+
+def _probe_all(
+    files: list[Path],
+    sample_index: SampleIndex | None = None,
+    workers: int = 1,
+    analyses: tuple[str, ...] = (),
+) -> list[dict | None]:
+    """
+    Probe the metadata of many files, in order, optionally on a thread pool.
+    Files that cannot be read are reported and get None.
+    """
+
+    def probe(file_path):
+        try:
+            return _probe(file_path, sample_index, analyses)
+        except Exception as e:
+            print(f"Error processing {file_path}: {e}")
+            return None
+
+    if workers > 1 and len(files) > 1:
+        # libsndfile releases the GIL, so threads overlap the file opens
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(probe, files))
+    return [probe(f) for f in files]
+
+
+def _store_records(sample_names: list[str], entries: list[dict | None]) -> list[tuple]:
+    """
+    (name, duration, fields) records for the sample store, skipping unreadable files
+    and families whose name is too long for the store.
+    """
+    records = []
+    too_long = set()
+    for sample_name, entry in zip(sample_names, entries):
+        family = sample_name.partition(":")[0]
+        if len(family) > MAX_FAMILY_LENGTH:
+            too_long.add(family)
+        elif entry is not None:
+            fields = {
+                field: entry[field]
+                for field in STORE_FIELDS + ("onsets",)
+                if entry.get(field) is not None
+            }
+            records.append((sample_name, entry["duration"], fields))
+    for family in sorted(too_long):
+        print(
+            f"Warning: skipping sample family '{family}', names are limited to "
+            f"{MAX_FAMILY_LENGTH} characters"
+        )
+    return records
+
+
+def _resolve_samples_dirs(samples_dir) -> list[Path]:
+    """
+    Turn the samples_dir argument into a list of directories.
     """
-    # Handle samples_dir input
     if samples_dir is None:
         # Try common SuperDirt sample locations
         potential_paths = [
@@ -67,12 +332,93 @@ def calculate_sample_lengths(samples_dir=None, sample_families=None) -> dict[str
             # Assume it's a list/iterable of directories
             samples_dirs = [Path(d) for d in samples_dir]
 
-    sample_lengths = {}
+    return samples_dirs
+
+
+def _open_index(index: bool | str | Path) -> SampleIndex | None:
+    if index is True:
+        return SampleIndex()
+    if index:
+        return SampleIndex(index)
+    return None
+
+
+def _save_index(sample_index: SampleIndex | None) -> None:
+    if sample_index is None:
+        return
+    try:
+        sample_index.save()
+    except OSError as e:
+        print(f"Warning: could not write sample index {sample_index.path}: {e}")
+
+
+def _list_audio_files(family_dir: Path) -> list[Path]:
+    """
+    List the audio files of a family directory, sorted the way SuperDirt numbers them.
+    """
+    audio_files = [f for f in family_dir.iterdir() if f.suffix.lower() in AUDIO_SUFFIXES]
+    audio_files.sort()
+    return audio_files
+
+
+def calculate_sample_lengths(
+    samples_dir=None,
+    sample_families=None,
+    index: bool | str | Path = True,
+    workers: int = 1,
+    lazy: bool = False,
+    onsets: bool = False,
+    levels: bool = False,
+) -> dict[str, float]:
+    """
+    Calculate the lengths of audio samples and store them in a dictionary.
+
+    Durations are cached in a persistent index keyed by path, size and mtime,
+    so on later runs only new or changed files are opened.
+
+    Args:
+        samples_dir: The directory or list of directories containing the sample folders
+                    (default: uses SuperDirt's default location)
+        sample_families: List of sample families to include (e.g., ["bd", "sfx"]). If None, include all.
+        index: Path to the index file, True for the default location
+               (~/.cache/my_sardine_tools/sample_index.json) or False to always probe files
+        workers: Number of threads used to probe files that are not in the index.
+                 Worth raising for cold scans of large or network-mounted libraries.
+        lazy: Only remember the directories and scan nothing now. The first
+              `get_length()` of a family (e.g. "sfx:3") scans that family alone.
+        onsets: Also detect the transients of every sample (needed by
+                `cut(..., slices="onsets")`). This reads the audio, so the first
+                scan is slower; the results are kept in the index.
+        levels: Also measure the peak, RMS and loudness of every sample (needed
+                by `normalize=` and `get_gain()`). Cached in the index like onsets.
+
+    Returns:
+        Dictionary mapping sample names (e.g., "sfx:0") to their lengths in seconds
+        (empty in lazy mode)
+    """
+    global _SAMPLE_DIRS, _SAMPLE_FAMILIES, _SAMPLE_INDEX, _LAZY, _ANALYSES
+
+    samples_dirs = _resolve_samples_dirs(samples_dir)
+    sample_index = _open_index(index)
+
+    _SAMPLE_DIRS = samples_dirs
+    _SAMPLE_FAMILIES = sample_families
+    _SAMPLE_INDEX = sample_index
+    _LAZY = lazy
+    _ANALYSES = tuple(name for name, wanted in (("onsets", onsets), ("levels", levels)) if wanted)
+    _SCANNED_FAMILIES.clear()
+    if lazy:
+        set_store(SampleStore())
+        return {}
+
+    # (sample name, file) pairs in SuperDirt order
+    sample_files = []
+    family_counts = {}
 
     # Process each samples directory
     for samples_dir_path in samples_dirs:
         # Get list of sample families if not provided (from first directory)
-        if sample_families is None and not sample_lengths:  # Only do this once
+        if sample_families is None:  # Only do this once
             sample_families = [d.name for d in samples_dir_path.iterdir() if d.is_dir()]
 
         for family in sample_families:
@@ -81,47 +427,73 @@ def calculate_sample_lengths(samples_dir=None, sample_families=None) -> dict[str
                 print(f"Warning: Sample family '{family}' not found in {samples_dir_path}")
                 continue
 
-            # List all audio files in the directory
-            audio_files = [
-                f
-                for f in family_dir.iterdir()
-                if f.suffix.lower() in [".wav", ".aif", ".aiff", ".flac", ".mp3"]
-            ]
-
-            # Sort audio files to ensure consistent numbering
-            audio_files.sort()
+            audio_files = _list_audio_files(family_dir)
 
             # Start numbering from where we left off for this family
-            start_index = len([k for k in sample_lengths.keys() if k.startswith(f"{family}:")])
+            start_index = family_counts.get(family, 0)
+            family_counts[family] = start_index + len(audio_files)
 
             for i, file_path in enumerate(audio_files):
-                try:
-                    info = sf.info(str(file_path))
-                    duration = info.duration
+                # SuperDirt-style naming (e.g., "bd:0")
+                sample_files.append((f"{family}:{start_index + i}", file_path))
+
+    with _SCAN_LOCK:
+        entries = _probe_all([f for _, f in sample_files], sample_index, workers, _ANALYSES)
+        _save_index(sample_index)
 
-                    # Store in dictionary with SuperDirt-style naming (e.g., "bd:0")
-                    sample_name = f"{family}:{start_index + i}"
-                    sample_lengths[sample_name] = duration
+        store = SampleStore()
+        store.extend(_store_records([name for name, _ in sample_files], entries))
+        set_store(store)
+    return store.lengths()
 
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
 
-    set_lengths(sample_lengths)
-    return sample_lengths
+def rescan_family(family: str) -> dict[str, float]:
+    """
+    Rescan one sample family and update the sample store in place.
+
+    The family is looked up in every directory used by the last
+    `calculate_sample_lengths()` call and renumbered the way SuperDirt does,
+    continuing the numbering from one directory to the next. Entries of other
+    families are left untouched. Safe to call from another thread (the sample
+    watcher does): scans take turns updating the index and the store.
 
+    Args:
+        family: Sample family name (e.g., "sfx")
 
-def _is_pattern(value: str | None | float) -> bool:
+    Returns:
+        Dictionary with the new lengths of this family
     """
-    Check if the value is a pattern string.
-    A pattern is any string that cannot be interpreted as a float.
+    sample_files = []
+    for samples_dir_path in _SAMPLE_DIRS:
+        family_dir = samples_dir_path / family
+        if family_dir.is_dir():
+            sample_files.extend(_list_audio_files(family_dir))
+
+    with _SCAN_LOCK:
+        entries = _probe_all(sample_files, _SAMPLE_INDEX, analyses=_ANALYSES)
+        _save_index(_SAMPLE_INDEX)
+
+        sample_names = [f"{family}:{i}" for i in range(len(sample_files))]
+        records = _store_records(sample_names, entries)
+        _SAMPLE_STORE.replace_family(family, records)
+        _SCANNED_FAMILIES.add(family)
+    return {name: duration for name, duration, _ in records}
+
+
+def _onset_bounds(
+    sample: str, sample_length: float, base_start: float | None, base_end: float | None
+) -> list[float]:
     """
-    if not isinstance(value, str):
-        return False
-    try:
-        float(value)
-        return False
-    except ValueError:
-        return True
+    Slice boundaries (0.0 to 1.0) at the onsets of a sample within [base_start, base_end].
+    """
+    base_start = 0.0 if base_start is None else base_start
+    base_end = 1.0 if base_end is None else base_end
+    # Hits this close to the range edges would only make a click-length slice
+    margin = 0.01 / sample_length if sample_length > 0 else 0.0
+
+    positions = [t / sample_length for t in get_onsets(sample)] if sample_length > 0 else []
+    inner = [x for x in positions if base_start + margin < x < base_end - margin]
+    return [base_start, *inner, base_end]
 
 
 def cut(
@@ -134,6 +506,8 @@ def cut(
     base_start: float | None = None,
     base_end: float | None = None,
     speed: float | str | None = None,
+    slices: str = "equal",
+    normalize: bool | float | None = None,
     **kwargs,
 ) -> float:
     """
@@ -142,6 +516,7 @@ def cut(
     Args:
         sample: Sample name (e.g., "sfx:0")
         n_slices: Number of equal slices to divide the sample into
+                  (ignored with slices="onsets")
         sequence: Pattern of slice indices to play (0 to n_slices-1)
         n_steps: Length of the loop
         p: Period or duration for each slice
@@ -149,30 +524,50 @@ def cut(
         base_start: Start position of the sample (0.0 to 1.0)
         base_end: End position of the sample (0.0 to 1.0)
         speed: Playback speed (can be a pattern string)
+        slices: "equal" for n_slices equal slices, or "onsets" to cut at the
+                detected hits between base_start and base_end (one slice per hit,
+                each as long as the gap to the next hit; indices wrap around).
+                Needs `calculate_sample_lengths(onsets=True)`.
+        normalize: Scale amp so the sample plays at a common loudness: True for
+                   DEFAULT_LOUDNESS or a target in dB (e.g. -14 for louder).
+                   Needs `calculate_sample_lengths(levels=True)`.
         **kwargs: Additional arguments to pass to the sender (D)
 
     Returns:
         Total duration of all slices played
+
+    Example:
+        cut("break:0", slices="onsets", sequence="0 1 0 2 3 . 3 1")
     """
     sample_length = get_length(sample)
 
+    if slices == "onsets":
+        bounds = _onset_bounds(sample, sample_length, base_start, base_end)
+        n_slices = len(bounds) - 1
+    elif slices == "equal":
+        bounds = None
+    else:
+        raise ValueError(f"Unknown slices mode '{slices}' (expected 'equal' or 'onsets')")
+
+    if _normalize_target(normalize) is not None:
+        kwargs["amp"] = normalized_amp(sample, kwargs.get("amp"), normalize)
+
     if n_steps is None:
-        if sequence is None and not _is_pattern(p):
+        if sequence is None and not is_pattern(p):
             n_steps = n_slices
         else:
-            potential_patterns = (
-                p,
-                sequence,
-                speed,
-                kwargs.get("note"),
-                kwargs.get("pan"),
-                kwargs.get("amp"),
-                kwargs.get("gain"),
-                kwargs.get("shape"),
-            )
-            patterns = [pattern for pattern in potential_patterns if _is_pattern(pattern)]
-            n_steps = max(
-                len(bowl.parser.parse(str(pattern).replace("None", "."))) for pattern in patterns
+            n_steps = (
+                infer_n_steps(
+                    p,
+                    sequence,
+                    speed,
+                    kwargs.get("note"),
+                    kwargs.get("pan"),
+                    kwargs.get("amp"),
+                    kwargs.get("gain"),
+                    kwargs.get("shape"),
+                )
+                or 1
             )
 
     if base_start is None:
@@ -198,19 +593,29 @@ def cut(
         if abs(actual_speed) == 0:
             actual_speed = 1.0
 
+        # Length of this slice relative to an average slice
+        slice_share = 1.0
+
         if current_slice is not None:
+            if bounds is not None:
+                current_slice = int(current_slice) % n_slices
+                begin, end = bounds[current_slice], bounds[current_slice + 1]
+                slice_share = (end - begin) * n_slices / (base_end - base_start)
+            else:
+                begin = base_start + (base_end - base_start) / n_slices * current_slice
+                end = (base_end - base_start) / n_slices * (current_slice + 1)
             params = (
                 dict(
                     sound=sample,
-                    begin=base_start + (base_end - base_start) / n_slices * current_slice,
-                    end=(base_end - base_start) / n_slices * (current_slice + 1),
+                    begin=begin,
+                    end=end,
                     speed=actual_speed,
                     cut=1,
                     i=j,
                 )
                 | kwargs
             )
-            D(**params)
+            send_dirt(**params)
 
         if isinstance(p, str):
             step_duration = P(p, i=j)
@@ -219,10 +624,10 @@ def cut(
         else:  # Auto-calculate based on speed
             if stretch is None:
                 base_slice_duration = (sample_length / n_slices) / bowl.clock.beat_duration
-                step_duration = base_slice_duration / abs(actual_speed)
+                step_duration = base_slice_duration * slice_share / abs(actual_speed)
             else:
                 base_slice_duration = stretch / n_slices
-                step_duration = base_slice_duration / abs(actual_speed)
+                step_duration = base_slice_duration * slice_share / abs(actual_speed)
 
         sleep(step_duration)
         total_duration += step_duration
@@ -230,6 +635,78 @@ def cut(
     return total_duration
 
 
+# Grain parameters, in the order grain_cloud() rows are sent
+_GRAIN_FIELDS = ("begin", "end", "speed", "amp", "pan")
+
+
+def grain_cloud(
+    n_grains: int,
+    grain_size: float = 0.1,
+    position_jitter: float = 0.2,
+    speed_range: tuple[float, float] = (-2.0, 1.0),
+    amp_jitter: float = 0.1,
+    pan_range: tuple[float, float] = (0.0, 1.0),
+    base_speed: float = 1.0,
+    base_amp: float = 0.8,
+    rng: np.random.Generator | int | None = None,
+) -> dict[str, np.ndarray]:
+    """
+    Draw the parameters of many grains at once.
+
+    Takes the same parameters as `granulate()`; all the random numbers come
+    from a single call on `rng`, so a seed reproduces the exact same cloud.
+
+    Args:
+        n_grains: Number of grains
+        rng: NumPy Generator, or a seed for a new one (None: unseeded)
+
+    Returns:
+        Dictionary of arrays of length n_grains: begin, end, speed, amp and pan
+
+    Example:
+        grain_cloud(4, rng=7)["begin"]  # array([0.48, 0.9, 0.5, 0.33]), every time
+    """
+    rng = np.random.default_rng(rng)
+    position, offset, speed, amp, pan = rng.random((5, n_grains))
+
+    span = 1.0 - grain_size
+    begin = np.clip(position * span + (offset * 2 - 1) * position_jitter, 0.0, span)
+    min_speed, max_speed = speed_range
+    min_pan, max_pan = pan_range
+    return {
+        "begin": begin,
+        "end": begin + grain_size,
+        "speed": base_speed + min_speed + speed * (max_speed - min_speed),
+        "amp": base_amp + (amp * 2 - 1) * amp_jitter,
+        "pan": np.clip(min_pan + pan * (max_pan - min_pan), 0.0, 1.0),
+    }
+
+
+def _send_grains(dispatcher, sample: str, cloud: dict, grain_duration: float, kwargs: dict) -> None:
+    """Send a whole grain cloud ahead of time as timestamped bundles."""
+    # Build the messages once, then only fill in the grain parameters
+    template = dispatcher.messages(sample, **(kwargs | dict.fromkeys(_GRAIN_FIELDS, 0.0)))
+    if not template:
+        return
+    # Messages are flat [key, value, ...] lists: value of the nth key is at 2n + 1
+    slots = [[message[::2].index(field) * 2 + 1 for field in _GRAIN_FIELDS] for message in template]
+
+    rows = np.column_stack([cloud[field] for field in _GRAIN_FIELDS]).tolist()
+    offsets = np.arange(len(rows)) * (grain_duration * bowl.clock.beat_duration)
+    times = (dispatcher.event_time() + offsets).tolist()
+
+    events = []
+    for timestamp, row in zip(times, rows):
+        messages = []
+        for message, positions in zip(template, slots):
+            message = message.copy()
+            for position, value in zip(positions, row):
+                message[position] = value
+            messages.append(message)
+        events.append((timestamp, messages))
+    dispatcher.send_timed(events)
+
+
 def granulate(
     sample: str,
     density: int = 8,
@@ -242,12 +719,23 @@ def granulate(
     base_speed: float = 1.0,
     base_amp: float = 0.8,
     base_pan: float = 0.5,  # Added base pan (center)
-    sender: Callable = D,
+    sender: Callable = send_dirt,
+    normalize: bool | float | None = None,
+    rng: np.random.Generator | int | None = None,
     **kwargs,
 ) -> float:
     """
     Create a granular synthesis effect by playing many small grains of a sample.
 
+    All the grains are drawn at once (see `grain_cloud()`). With lookahead
+    enabled (`enable_lookahead()`) and the default sender, the whole cloud is
+    then sent right away as timestamped bundles, so thousands of grains per
+    beat cost a few packets instead of one scheduled event each. Otherwise
+    every grain is sent through `sender`, sleeping between grains.
+
+    Clouds thin out when the session is overloaded, if a grain budget is set
+    (see `set_grain_budget()`).
+
     Args:
         sample: Sample name (e.g., "sfx:0")
         density: Number of grains per beat
@@ -260,48 +748,50 @@ def granulate(
         base_speed: Base playback speed (can be negative for backwards)
         base_amp: Base amplitude
         base_pan: Base pan position (0.5 = center, 0 = left, 1 = right)
-        sender: Function to send sample (default: D)
+        sender: Function to send sample (default: D, through the lookahead
+                dispatcher when it is enabled)
+        normalize: Scale the grain amps so the sample plays at a common loudness
+                   (see `cut()`)
+        rng: NumPy Generator or seed, for reproducible clouds (default: unseeded)
         **kwargs: Additional arguments to pass to the sender
 
     Returns:
         Total duration
     """
     total_grains = int(density * duration)
+    budget = get_grain_budget()
+    if budget.active:
+        # Under load, play fewer grains spread over the same duration
+        total_grains = budget.admit(total_grains, duration * bowl.clock.beat_duration)
+        if not total_grains:
+            sleep(duration)
+            return duration
     grain_duration = duration / total_grains
 
-    for i in range(total_grains):
-        # Calculate random position with jitter
-        position = random.random() * (1.0 - grain_size)
-        position_offset = (random.random() * 2 - 1) * position_jitter
-        position = max(0, min(1 - grain_size, position + position_offset))
-
-        # Calculate grain parameters with ranges
-        min_speed, max_speed = speed_range
-        speed = base_speed + random.uniform(min_speed, max_speed)
-
-        amp = base_amp + (random.random() * 2 - 1) * amp_jitter
-
-        # Calculate pan with range
-        min_pan, max_pan = pan_range
-        pan = base_pan + random.uniform(min_pan - base_pan, max_pan - base_pan)
-        pan = max(0.0, min(1.0, pan))  # Clamp between 0 and 1
-
-        # Prepare arguments
-        call_kwargs = kwargs.copy()
-        call_kwargs.update(
-            {
-                "begin": position,
-                "end": position + grain_size,
-                "speed": speed,
-                "amp": amp,
-                "pan": pan,
-            }
-        )
-
-        # Play the grain
-        sender(sample, **call_kwargs)
-
-        # Sleep for grain duration
+    cloud = grain_cloud(
+        total_grains,
+        grain_size=grain_size,
+        position_jitter=position_jitter,
+        speed_range=speed_range,
+        amp_jitter=amp_jitter,
+        pan_range=pan_range,
+        base_speed=base_speed,
+        base_amp=base_amp,
+        rng=rng,
+    )
+    target = _normalize_target(normalize)
+    if target is not None:
+        cloud["amp"] *= get_gain(sample, target)
+
+    dispatcher = get_dispatcher()
+    if sender is send_dirt and dispatcher is not None:
+        _send_grains(dispatcher, sample, cloud, grain_duration, kwargs)
+        sleep(duration)
+        return duration
+
+    grains = zip(*(cloud[field].tolist() for field in _GRAIN_FIELDS))
+    for grain in grains:
+        sender(sample, **(kwargs | dict(zip(_GRAIN_FIELDS, grain))))
         sleep(grain_duration)
 
     return duration
@@ -1,22 +1,75 @@
-from functools import wraps
+import re
+from functools import lru_cache, wraps
 
 from sardine_core.run import ZD, zd
 from sardine_core.run import D as original_D
 from sardine_core.run import d as original_d
 
+from .dispatch import send_dirt
+from .durations import (
+    parse_ziff_duration,  # noqa: F401 (public here before durations.py)
+    ziff_sustain,
+)
+from .patterns import get_pattern_cache
+from .samples import _normalize_target, normalized_amp
+
+# A single sample name ("sfx" or "sfx:2"), as opposed to a pattern of sounds
+_SAMPLE_NAME = re.compile(r"[A-Za-z_]\w*(:\d+)?")
+
+# Sound patterns already warned about, so a swimming function does not flood the console
+_NORMALIZE_WARNED: set[str] = set()
+
+
+def _normalize(args: tuple, kwargs: dict) -> None:
+    """Apply and remove a normalize= argument, scaling kwargs["amp"] for the sound's sample."""
+    normalize = kwargs.pop("normalize", None)
+    if _normalize_target(normalize) is None:
+        return
+
+    sound = args[0] if args else kwargs.get("sound")
+    if not isinstance(sound, str) or not _SAMPLE_NAME.fullmatch(sound):
+        if sound not in _NORMALIZE_WARNED:
+            _NORMALIZE_WARNED.add(sound)
+            print(f"Warning: normalize= needs a single sample name, not {sound!r}")
+        return
+
+    sample = sound if ":" in sound else f"{sound}:0"
+    kwargs["amp"] = normalized_amp(sample, kwargs.get("amp"), normalize)
+
+
+@lru_cache(maxsize=1024)
+def _rest_pattern(instrument: str, note_pattern: str) -> str:
+    """Sound pattern that is silent wherever the note pattern has a rest."""
+    return f"{instrument} ^| [{instrument} ^| [{note_pattern}]]"
+
+
+def _rest_sound(instrument, note_pattern: str, parsed: bool = True):
+    """
+    The sound argument for D()/d() when the notes have rests, built only once.
+
+    With parsed=True the pattern also comes parsed from the pattern cache;
+    Sardine takes the parsed list like the string it came from.
+    """
+    if not isinstance(instrument, str):
+        return f"{instrument} ^| [{instrument} ^| [{note_pattern}]]"
+    pattern = _rest_pattern(instrument, note_pattern)
+    return get_pattern_cache().compile(pattern) if parsed else pattern
+
 
 @wraps(original_d)
 def d(*args, **kwargs):
     """Drop-in replacement for d() that handles note and frequency patterns with proper silences"""
 
+    _normalize(args, kwargs)
+
     # Check if there's a note pattern with rests
     note_pattern = kwargs.get("n") or kwargs.get("midinote") or kwargs.get("freq")
 
     if note_pattern and isinstance(note_pattern, str) and "." in note_pattern:
         # If first arg is a string (the most common case)
         if args:
-            instrument = args[0]
-            args = (f"{instrument} ^| [{instrument} ^| [{note_pattern}]]",) + args[1:]
+            # Player senders are built once, keep the string for Sardine
+            args = (_rest_sound(args[0], note_pattern, parsed=False),) + args[1:]
 
     # Pass through to original d
     return original_d(*args, **kwargs)
@@ -24,7 +77,13 @@ def d(*args, **kwargs):
 
 @wraps(original_D)
 def D(*args, **kwargs):
-    """Drop-in replacement for D() that handles note and frequency patterns with proper silences"""
+    """Drop-in replacement for D() that handles note and frequency patterns with proper silences
+
+    Also takes normalize=True (or a target loudness in dB) to scale amp so the
+    sample plays at a common loudness, see `samples.get_gain()`.
+    """
+
+    _normalize(args, kwargs)
 
     # Check if there's a note pattern with rests
     note_pattern = kwargs.get("n") or kwargs.get("midinote") or kwargs.get("freq")
@@ -32,53 +91,26 @@ def D(*args, **kwargs):
     if note_pattern and isinstance(note_pattern, str) and "." in note_pattern:
         if args:
             # First arg is the instrument (the most common case)
-            instrument = args[0]
-            args = (f"{instrument} ^| [{instrument} ^| [{note_pattern}]]",) + args[1:]
+            args = (_rest_sound(args[0], note_pattern),) + args[1:]
         elif "sound" in kwargs:
             # Instrument is provided as 'sound' keyword argument
-            instrument = kwargs["sound"]
-            kwargs["sound"] = f"{instrument} ^| [{instrument} ^| [{note_pattern}]]"
+            kwargs["sound"] = _rest_sound(kwargs["sound"], note_pattern)
 
     # Pass through to original D
-    return original_D(*args, **kwargs)
-
-
-def parse_ziff_duration(note: str) -> float | None:
-    if not note:
-        return None
-
-    # Basic duration mappings (in beats)
-    durations = {
-        "w": 4.0,  # whole note
-        "h": 2.0,  # half note
-        "q": 1.0,  # quarter note
-        "e": 0.5,  # eighth note
-        "s": 0.25,  # sixteenth note
-    }
-
-    if note[0] in durations:
-        duration = durations[note[0]]
-        if len(note) > 1 and note[1] == ".":
-            duration *= 1.5  # dotted note
-        return duration
-    return None
+    return send_dirt(*args, **kwargs)
 
 
 @wraps(zd)
 def zd_mono(name, ziff, coef=0.5, **kwargs):
-    """generates sustains based on ziff pattern"""
-    notes = ziff.split()
-    durations = " ".join([str(dur * coef) for note in notes if (dur := parse_ziff_duration(note))])
-    kwargs["sustain"] = durations
+    """generates sustains based on ziff pattern (see `durations.ziff_durations()`)"""
+    kwargs["sustain"] = ziff_sustain(ziff, coef)
     return zd(name, ziff=ziff, **kwargs)
 
 
 @wraps(ZD)
 def ZD_mono(name, ziff, coef=0.5, **kwargs):
-    """generates sustains based on ziff pattern"""
-    notes = ziff.split()
-    durations = " ".join([str(dur * coef) for note in notes if (dur := parse_ziff_duration(note))])
-    kwargs["sustain"] = durations
+    """generates sustains based on ziff pattern (see `durations.ziff_durations()`)"""
+    kwargs["sustain"] = ziff_sustain(ziff, coef)
     return ZD(name, ziff=ziff, **kwargs)
 
 
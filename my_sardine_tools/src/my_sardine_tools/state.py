@@ -1,10 +1,251 @@
+import asyncio
+import logging
 import re
+import weakref
+from types import MappingProxyType
+
+import numpy as np
+
+# Keys params() leaves out: timing/control parameters of loop() and swimmers
+_TIMING_PARAMS = frozenset({"n_steps", "p", "i"})
+
+# Bumped whenever a State node is added, replaced or removed anywhere, so path
+# handles know their cached node may be gone (setting plain values does not)
+_structure_epoch = 0
+
+
+def _structure_changed():
+    global _structure_epoch
+    _structure_epoch += 1
+
+
+# Number of snapshots taken; a node copies its keys on its first change after
+# a snapshot (copy-on-write), tagged with this number, see `State.snapshot()`
+_snapshot_gen = 0
+_live_snapshots: "weakref.WeakValueDictionary[int, Snapshot]" = weakref.WeakValueDictionary()
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+# (id(node), key) -> (node, key) written since the last notification, and the
+# event loop a flush is scheduled on (None if there is none)
+_pending_changes: dict[tuple[int, object], tuple["State", object]] = {}
+_flush_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _notify(node: "State", key) -> None:
+    global _flush_loop
+    _pending_changes[id(node), key] = (node, key)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not None and loop is _flush_loop:
+        return
+    if loop is None:
+        flush_watchers()  # no event loop: nothing to coalesce with
+        return
+    # Runs once the current swimmer (or other callback) is done. A flush left
+    # on a loop that stopped before running it does not hold later ones back.
+    loop.call_soon(flush_watchers)
+    _flush_loop = loop
+
+
+def flush_watchers() -> None:
+    """Call the watchers of every key written since the last flush, once per key."""
+    global _flush_loop
+    _flush_loop = None
+    pending = list(_pending_changes.values())
+    _pending_changes.clear()
+    for node, key in pending:
+        callbacks = node.__dict__.get("_watchers", {}).get(key)
+        if not callbacks:
+            continue
+        value = dict.get(node, key)
+        for callback in list(callbacks):
+            try:
+                callback(key, value)
+            except Exception:
+                # A watcher is user code: report it and keep notifying the others
+                logger.exception("Watcher of %r failed", key)
+
+
+def _contents(node: "State", gen: int | None):
+    """Keys of node as they were when snapshot gen was taken (None: as they are now)."""
+    if gen is not None:
+        # The first copy made after the snapshot holds the keys it saw
+        for _, saved_gen, contents in node.__dict__.get("_history", ()):
+            if saved_gen >= gen:
+                return contents
+    return node
+
+
+def _plain(node: "State", gen: int | None) -> dict:
+    return {
+        key: _plain(value, gen) if isinstance(value, State) else value
+        for key, value in _contents(node, gen).items()
+    }
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+
+def _same(a, b) -> bool:
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):  # e.g. numpy arrays
+        return False
+
+
+def _diff(old, new, old_gen, new_gen, prefix: str, out: dict) -> None:
+    """Add the leaves that differ between two versions of a node to out."""
+    a = {} if old is None else _contents(old, old_gen)
+    b = {} if new is None else _contents(new, new_gen)
+    if a is b:
+        # Same keys on both sides: only nodes below may have changed
+        for key, value in a.items():
+            if isinstance(value, State):
+                _diff(value, value, old_gen, new_gen, f"{prefix}{key}.", out)
+        return
+
+    for key in dict.fromkeys([*a, *b]):
+        va, vb = a.get(key, _MISSING), b.get(key, _MISSING)
+        old_node = va if isinstance(va, State) else None
+        new_node = vb if isinstance(vb, State) else None
+        path = f"{prefix}{key}"
+        if old_node is None and new_node is None:
+            if not _same(va, vb):
+                out[path] = (None if va is _MISSING else va, None if vb is _MISSING else vb)
+            continue
+        # A leaf replaced by a node or the other way around
+        if old_node is None and va is not _MISSING:
+            out[path] = (va, None)
+        if new_node is None and vb is not _MISSING:
+            out[path] = (None, vb)
+        _diff(old_node, new_node, old_gen, new_gen, f"{path}.", out)
+
+
+def _restore(node: "State", gen: int) -> None:
+    contents = _contents(node, gen)
+    if contents is not node:
+        for key in [key for key in node if key not in contents]:
+            del node[key]
+        for key, value in contents.items():
+            if dict.get(node, key, _MISSING) is not value:
+                node[key] = value
+    for value in dict.values(node):
+        if isinstance(value, State):
+            _restore(value, gen)
+
+
+class Snapshot:
+    """
+    Frozen version of a State tree, see `State.snapshot()`.
+
+    Nothing is copied when it is taken: each node copies its own keys the
+    first time it changes afterwards, and nodes that do not change are shared
+    with the live tree. The copies are dropped with the last snapshot that
+    needs them.
+    """
+
+    __slots__ = ("__weakref__", "gen", "root")
+
+    def __init__(self, root: "State", gen: int):
+        self.root = root
+        self.gen = gen
+
+    def __repr__(self):
+        return f"Snapshot({list(_contents(self.root, self.gen))})"
+
+    def to_dict(self) -> dict:
+        """The snapshot as nested plain dictionaries."""
+        return _plain(self.root, self.gen)
+
+    def diff(self, other: "Snapshot | None" = None) -> dict[str, tuple]:
+        """
+        List the leaves that changed since this snapshot.
+
+        Nodes whose keys did not change are only walked through, so the
+        result holds the changed leaves and nothing else.
+
+        Args:
+            other: Later snapshot of the same node to compare with
+                   (default: the live state)
+
+        Returns:
+            {dotted path: (old value, new value)}, None standing for a
+            missing key
+
+        Example:
+            verse = state.snapshot()
+            state.drums.hh.amp = 0.3
+            verse.diff()  # {"drums.hh.amp": (0.2, 0.3)}
+        """
+        if other is not None and other.root is not self.root:
+            raise ValueError("Snapshots of different State nodes cannot be compared")
+        out = {}
+        _diff(self.root, self.root, self.gen, other.gen if other else None, "", out)
+        return out
+
+
+class StatePath:
+    """
+    Compiled handle to a nested State node, see `State.path()`.
+
+    Calling the handle returns the node. It is resolved once and then reused
+    until a node is added, replaced or removed somewhere in the tree; setting
+    values (on the node or its siblings) keeps it valid.
+
+    Example:
+        fx = state.path("drums.hh.fx")
+        (D, fx().params())
+    """
+
+    __slots__ = ("_epoch", "_node", "create", "keys", "root")
+
+    def __init__(self, root: "State", path: str, create: bool = True):
+        self.root = root
+        self.keys = tuple(path.split("."))
+        self.create = create
+        self._node = None
+        self._epoch = -1
+
+    def __call__(self) -> "State":
+        if self._epoch == _structure_epoch:
+            return self._node
+        return self._resolve()
+
+    def __repr__(self):
+        mode = "" if self.create else ", create=False"
+        return f"StatePath({'.'.join(self.keys)!r}{mode})"
+
+    def _resolve(self) -> "State":
+        node = self.root
+        for depth, key in enumerate(self.keys):
+            if not self.create and key not in node and key not in node._declared_keys():
+                path = ".".join(self.keys[: depth + 1])
+                raise KeyError(f"No state at {path!r} (path handle is read-only)")
+            node = node[key]
+            if not isinstance(node, State):
+                path = ".".join(self.keys[: depth + 1])
+                raise TypeError(f"{path!r} is a value ({node!r}), not a State node")
+        # Read the epoch last: creating missing nodes above bumps it
+        self._node = node
+        self._epoch = _structure_epoch
+        return node
 
 
 class State(dict):
     """
     Dictionary that allows dot notation access to its keys and nested dictionaries.
 
+    Every node counts its own changes (`_version`), so `params()` and `skip()`
+    can return cached views until one of its keys is set or deleted.
+
     Example:
         state = State()
         state.melody.cutoff = 5000
@@ -19,28 +260,203 @@ class State(dict):
     """
 
     def __init__(self, *args, **kwargs):
+        self.__dict__["_version"] = 0
+        self.__dict__["_views"] = {}
+        # Snapshots taken before this node existed never need its keys
+        self.__dict__["_saved_gen"] = _snapshot_gen
         super().__init__(*args, **kwargs)
         # Auto-convert any existing nested dicts
         for key, value in self.items():
             if isinstance(value, dict) and not isinstance(value, State):
                 self[key] = State(value)
 
+    def _mutate(self, structural=False):
+        """Record a change of this node's keys, dropping its cached views."""
+        self.__dict__["_version"] = self.__dict__.get("_version", 0) + 1
+        # A new dict rather than clear(): copies of this State may share the old one
+        self.__dict__["_views"] = {}
+        if structural:
+            _structure_changed()
+
+    def _save(self):
+        """Copy this node's keys before its first change since the last snapshot."""
+        saved_gen = self.__dict__.get("_saved_gen", 0)
+        if saved_gen >= _snapshot_gen:
+            return
+        self.__dict__["_saved_gen"] = _snapshot_gen
+        live = list(_live_snapshots.keys())
+        saved = self.__dict__.get("_history", [])
+        if any(gen > saved_gen for gen in live):
+            # The copy serves the snapshots taken since the keys last changed
+            saved = [*saved, (saved_gen, _snapshot_gen, dict(self))]
+        elif not saved:
+            return
+
+        # Drop the copies no live snapshot reads. A new list: copies of this
+        # State share the old one
+        history = [
+            (since, gen, contents)
+            for since, gen, contents in saved
+            if any(since < live_gen <= gen for live_gen in live)
+        ]
+        self.__dict__["_history"] = history
+
+    def __setitem__(self, key, value):
+        self._save()
+        old = dict.get(self, key)
+        super().__setitem__(key, value)
+        self._mutate(isinstance(old, State) or isinstance(value, State))
+
+    def __delitem__(self, key):
+        self._save()
+        old = super().__getitem__(key)
+        super().__delitem__(key)
+        self._mutate(isinstance(old, State))
+
+    def update(self, *args, **kwargs):
+        self._save()
+        super().update(*args, **kwargs)
+        self._mutate(structural=True)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return super().__getitem__(key)
+
+    def pop(self, *args):
+        self._save()
+        value = super().pop(*args)
+        self._mutate(structural=True)
+        return value
+
+    def popitem(self):
+        self._save()
+        item = super().popitem()
+        self._mutate(structural=True)
+        return item
+
+    def clear(self):
+        self._save()
+        super().clear()
+        self._mutate(structural=True)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
     def __getattr__(self, key):
         if key.startswith("_"):
             # For special methods like __copy__, __deepcopy__, etc.
             return super().__getattribute__(key)
         if key not in self:
-            # Create nested State on demand
-            self[key] = State()
+            # Declared default, or a nested State created on demand
+            self._create(key)
         return self.get(key)
 
     def __getitem__(self, key):
         """Override __getitem__ to auto-create nested State objects."""
         if key not in self:
-            # Create nested State on demand for dictionary access too
-            self[key] = State()
+            # Create on demand for dictionary access too
+            self._create(key)
         return super().__getitem__(key)
 
+    def _create(self, key):
+        declared = self.__dict__.get("_declared")
+        if declared and key in declared:
+            setattr(self, key, declared[key])
+        else:
+            self[key] = State()
+
+    def _declared_keys(self):
+        return self.__dict__.get("_declared", {}).keys()
+
+    def _apply_declared(self):
+        """Set the declared defaults that are still missing."""
+        for key, value in self.__dict__.get("_declared", {}).items():
+            if key not in self:
+                setattr(self, key, value)
+
+    def watch(self, key, callback):
+        """
+        Call a function when a key of this node changes.
+
+        Notifications are coalesced per scheduler tick: however many times
+        the key is written while a swimmer runs, the callback is called once
+        afterwards, with the latest value. Outside of an event loop it is
+        called right away. Only watched nodes pay for this; other nodes are
+        left as they are.
+
+        Args:
+            key: Key to watch
+            callback: Called as callback(key, value); value is None when the
+                      key was deleted
+
+        Returns:
+            The callback (for `unwatch()`)
+
+        Example:
+            state.drums.hh.watch("hpf", lambda key, value: print(key, value))
+        """
+        watchers = self.__dict__.setdefault("_watchers", {})
+        watchers.setdefault(key, []).append(callback)
+        # Only watched nodes get the notifying class (not through __setattr__,
+        # which would store it as a key)
+        if type(self) is State:
+            object.__setattr__(self, "__class__", _WatchedState)
+        return callback
+
+    def unwatch(self, key, callback=None):
+        """
+        Stop watching a key.
+
+        Args:
+            key: Watched key
+            callback: Callback to remove (default: all the callbacks of the key)
+
+        Returns:
+            Self for method chaining
+        """
+        watchers = self.__dict__.get("_watchers", {})
+        callbacks = watchers.get(key, [])
+        if callback is None:
+            callbacks.clear()
+        elif callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            watchers.pop(key, None)
+        if not watchers and type(self) is _WatchedState:
+            object.__setattr__(self, "__class__", State)
+        return self
+
+    def path(self, path: str, create: bool = True) -> StatePath:
+        """
+        Compile a dotted path into a handle that resolves straight to the node.
+
+        Handles are cached, so calling path() again with the same arguments
+        returns the same handle.
+
+        Args:
+            path: Dotted path from this node (e.g. "drums.hh.fx")
+            create: Create missing nodes like attribute access does. With
+                    False, a missing key raises KeyError instead, so typos in
+                    hot code do not leave empty nodes behind.
+
+        Returns:
+            StatePath; call it to get the node
+
+        Example:
+            hh_fx = state.path("drums.hh.fx", create=False)
+
+            def hh(p=0.25, i=0):
+                D("hh", **hh_fx().params(), i=i)
+        """
+        paths = self.__dict__.setdefault("_paths", {})
+        handle = paths.get((path, create))
+        # Copies of this State share the dict, but need handles of their own
+        if handle is None or handle.root is not self:
+            handle = paths[path, create] = StatePath(self, path, create)
+        return handle
+
     def __setattr__(self, key, value):
         # Convert nested dicts to State automatically
         if isinstance(value, dict) and not isinstance(value, State):
@@ -216,6 +632,7 @@ class State(dict):
         Example:
             params = state.melody.to_dict()  # Get all melody parameters as a dict
         """
+        self._apply_declared()
         result = {}
         for key, value in self.items():
             if not key.startswith("_") and not isinstance(value, State):
@@ -235,27 +652,110 @@ class State(dict):
         Returns:
             Dictionary with references to these state variables
 
+        Once a node holds all the keys, calling init() again with the same keys
+        only copies a cached result until something in the node changes, so it
+        can stay in a swimming function.
+
         Example:
             # Set default values that won't override existing ones:
             params = state.melody.init(cutoff=5000, amp=0.05)
         """
-        result = {}
+        keys = ("init", *kwargs)
+        # Views are dropped on every change, so a hit means all keys still exist
+        view = self.__dict__.setdefault("_views", {}).get(keys)
+        if view is not None:
+            return dict(view)
 
+        self._apply_declared()
         for key, value in kwargs.items():
             # Only set if the key doesn't exist yet
             if key not in self:
                 setattr(self, key, value)
 
-            # Always add to result dictionary
-            result[key] = getattr(self, key)
+        # Current values of all the keys, set now or before
+        view = MappingProxyType({key: dict.__getitem__(self, key) for key in kwargs})
+        self.__dict__["_views"][keys] = view
+        return dict(view)
 
-        return result
+    def declare(self, **defaults):
+        """
+        Declare default values once, applied when they are first needed.
+
+        Declared keys appear when they are read (attribute or item access,
+        `params()`, `skip()`, `to_dict()`, `init()`), and come back with their
+        default after being deleted. Values already set are never overwritten.
+
+        Args:
+            **defaults: Key-value pairs to use when the keys are missing
+
+        Returns:
+            Self for method chaining
+
+        Example:
+            # At the top of a set, instead of init() in the swimmer:
+            state.lead.declare(n_steps=32, p=0.5, sound="supersaw", amp=0.05)
+
+            def lead(p=1, i=0):
+                dur = loop((D, state.lead.params()), n_steps=state.lead.n_steps, ...)
+        """
+        self.__dict__.setdefault("_declared", {}).update(defaults)
+        # Cached views may miss the new defaults
+        self.__dict__["_views"] = {}
+        return self
+
+    def snapshot(self) -> Snapshot:
+        """
+        Take a snapshot of this node and everything below it, e.g. a scene.
+
+        Taking it is O(1): nodes copy their keys when they next change (see
+        `Snapshot`). Keep the snapshot to `restore()` or `diff()` it later.
+
+        Returns:
+            Snapshot of this node
+
+        Example:
+            verse = state.snapshot()
+            ...  # tweak things live
+            state.restore(verse)
+        """
+        global _snapshot_gen
+        _snapshot_gen += 1
+        snapshot = _live_snapshots[_snapshot_gen] = Snapshot(self, _snapshot_gen)
+        return snapshot
+
+    def restore(self, snapshot: Snapshot):
+        """
+        Bring this node back to a snapshot taken from it.
+
+        Only the keys that changed are set again, and the nodes of the
+        snapshot are put back in place, so `path()` handles and cached views
+        follow. The whole swap happens in one call, so no swimmer sees half a
+        scene; call it from a swimmer to switch scenes on its beat.
+
+        Args:
+            snapshot: Snapshot returned by `snapshot()` on this node
+
+        Raises:
+            ValueError: If the snapshot was taken from another node
+
+        Returns:
+            Self for method chaining
+        """
+        if snapshot.root is not self:
+            raise ValueError("The snapshot was taken from another State node")
+        _restore(self, snapshot.gen)
+        return self
 
     def skip(self, *keys_to_skip, pattern=None):
         """
         Return a dictionary of values in this state, excluding specified keys
         or keys matching a pattern.
 
+        The filtering is done once and reused until a key of this state
+        changes; each call returns a new dictionary built from that result.
+        Values changed in place (e.g. appending to a list) are not seen as
+        changes; set the key again instead.
+
         Args:
             *keys_to_skip: Specific keys to exclude
             pattern: Optional regex pattern to match keys to exclude
@@ -273,8 +773,17 @@ class State(dict):
             # Skip both specific keys and pattern matches:
             params = state.reverb.skip("amp", pattern="^_")
         """
+        return dict(self._skip_view(frozenset(keys_to_skip), pattern))
+
+    def _skip_view(self, skip_set: frozenset, pattern) -> MappingProxyType:
+        """Cached, read-only result of `skip()`, dropped when a key of this node changes."""
+        view = self.__dict__.setdefault("_views", {}).get((skip_set, pattern))
+        if view is not None:
+            return view
+
+        self._apply_declared()
+        views = self.__dict__["_views"]
         result = {}
-        skip_set = set(keys_to_skip)
         regex = re.compile(pattern) if pattern else None
 
         for key, value in self.items():
@@ -293,7 +802,8 @@ class State(dict):
             # Include this key-value pair
             result[key] = value
 
-        return result
+        view = views[skip_set, pattern] = MappingProxyType(result)
+        return view
 
     def params(self, *skip_keys, pattern=None):
         """
@@ -305,7 +815,7 @@ class State(dict):
             pattern: Regex pattern to match keys to skip
 
         Returns:
-            Dictionary with filtered parameters
+            Dictionary with filtered parameters (filtered once, see `skip()`)
 
         Example:
             # Get sound parameters:
@@ -315,6 +825,44 @@ class State(dict):
             (D, state.reverb.params("orbit", "amp"))
         """
         # Common timing/control parameters to exclude
-        timing_params = {"n_steps", "p", "i"}
-        all_skip_params = set(timing_params) | set(skip_keys)
-        return self.skip(*all_skip_params, pattern=pattern)
+        return dict(self._skip_view(_TIMING_PARAMS.union(skip_keys), pattern))
+
+
+class _WatchedState(State):
+    """State node with watchers: reports the keys it changes (see `State.watch()`)."""
+
+    def _changed(self, *keys):
+        watchers = self.__dict__["_watchers"]
+        for key in keys:
+            if key in watchers:
+                _notify(self, key)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed(key)
+
+    def update(self, *args, **kwargs):
+        changes = dict(*args, **kwargs)
+        super().update(changes)
+        self._changed(*changes)
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        if present:
+            self._changed(key)
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._changed(item[0])
+        return item
+
+    def clear(self):
+        keys = list(self)
+        super().clear()
+        self._changed(*keys)
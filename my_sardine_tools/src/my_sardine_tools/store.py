@@ -0,0 +1,313 @@
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+
+# One row per sample. Unknown values are -1 (frames), 0 (channels, samplerate) or NaN.
+SAMPLE_DTYPE = np.dtype(
+    [
+        ("family", "U64"),
+        ("index", "i4"),
+        ("duration", "f8"),
+        ("frames", "i8"),
+        ("channels", "i2"),
+        ("samplerate", "i4"),
+        ("peak", "f4"),
+        ("rms", "f4"),
+        ("loudness", "f4"),
+        # Slice of the store's flat onsets array (count -1 = not analyzed)
+        ("onset_start", "i8"),
+        ("onset_count", "i4"),
+    ]
+)
+
+# Longest family name the family column holds (NumPy would silently truncate)
+MAX_FAMILY_LENGTH = SAMPLE_DTYPE["family"].itemsize // np.dtype("U1").itemsize
+
+# Columns besides family, index and duration
+STORE_FIELDS = ("frames", "channels", "samplerate", "peak", "rms", "loudness")
+
+_DEFAULTS = {
+    "frames": -1,
+    "channels": 0,
+    "samplerate": 0,
+    "peak": np.nan,
+    "rms": np.nan,
+    "loudness": np.nan,
+}
+
+_NO_ONSETS = np.empty(0, dtype="f8")
+
+
+def _onsets_path(path: Path) -> Path:
+    return path.with_name(path.stem + ".onsets.npy")
+
+
+def _split_name(name: str) -> tuple[str, int]:
+    family, _, index = name.partition(":")
+    return family, int(index) if index else 0
+
+
+class SampleStore:
+    """
+    Columnar store of per-sample metadata.
+
+    Rows live in a single NumPy structured array (see SAMPLE_DTYPE) with a
+    name -> row index on the side, so lookups are O(1), queries are vectorized
+    and the whole store saves to one memory-mappable .npy file.
+
+    Onset times are ragged, so they live in one flat array next to the table;
+    each row points at its slice with onset_start/onset_count. They are saved to
+    a second file next to the table (samples.onsets.npy).
+
+    Example:
+        store = get_store()
+        store.get("sfx:0")                            # duration in seconds
+        store.get("sfx:0", "samplerate")              # any other column
+        store.get("break:0", "onsets")                # onset times (array or None)
+        store.query(family="sfx", min_duration=4.0)   # ["sfx:0", "sfx:2"]
+        store.save("samples.npy")
+        store = SampleStore.load("samples.npy")       # memory-mapped
+    """
+
+    def __init__(self, table: np.ndarray | None = None, onsets: np.ndarray | None = None):
+        if table is None:
+            table = np.empty(0, dtype=SAMPLE_DTYPE)
+        if onsets is None:
+            onsets = _NO_ONSETS
+        # (table, number of used rows, name -> row, onsets) is swapped as one tuple, so
+        # a reader on another thread never pairs a new index with an old table
+        self._data = (table, len(table), self._build_rows(table, len(table)), onsets)
+
+    @staticmethod
+    def _build_rows(table: np.ndarray, size: int) -> dict[str, int]:
+        families = table["family"][:size].tolist()
+        indices = table["index"][:size].tolist()
+        return {
+            f"{family}:{index}": row for row, (family, index) in enumerate(zip(families, indices))
+        }
+
+    @classmethod
+    def from_lengths(cls, lengths: dict[str, float]) -> "SampleStore":
+        """Build a store from a plain name -> duration dictionary."""
+        store = cls()
+        store.extend((name, duration, {}) for name, duration in lengths.items())
+        return store
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True) -> "SampleStore":
+        """
+        Load a store saved with `save()`.
+
+        Args:
+            path: Path to the .npy file
+            mmap: Memory-map the files instead of reading them (copied on first write)
+        """
+        mmap_mode = "r" if mmap else None
+        table = np.load(path, mmap_mode=mmap_mode)
+        if table.dtype != SAMPLE_DTYPE:
+            raise ValueError(f"{path} is not a sample store (dtype {table.dtype})")
+        onsets_path = _onsets_path(Path(path))
+        onsets = np.load(onsets_path, mmap_mode=mmap_mode) if onsets_path.exists() else None
+        return cls(table, onsets)
+
+    def save(self, path: str | Path) -> None:
+        """Write all rows to a .npy file, and the onsets (if any) to a .onsets.npy next to it."""
+        path = Path(path)
+        table = self.table.copy()
+        counts = table["onset_count"]
+        has_onsets = counts > 0
+        if not has_onsets.any():
+            np.save(path, table)
+            _onsets_path(path).unlink(missing_ok=True)
+            return
+
+        # Compact the flat array: rows replaced since loading leave unused onsets behind
+        onsets = self._data[3]
+        starts = table["onset_start"][has_onsets]
+        lengths = counts[has_onsets]
+        table["onset_start"][has_onsets] = np.cumsum(lengths) - lengths
+        np.save(path, table)
+        np.save(
+            _onsets_path(path),
+            np.concatenate([onsets[s : s + n] for s, n in zip(starts.tolist(), lengths.tolist())]),
+        )
+
+    @property
+    def table(self) -> np.ndarray:
+        """Structured array of all rows (a view, do not modify)."""
+        table, size, _, _ = self._data
+        return table[:size]
+
+    def __len__(self) -> int:
+        return self._data[1]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._data[2]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._data[2]))
+
+    def names(self) -> list[str]:
+        return list(self._data[2])
+
+    def families(self) -> set[str]:
+        return set(np.unique(self.table["family"]).tolist())
+
+    def get(self, name: str, field: str = "duration"):
+        """
+        Get one value of a sample.
+
+        Args:
+            name: Sample name (e.g., "sfx:0")
+            field: Column name (default: duration), or "onsets" for the onset
+                   times in seconds (None if the sample was not analyzed)
+
+        Raises:
+            KeyError: If the sample is not in the store
+        """
+        table, _, rows, onsets = self._data
+        if field == "onsets":
+            start, count = table[["onset_start", "onset_count"]][rows[name]].tolist()
+            return onsets[start : start + count] if count >= 0 else None
+        return table[field][rows[name]].item()
+
+    def row(self, name: str) -> dict:
+        """Get all columns of a sample as a dictionary."""
+        table, _, rows, _ = self._data
+        record = table[rows[name]]
+        return {field: record[field].item() for field in SAMPLE_DTYPE.names}
+
+    def lengths(self) -> dict[str, float]:
+        """Name -> duration dictionary of every sample."""
+        table, size, rows, _ = self._data
+        durations = table["duration"][:size].tolist()
+        return {name: durations[row] for name, row in rows.items()}
+
+    def _with_capacity(self, table: np.ndarray, needed: int) -> np.ndarray:
+        if needed <= len(table) and table.flags.writeable:
+            return table
+        grown = np.empty(max(needed, 2 * len(table), 64), dtype=SAMPLE_DTYPE)
+        grown[: len(table)] = table
+        return grown
+
+    def add(self, name: str, duration: float, **fields) -> None:
+        """
+        Add or update a sample.
+
+        Args:
+            name: Sample name (e.g., "sfx:0")
+            duration: Length in seconds
+            **fields: Other columns (frames, channels, samplerate, peak, rms, loudness)
+                      and onsets (sequence of onset times in seconds)
+        """
+        self.extend([(name, duration, fields)])
+
+    def extend(self, records: Iterable[tuple[str, float, dict]]) -> None:
+        """
+        Add or update many samples at once.
+
+        Args:
+            records: (name, duration, fields) tuples, fields as in `add()`
+
+        Raises:
+            ValueError: If a family name is longer than MAX_FAMILY_LENGTH
+                        (nothing is added then)
+        """
+        records = list(records)
+        for name, _, _ in records:
+            family = _split_name(name)[0]
+            if len(family) > MAX_FAMILY_LENGTH:
+                raise ValueError(
+                    f"Sample family {family!r} is {len(family)} characters long, "
+                    f"the store holds at most {MAX_FAMILY_LENGTH}"
+                )
+
+        table, size, rows, onsets = self._data
+        rows = dict(rows)
+        new_onsets = []
+        onsets_end = len(onsets)
+        for name, duration, fields in records:
+            row = rows.get(name)
+            if row is None:
+                table = self._with_capacity(table, size + 1)
+                row = rows[name] = size
+                size += 1
+            elif not table.flags.writeable:
+                table = self._with_capacity(table, size)
+
+            family, index = _split_name(name)
+            values = _DEFAULTS | fields
+            onset_start, onset_count = 0, -1
+            if values.get("onsets") is not None:
+                sample_onsets = np.asarray(values["onsets"], dtype="f8")
+                onset_start, onset_count = onsets_end, len(sample_onsets)
+                onsets_end += onset_count
+                new_onsets.append(sample_onsets)
+            table[row] = (
+                family,
+                index,
+                duration,
+                values["frames"],
+                values["channels"],
+                values["samplerate"],
+                values["peak"],
+                values["rms"],
+                values["loudness"],
+                onset_start,
+                onset_count,
+            )
+        if new_onsets:
+            onsets = np.concatenate([onsets, *new_onsets])
+        self._data = (table, size, rows, onsets)
+
+    def replace_family(self, family: str, records: Iterable[tuple[str, float, dict]]) -> None:
+        """
+        Replace all samples of one family, keeping every other row.
+
+        Args:
+            family: Sample family name (e.g., "sfx")
+            records: New (name, duration, fields) tuples of this family
+        """
+        table = self.table
+        kept = table[table["family"] != family]
+        # Kept rows still point into the same onsets array
+        store = SampleStore(kept.copy(), self._data[3])
+        store.extend(records)
+        self._data = store._data
+
+    def query(
+        self,
+        family: str | None = None,
+        min_duration: float | None = None,
+        max_duration: float | None = None,
+        where: np.ndarray | None = None,
+    ) -> list[str]:
+        """
+        Find samples matching all given conditions.
+
+        Args:
+            family: Only samples of this family
+            min_duration: Only samples at least this long (seconds)
+            max_duration: Only samples at most this long (seconds)
+            where: Extra boolean mask over `table` (e.g. store.table["channels"] == 1)
+
+        Returns:
+            Matching sample names, in row order
+        """
+        table = self.table
+        mask = np.ones(len(table), dtype=bool)
+        if family is not None:
+            mask &= table["family"] == family
+        if min_duration is not None:
+            mask &= table["duration"] >= min_duration
+        if max_duration is not None:
+            mask &= table["duration"] <= max_duration
+        if where is not None:
+            mask &= where
+
+        matches = table[mask]
+        return [
+            f"{family}:{index}"
+            for family, index in zip(matches["family"].tolist(), matches["index"].tolist())
+        ]
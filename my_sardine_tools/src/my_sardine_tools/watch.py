@@ -0,0 +1,277 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from . import samples
+
+# inotify event masks (see inotify(7))
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+
+_FAMILY_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE | _IN_DELETE_SELF
+_ROOT_MASK = _IN_CREATE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Sentinel meaning "something was lost, rescan every family"
+ALL_FAMILIES = "*"
+
+
+class _PollingBackend:
+    """
+    Detects changed families by comparing directory mtimes.
+
+    Adding, removing or renaming a file updates its directory's mtime, so one
+    stat per family directory is enough; files are never listed or opened
+    unless their family changed. A file overwritten in place without a rename
+    is not noticed.
+    """
+
+    def __init__(self, samples_dirs: list[Path], interval: float):
+        self.samples_dirs = samples_dirs
+        self.interval = interval
+        self._mtimes = self._snapshot()
+
+    def _snapshot(self) -> dict[str, tuple[int, ...]]:
+        mtimes: dict[str, tuple[int, ...]] = {}
+        for samples_dir in self.samples_dirs:
+            try:
+                entries = list(os.scandir(samples_dir))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir():
+                    try:
+                        mtime = entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+                    mtimes[entry.name] = mtimes.get(entry.name, ()) + (mtime,)
+        return mtimes
+
+    def changes(self, timeout: float) -> set[str]:
+        time.sleep(min(timeout, self.interval))
+        mtimes = self._snapshot()
+        changed = {
+            family
+            for family in mtimes.keys() | self._mtimes.keys()
+            if mtimes.get(family) != self._mtimes.get(family)
+        }
+        self._mtimes = mtimes
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyBackend:
+    """
+    Linux inotify watches on every samples directory and family directory.
+    """
+
+    def __init__(self, samples_dirs: list[Path]):
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # watch descriptor -> (samples dir, family or None for the samples dir itself)
+        self._watches: dict[int, tuple[Path, str | None]] = {}
+        for samples_dir in samples_dirs:
+            self._add_watch(samples_dir, None, _ROOT_MASK)
+            try:
+                families = [entry.name for entry in os.scandir(samples_dir) if entry.is_dir()]
+            except OSError:
+                continue
+            for family in families:
+                self._add_watch(samples_dir, family, _FAMILY_MASK)
+
+    def _add_watch(self, samples_dir: Path, family: str | None, mask: int) -> None:
+        path = samples_dir / family if family is not None else samples_dir
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd >= 0:
+            self._watches[wd] = (samples_dir, family)
+
+    def changes(self, timeout: float) -> set[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            name_bytes = buffer[offset + _EVENT_HEADER.size : offset + _EVENT_HEADER.size + length]
+            name = os.fsdecode(name_bytes.rstrip(b"\0"))
+            offset += _EVENT_HEADER.size + length
+
+            if mask & _IN_Q_OVERFLOW:
+                changed.add(ALL_FAMILIES)
+                continue
+
+            samples_dir, family = self._watches.get(wd, (None, None))
+            if samples_dir is None:
+                continue
+
+            if family is None:
+                # A family directory appeared or disappeared in a samples directory
+                if mask & _IN_ISDIR:
+                    if mask & (_IN_CREATE | _IN_MOVED_TO):
+                        self._add_watch(samples_dir, name, _FAMILY_MASK)
+                    changed.add(name)
+            elif mask & (_IN_DELETE_SELF | _IN_IGNORED):
+                self._watches.pop(wd, None)
+                changed.add(family)
+            elif Path(name).suffix.lower() in samples.AUDIO_SUFFIXES:
+                changed.add(family)
+
+        return changed
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class SampleWatcher:
+    """
+    Background thread that keeps the sample lengths in sync with the sample folders.
+
+    Changes are collected until the folders are quiet for `debounce` seconds
+    (so a batch of copied files causes a single rescan), then only the affected
+    families are rescanned with `samples.rescan_family()`. All file access
+    happens on the watcher thread, so swimmers are never blocked.
+
+    Example:
+        calculate_sample_lengths("projects/neo/samples")
+        watcher = watch_samples()
+        ...
+        watcher.stop()
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        debounce: float = 0.25,
+        polling: bool = False,
+        on_change: Callable[[str, dict[str, float]], None] | None = None,
+    ):
+        self.samples_dirs = list(samples._SAMPLE_DIRS)
+        if not self.samples_dirs:
+            raise ValueError("No samples directories to watch. Call `calculate_sample_lengths()`")
+        self.interval = interval
+        self.debounce = debounce
+        self.on_change = on_change
+
+        self.backend = None
+        if not polling:
+            try:
+                self.backend = _InotifyBackend(self.samples_dirs)
+            except OSError:
+                pass
+        if self.backend is None:
+            self.backend = _PollingBackend(self.samples_dirs, interval)
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "SampleWatcher":
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sample-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the thread and release the watches. The watcher cannot be restarted."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.backend.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            changed = self.backend.changes(self.interval)
+            if not changed:
+                continue
+            # Let a burst of file operations settle before rescanning
+            while not self._stop.is_set():
+                more = self.backend.changes(self.debounce)
+                if not more:
+                    break
+                changed |= more
+            self.apply(changed)
+
+    def apply(self, families: set[str]) -> None:
+        """Rescan the given families (ALL_FAMILIES rescans everything known)."""
+        if ALL_FAMILIES in families:
+            families = samples.get_store().families()
+            for samples_dir in self.samples_dirs:
+                if samples_dir.is_dir():
+                    families |= {d.name for d in samples_dir.iterdir() if d.is_dir()}
+
+        allowed = samples._SAMPLE_FAMILIES
+        for family in sorted(families):
+            if allowed is not None and family not in allowed:
+                continue
+            try:
+                family_lengths = samples.rescan_family(family)
+            except OSError as e:
+                print(f"Error rescanning sample family '{family}': {e}")
+                continue
+            if self.on_change is not None:
+                try:
+                    self.on_change(family, family_lengths)
+                except Exception as e:  # noqa: BLE001 - user code must not stop the watcher
+                    print(f"Error in on_change for sample family '{family}': {e}")
+            else:
+                print(f"Samples updated: '{family}' now has {len(family_lengths)} files")
+
+
+def watch_samples(
+    interval: float = 1.0,
+    polling: bool = False,
+    on_change: Callable[[str, dict[str, float]], None] | None = None,
+) -> SampleWatcher:
+    """
+    Start watching the sample folders and update lengths when files change.
+
+    Watches the directories used by the last `calculate_sample_lengths()` call,
+    using inotify where available and polling directory mtimes otherwise.
+
+    Args:
+        interval: Polling interval in seconds (also the inotify wake-up interval)
+        polling: Force the mtime-polling backend
+        on_change: Called as on_change(family, lengths) after a family was rescanned
+                   (default: print a short message)
+
+    Returns:
+        The running SampleWatcher (call `.stop()` to stop it)
+    """
+    return SampleWatcher(interval=interval, polling=polling, on_change=on_change).start()
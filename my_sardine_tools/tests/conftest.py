@@ -31,6 +31,15 @@ mock_bowl.clock = Mock()
 mock_bowl.clock.beat_duration = 0.5
 mock_bowl.add_handler = Mock()
 
+
+def mock_parse(pattern):
+    """Stand-in for Sardine's parser: space-separated numbers, "." for rests."""
+    return [None if token == "." else float(token) for token in str(pattern).split()]
+
+
+mock_bowl.parser = Mock()
+mock_bowl.parser.parse = Mock(side_effect=mock_parse)
+
 # Create a mock sardine_core.run module with our specific mocks
 mock_run_module = MockSardineModule()
 mock_run_module.D = mock_original_D  # This will be imported as original_D
@@ -71,6 +80,24 @@ def mock_sardine_modules():
     yield SARDINE_MODULES
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Keep the persistent sample index out of the user's real cache directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    yield tmp_path / "cache"
+
+
+@pytest.fixture(autouse=True)
+def fresh_pattern_cache():
+    """Start every test with an empty pattern cache and the default parser mock."""
+    from my_sardine_tools.patterns import get_pattern_cache
+
+    mock_bowl.parser = Mock()
+    mock_bowl.parser.parse = Mock(side_effect=mock_parse)
+    get_pattern_cache().clear()
+    yield get_pattern_cache()
+
+
 @pytest.fixture
 def mock_sardine_functions():
     """Mock common sardine functions used in tests."""
@@ -133,3 +160,16 @@ def patch_senders(mock_sardine_functions):
             mock_obj.reset_mock()
 
     return mock_sardine_functions
+
+
+@pytest.fixture
+def dirt_handler():
+    """A SuperDirt handler stand-in that passes patterns through unchanged."""
+    handler = Mock()
+    handler._name = "SuperDirt"
+    handler._defaults = {"amp": 0.4}
+    handler.nudge = 0.3
+    handler.apply_conditional_mask_to_bars = Mock(return_value=False)
+    handler._parse_aliases = Mock(side_effect=lambda pattern: pattern)
+    handler.pattern_reduce = Mock(side_effect=lambda pattern, *args: iter([dict(pattern)]))
+    return handler
@@ -0,0 +1,137 @@
+"""
+Tests for offline audio analysis.
+Audio is synthesized with NumPy and written with soundfile.
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+HITS = [0.0, 0.25, 0.5, 0.625, 1.1]
+
+
+def write_hits(path, hits=HITS, length=1.5, samplerate=44100, **kwargs):
+    """Decaying noise bursts at the given times, over quiet background noise."""
+    rng = np.random.default_rng(0)
+    audio = rng.normal(0, 1e-4, int(length * samplerate))
+    decay = np.exp(-np.arange(int(0.08 * samplerate)) / (0.015 * samplerate))
+    for hit in hits:
+        start = int(hit * samplerate)
+        burst = rng.uniform(-0.8, 0.8, len(decay)) * decay
+        audio[start : start + len(burst)] += burst[: len(audio) - start]
+    stereo = np.stack([audio, audio * 0.5], axis=1)
+    sf.write(str(path), stereo, samplerate, **kwargs)
+    return path
+
+
+@pytest.mark.parametrize(
+    ("name", "kwargs"),
+    [
+        ("memmapped.wav", {"subtype": "PCM_16"}),
+        ("float.wav", {"subtype": "FLOAT"}),
+        ("streamed.wav", {"subtype": "PCM_24"}),
+        ("streamed.flac", {}),
+    ],
+)
+def test_detect_onsets_finds_hits(tmp_path, name, kwargs):
+    """Test that each burst gives one onset within one analysis window."""
+    from my_sardine_tools.analysis import detect_onsets
+
+    path = write_hits(tmp_path / name, **kwargs)
+    onsets = detect_onsets(path)
+
+    assert len(onsets) == len(HITS)
+    np.testing.assert_allclose(onsets, HITS, atol=512 / 44100)
+
+
+def test_detect_onsets_min_gap(tmp_path):
+    """Test that hits closer than min_gap collapse into one onset."""
+    from my_sardine_tools.analysis import detect_onsets
+
+    path = write_hits(tmp_path / "flam.wav", hits=[0.2, 0.27])
+
+    assert len(detect_onsets(path, min_gap=0.01)) == 2
+    assert len(detect_onsets(path, min_gap=0.1)) == 1
+
+
+def test_detect_onsets_silence(tmp_path):
+    """Test that silent and empty files have no onsets."""
+    from my_sardine_tools.analysis import detect_onsets
+
+    silent = tmp_path / "silent.wav"
+    sf.write(str(silent), np.zeros(44100), 44100)
+    empty = tmp_path / "empty.wav"
+    sf.write(str(empty), np.zeros(0), 44100)
+
+    assert detect_onsets(silent) == []
+    assert detect_onsets(empty) == []
+
+
+def test_energy_envelope_matches_full_read(tmp_path):
+    """Test that block-wise reading gives the same envelope as reading everything."""
+    from my_sardine_tools.analysis import energy_envelope
+
+    path = write_hits(tmp_path / "hits.wav", subtype="FLOAT")
+    db, rate = energy_envelope(path, hop=500)
+
+    audio, samplerate = sf.read(str(path))
+    mono = audio.mean(axis=1)
+    n = len(mono) // 500
+    expected = 10 * np.log10(np.maximum((mono[: n * 500].reshape(n, 500) ** 2).mean(axis=1), 1e-10))
+
+    assert rate == samplerate / 500
+    assert len(db) == n + 1  # trailing partial window
+    np.testing.assert_allclose(db[:n], expected, atol=1e-3)
+
+
+@pytest.mark.parametrize(
+    ("name", "kwargs"),
+    [("memmapped.wav", {"subtype": "FLOAT"}), ("streamed.wav", {"subtype": "PCM_24"})],
+)
+def test_measure_levels_sine(tmp_path, name, kwargs):
+    """Test peak, RMS and loudness of a steady stereo sine."""
+    from my_sardine_tools.analysis import measure_levels
+
+    t = np.arange(44100 * 2) / 44100
+    sine = 0.5 * np.sin(2 * np.pi * 441 * t)
+    path = tmp_path / name
+    sf.write(str(path), np.stack([sine, sine], axis=1), 44100, **kwargs)
+
+    levels = measure_levels(path)
+
+    assert levels["peak"] == pytest.approx(0.5, abs=1e-3)
+    assert levels["rms"] == pytest.approx(0.5 / np.sqrt(2), abs=1e-3)
+    # Two channels of mean square 0.125: -0.691 + 10 * log10(0.25)
+    assert levels["loudness"] == pytest.approx(-6.712, abs=0.01)
+
+
+def test_measure_levels_gating(tmp_path):
+    """Test that silence around a sound does not lower its loudness."""
+    from my_sardine_tools.analysis import measure_levels
+
+    rng = np.random.default_rng(0)
+    noise = rng.uniform(-0.3, 0.3, 44100)
+    padded = np.concatenate([np.zeros(44100 * 3), noise, np.zeros(44100 * 3)])
+    sf.write(str(tmp_path / "noise.wav"), noise, 44100, subtype="FLOAT")
+    sf.write(str(tmp_path / "padded.wav"), padded, 44100, subtype="FLOAT")
+
+    loud = measure_levels(tmp_path / "noise.wav")["loudness"]
+    padded_levels = measure_levels(tmp_path / "padded.wav")
+
+    assert padded_levels["loudness"] == pytest.approx(loud, abs=1.5)
+    assert padded_levels["rms"] < measure_levels(tmp_path / "noise.wav")["rms"] / 2
+
+
+def test_measure_levels_short_and_silent(tmp_path):
+    """Test files shorter than a gating block, and silence."""
+    from my_sardine_tools.analysis import measure_levels
+
+    click = np.full(1000, 0.25)
+    sf.write(str(tmp_path / "click.wav"), click, 44100, subtype="FLOAT")
+    sf.write(str(tmp_path / "silent.wav"), np.zeros(44100), 44100)
+
+    levels = measure_levels(tmp_path / "click.wav")
+    assert levels["peak"] == pytest.approx(0.25)
+    assert levels["loudness"] == pytest.approx(-0.691 + 10 * np.log10(0.0625), abs=1e-3)
+
+    assert measure_levels(tmp_path / "silent.wav") == {"peak": 0.0, "rms": 0.0, "loudness": None}
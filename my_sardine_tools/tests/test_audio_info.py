@@ -0,0 +1,106 @@
+"""
+Tests for the header-only audio info reader.
+Files are written with soundfile and the parsed headers compared against it.
+"""
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+
+@pytest.fixture
+def make_audio(tmp_path):
+    """Write a short test file and return its path."""
+
+    def make(name, frames=1234, channels=2, samplerate=44100, **kwargs):
+        path = tmp_path / name
+        data = np.linspace(-0.5, 0.5, frames * channels).reshape(frames, channels)
+        sf.write(str(path), data, samplerate, **kwargs)
+        return path
+
+    return make
+
+
+@pytest.mark.parametrize(
+    ("name", "kwargs"),
+    [
+        ("pcm16.wav", {"subtype": "PCM_16"}),
+        ("pcm24.wav", {"subtype": "PCM_24"}),
+        ("float.wav", {"subtype": "FLOAT"}),
+        ("extensible.wav", {"format": "WAVEX", "subtype": "PCM_16"}),
+        ("big.rf64", {"format": "RF64", "subtype": "PCM_16"}),
+        ("pcm16.aiff", {"subtype": "PCM_16"}),
+        ("float.aiff", {"format": "AIFF", "subtype": "FLOAT"}),
+        ("lossless.flac", {"subtype": "PCM_16"}),
+    ],
+)
+def test_read_header_matches_soundfile(make_audio, name, kwargs):
+    """Test that parsed headers agree with libsndfile."""
+    from my_sardine_tools.audio_info import read_header
+
+    path = make_audio(name, samplerate=48000, **kwargs)
+    info = read_header(path)
+    expected = sf.info(str(path))
+
+    assert info.frames == expected.frames
+    assert info.channels == expected.channels
+    assert info.samplerate == expected.samplerate
+    assert info.duration == pytest.approx(expected.duration)
+
+
+@pytest.mark.parametrize(
+    ("name", "kwargs"),
+    [
+        ("pcm16.wav", {"subtype": "PCM_16"}),
+        ("float.wav", {"subtype": "FLOAT"}),
+        ("extensible.wav", {"format": "WAVEX", "subtype": "FLOAT"}),
+        ("pcm16.aiff", {"subtype": "PCM_16"}),
+    ],
+)
+def test_read_header_data_can_be_memory_mapped(make_audio, name, kwargs):
+    """Test that data_offset and sample_format point at the raw samples."""
+    from my_sardine_tools.audio_info import read_header
+
+    path = make_audio(name, **kwargs)
+    info = read_header(path)
+    samples = np.memmap(
+        path, info.sample_format, "r", info.data_offset, (info.frames, info.channels)
+    )
+    expected, _ = sf.read(str(path), dtype=samples.dtype.newbyteorder("="))
+
+    np.testing.assert_array_equal(samples, expected)
+
+
+def test_read_header_24bit_has_no_sample_format(make_audio):
+    """Test that encodings without a numpy dtype are not offered for mapping."""
+    from my_sardine_tools.audio_info import read_header
+
+    info = read_header(make_audio("pcm24.wav", subtype="PCM_24"))
+    assert info.sample_format is None
+
+
+def test_read_header_rejects_unknown_formats(tmp_path):
+    """Test that unsupported or broken files raise ValueError."""
+    from my_sardine_tools.audio_info import read_header
+
+    garbage = tmp_path / "garbage.mp3"
+    garbage.write_bytes(b"\xff\xfb\x90\x00" + bytes(100))
+    truncated = tmp_path / "truncated.wav"
+    truncated.write_bytes(b"RIFF\x00\x00")
+    empty = tmp_path / "empty.wav"
+    empty.touch()
+
+    for path in (garbage, truncated, empty):
+        with pytest.raises(ValueError):
+            read_header(path)
+
+
+def test_read_info_falls_back_to_soundfile(make_audio):
+    """Test that read_info uses soundfile for formats the parser skips."""
+    from my_sardine_tools.audio_info import read_info
+
+    path = make_audio("lossy.ogg", channels=1, format="OGG", subtype="VORBIS")
+    info = read_info(path)
+
+    assert info.frames == sf.info(str(path)).frames
+    assert info.data_offset is None
@@ -0,0 +1,95 @@
+"""
+Tests for the grain budget and the event loop lag monitor.
+"""
+
+import asyncio
+import time
+from unittest.mock import Mock
+
+import pytest
+
+
+@pytest.fixture
+def budget(patch_sardine_imports):
+    """The shared budget, turned off and reset after the test."""
+    from my_sardine_tools.budget import get_grain_budget, set_grain_budget
+
+    patch_sardine_imports["bowl"].clock.shifted_time = 0.0
+    yield get_grain_budget()
+    set_grain_budget()
+    get_grain_budget().reset()
+
+
+def test_budget_off_by_default(budget):
+    """Test that without limits the budget is inactive and admits everything."""
+    assert not budget.active
+    assert budget.admit(500, 1.0) == 500
+
+
+def test_max_rate_shared_between_clouds(budget, patch_sardine_imports):
+    """Test that overlapping clouds share max_rate and finished ones free it."""
+    from my_sardine_tools.budget import grain_budget_info, set_grain_budget
+
+    set_grain_budget(max_rate=1000)
+    clock = patch_sardine_imports["bowl"].clock
+
+    assert budget.admit(600, 1.0) == 600
+    assert budget.admit(600, 1.0) == 400  # only 400/s left
+    assert budget.admit(100, 1.0) == 0
+
+    clock.shifted_time = 1.5  # both clouds are over
+    assert budget.admit(600, 0.5) == 500
+
+    info = grain_budget_info()
+    assert (info["requested"], info["sent"], info["shed"]) == (1900, 1500, 400)
+
+
+def test_lateness_thins_clouds(budget):
+    """Test that density drops in proportion to the event loop lag."""
+    from my_sardine_tools.budget import set_grain_budget
+
+    set_grain_budget(max_lateness=0.02)
+    budget.monitor.lag = 0.01
+    assert budget.admit(100, 1.0) == 100
+    budget.monitor.lag = 0.08
+    assert budget.admit(100, 1.0) == 25
+
+
+def test_lag_monitor_sees_blocking_code():
+    """Test that a blocked event loop shows up as lag."""
+    from my_sardine_tools.budget import LagMonitor
+
+    monitor = LagMonitor(interval=0.005)
+
+    def hog_loop():
+        time.sleep(0.05)  # a swimmer hogging the loop
+
+    async def session():
+        assert monitor.start()
+        await asyncio.sleep(0.02)
+        idle = monitor.lag
+        hog_loop()
+        await asyncio.sleep(0.001)  # lets the overdue tick run
+        return idle, monitor.lag
+
+    idle, busy = asyncio.run(session())
+    assert busy >= 0.04 > idle
+    assert not LagMonitor().start()  # no running loop here
+
+
+def test_granulate_sheds_grains(budget, patch_sardine_imports):
+    """Test that granulate spreads fewer grains over the same duration."""
+    from my_sardine_tools.budget import set_grain_budget
+    from my_sardine_tools.samples import granulate
+
+    set_grain_budget(max_rate=8)  # beat_duration is 0.5 s: 4 grains per beat
+    sender = Mock()
+
+    assert granulate("sfx:0", density=16, duration=1.0, sender=sender) == 1.0
+    assert sender.call_count == 4
+    assert patch_sardine_imports["sleep"].call_args_list[-1].args == (0.25,)
+    assert budget.shed == 12
+
+    # Nothing left while the first cloud plays
+    assert granulate("sfx:0", density=16, duration=1.0, sender=sender) == 1.0
+    assert sender.call_count == 4
@@ -0,0 +1,89 @@
+"""
+Tests for the live-control bridge.
+OSC sending is patched, messages are inspected with osc4py3's own types.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def bridge(dirt_handler):
+    from my_sardine_tools.control import ControlBridge
+
+    dirt_handler._parse_aliases.side_effect = lambda pattern: {
+        {"lpf": "cutoff", "hpf": "hcutoff"}.get(key, key): value for key, value in pattern.items()
+    }
+    return ControlBridge(dirt_handler)
+
+
+def test_bound_keys_send_controls(bridge):
+    """Test that changing a bound key sends one control message to the orbit."""
+    from my_sardine_tools.state import State
+
+    state = State()
+    state.choir.fx.init(lpf=1000, hpf=300, vowel="o")
+    with patch("my_sardine_tools.control.osc_send") as osc_send:
+        assert bridge.bind(state.choir.fx, orbit=1) == ["lpf", "hpf"]
+        state.choir.fx.lpf = 600
+        state.choir.fx.vowel = "a"  # not bound
+
+    message, name = osc_send.call_args.args
+    assert name == "SuperDirt"
+    assert message.addrpattern == "/sprats/ctl"
+    assert message.arguments == [1, "cutoff", 600.0]
+    assert bridge.sent == 1
+
+
+def test_changes_coalesced_per_tick(bridge):
+    """Test that many writes in a tick send a single message."""
+    import asyncio
+
+    from my_sardine_tools.state import State
+
+    state = State()
+    state.pad.amp = 0.1
+
+    async def session():
+        bridge.bind(state.pad, orbit=3, keys=["amp"])
+        for step in range(50):
+            state.pad.amp = step / 100
+        await asyncio.sleep(0)
+
+    with patch("my_sardine_tools.control.osc_send") as osc_send:
+        asyncio.run(session())
+
+    assert osc_send.call_count == 1
+    assert osc_send.call_args.args[0].arguments == [3, "amp", 0.49]
+
+
+def test_unbind(bridge):
+    """Test that unbound nodes stop sending and get their plain class back."""
+    from my_sardine_tools.state import State
+
+    state = State()
+    state.bass.lpf = 200
+    bridge.bind(state.bass, orbit=2)
+    bridge.unbind(state.bass)
+
+    with patch("my_sardine_tools.control.osc_send") as osc_send:
+        state.bass.lpf = 400
+    osc_send.assert_not_called()
+    assert type(state.bass) is State
+
+
+def test_live_control_shared_bridge(dirt_handler):
+    """Test the module-level helpers around a shared bridge."""
+    from my_sardine_tools.control import live_control, stop_live_control
+    from my_sardine_tools.state import State
+
+    state = State()
+    state.lead.init(cutoff=5000, n_steps=32, orbit=0, amp=0.1)
+    assert live_control(state.lead, orbit=0, handler=dirt_handler) == ["cutoff", "amp"]
+
+    with patch("my_sardine_tools.control.osc_send") as osc_send:
+        state.lead.cutoff = 4000
+        stop_live_control(state.lead)
+        state.lead.cutoff = 3000
+    assert osc_send.call_count == 1
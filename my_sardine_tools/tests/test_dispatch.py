@@ -0,0 +1,143 @@
+"""
+Tests for the lookahead dispatcher.
+OSC sending is patched, bundles are inspected with osc4py3's own types.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+
+@pytest.fixture
+def clock(patch_sardine_imports):
+    """Clock with 0.25 s of headroom ahead of real time."""
+    clock = patch_sardine_imports["bowl"].clock
+    clock.time = 10.0
+    clock.shifted_time = 10.25
+    clock.phase = 0.5
+    clock.bar = 2
+    clock.beats_per_bar = 4
+    clock.beat = 1
+    return clock
+
+
+@pytest.fixture
+def dispatcher(dirt_handler, clock):
+    """Enabled dispatcher, disabled again after the test."""
+    from my_sardine_tools.dispatch import disable_lookahead, enable_lookahead
+
+    yield enable_lookahead(0.1, handler=dirt_handler)
+    disable_lookahead()
+
+
+def test_send_dirt_without_lookahead(patch_sardine_imports):
+    """Test that events go through Sardine's D() while lookahead is off."""
+    from my_sardine_tools.dispatch import get_dispatcher, send_dirt
+
+    assert get_dispatcher() is None
+    send_dirt("bd", amp=0.5, i=3)
+
+    patch_sardine_imports["original_D"].assert_called_once_with("bd", amp=0.5, i=3)
+
+
+def test_bundle_timetag(dispatcher, patch_sardine_imports):
+    """Test that the timetag is real time plus clock headroom plus lookahead."""
+    from my_sardine_tools.dispatch import send_dirt
+    from osc4py3 import oscbuildparse
+
+    with (
+        patch("my_sardine_tools.dispatch.osc_send") as osc_send,
+        patch("my_sardine_tools.dispatch.time.time", return_value=1000.0),
+    ):
+        send_dirt("bd", speed=2, i=3)
+
+    patch_sardine_imports["original_D"].assert_not_called()
+    bundle, target = osc_send.call_args.args
+    assert target == "SuperDirt"
+    assert oscbuildparse.timetag2unixtime(bundle.timetag) == pytest.approx(1000.35, abs=1e-6)
+
+    (message,) = bundle.elements
+    assert message.addrpattern == "/dirt/play"
+    assert message.arguments == [
+        "amp", 0.4, "cps", 0.5, "cycle", 9, "orbit", 0, "sound", "bd", "speed", 2,
+    ]  # fmt: skip
+    assert dispatcher.sent == 1
+
+
+def test_index_aliases(dispatcher, dirt_handler):
+    """Test that i/d/r are passed to pattern_reduce like Sardine's D() does."""
+    with patch("my_sardine_tools.dispatch.osc_send"):
+        dispatcher.send("bd", i=5, d=2, r=0.5)
+
+    pattern, iterator, divisor, rate = dirt_handler.pattern_reduce.call_args.args
+    assert (iterator, divisor, rate) == (5, 2, 0.5)
+    assert not {"i", "d", "r"} & pattern.keys()
+
+
+def test_chords_share_one_bundle(dispatcher, dirt_handler):
+    """Test that every voice of a D() call goes into the same bundle."""
+    dirt_handler.pattern_reduce.side_effect = lambda pattern, *args: iter(
+        [{**pattern, "n": 0}, {**pattern, "n": 4}, {**pattern, "sound": None}]
+    )
+    with patch("my_sardine_tools.dispatch.osc_send") as osc_send:
+        dispatcher.send("superpiano")
+
+    bundle = osc_send.call_args.args[0]
+    notes = [dict(zip(m.arguments[::2], m.arguments[1::2]))["n"] for m in bundle.elements]
+    assert notes == [0, 4]
+
+
+@pytest.mark.parametrize("masked, sound", [(True, "bd"), (False, None)])
+def test_nothing_sent(dispatcher, dirt_handler, masked, sound):
+    """Test that rests and masked bars send no bundle."""
+    dirt_handler.apply_conditional_mask_to_bars.return_value = masked
+    with patch("my_sardine_tools.dispatch.osc_send") as osc_send:
+        dispatcher.send(sound)
+
+    osc_send.assert_not_called()
+
+
+def test_default_lookahead_is_nudge(dirt_handler, clock):
+    """Test that lookahead defaults to Sardine's nudge, so Players stay in time."""
+    from my_sardine_tools.dispatch import disable_lookahead, enable_lookahead
+
+    assert enable_lookahead(handler=dirt_handler).lookahead == 0.3
+    disable_lookahead()
+
+
+def test_batch_shares_one_bundle(dispatcher):
+    """Test that events sent at the same clock time go out as one bundle."""
+    from my_sardine_tools.dispatch import batch, send_dirt
+
+    with patch("my_sardine_tools.dispatch.osc_send") as osc_send:
+        with batch():
+            send_dirt("supersaw", n=60)
+            send_dirt("supersquare", n=48)
+            send_dirt(None)
+        osc_send.assert_called_once()
+
+    assert len(osc_send.call_args.args[0].elements) == 2
+    assert dispatcher.bundles == 1
+
+
+def test_batch_splits_at_sleep(dispatcher, clock):
+    """Test that moving the clock inside a batch starts a new bundle."""
+    from my_sardine_tools.dispatch import batch, send_dirt
+
+    with patch("my_sardine_tools.dispatch.osc_send") as osc_send, batch():
+        send_dirt("bd")
+        clock.shifted_time += 0.5
+        send_dirt("hh")
+        osc_send.assert_not_called()
+
+    first, second = (call.args[0] for call in osc_send.call_args_list)
+    assert second.timetag > first.timetag
+
+
+def test_batch_without_lookahead(patch_sardine_imports):
+    """Test that batch() changes nothing while lookahead is off."""
+    from my_sardine_tools.dispatch import batch, send_dirt
+
+    with batch():
+        send_dirt("bd")
+        patch_sardine_imports["original_D"].assert_called_once_with("bd")
@@ -0,0 +1,74 @@
+"""
+Tests for the Ziffers duration analysis.
+"""
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    ("ziff", "durations"),
+    [
+        ("0 1 2", (1.0, 1.0, 1.0)),
+        ("q 0 e 1 2 h 3", (1.0, 0.5, 0.5, 2.0)),
+        ("e0 1 s2", (0.5, 1.0, 0.25)),  # attached durations are not sticky
+        ("h. 0 q.. 1 q... 2", (3.0, 1.75, 11 / 6)),
+        ("qe0 hq1", (1.5, 3.0)),  # ties
+        ("0.5 0 0.125 1", (2.0, 0.5)),  # decimals are whole notes
+        ("0.5 0 <0.25>1 2", (2.0, 1.0, 2.0)),  # escaped decimal: one note only
+        ("e<0.125>0 1", (1.0, 1.0)),  # prefixes add up
+        ("q 0 <1> 2 <-1>3", (1.0, 1.0, 1.0)),  # escaped octaves are not events
+        ("p 0 1 2", (32 / 3,) * 3),  # Ziffers' p is 2/3 of a double whole note
+        (
+            "n 0 k 1 y 2 x 3 j 4 o 5 g 6 a 7 f 8",
+            (4 / 3, 64 / 3, 8 / 3, 1 / 6, 1 / 32, 1 / 60, 1 / 12, 2 / 3, 1 / 3),
+        ),
+        ("q [0 1] [2 [3 4]]", (0.5, 0.5, 0.5, 0.25, 0.25)),
+        ("e [: 0 1 :] 2", (0.5, 0.5, 0.5, 0.5, 0.5)),
+        ("[: q0 e1 :3]", (1.0, 0.5) * 3),
+        ("e (: 0 1 :3)", (0.5,) * 6),
+        ("q 024 r e 0 <1 3>", (1.0, 1.0, 0.5, 0.5)),
+        ("h #0 b1 ^2 _T E ?", (2.0,) * 6),
+        ("(0 1)+2 3", (1.0, 1.0, 1.0)),
+        ("e(0 1) 2", (0.5, 0.5, 1.0)),  # a prefix applies to the list's notes
+        ("e 0..3", (0.5,) * 4),
+        ("q e h", ()),  # only durations, no events
+    ],
+)
+def test_ziff_durations(ziff, durations):
+    """Test durations for the Ziffers notation features."""
+    from my_sardine_tools.durations import ziff_durations
+
+    assert ziff_durations(ziff) == pytest.approx(durations)
+
+
+@pytest.mark.parametrize(
+    ("ziff", "durations"),
+    [
+        ("q 0:3 e 1", (1.0, 1.0, 1.0, 0.5)),
+        ("r:2 0", (1.0, 1.0, 1.0)),
+        ("(0 1):2 2", (1.0,) * 5),
+        ("h(0 1):2 3", (2.0, 2.0, 2.0, 2.0, 1.0)),
+        ("<0.5>0:2 1", (2.0, 2.0, 1.0)),
+        ("<0 1>:2 3", (1.0, 1.0, 1.0)),
+        ("q [0 1:2]", (1 / 3,) * 3),  # repeats inside a subdivision share it
+        ("e [0 [1 2]:2]", (1 / 6,) + (1 / 12,) * 4),
+    ],
+)
+def test_ziff_item_repeats(ziff, durations):
+    """Test the item:n repeat form."""
+    from my_sardine_tools.durations import ziff_durations
+
+    assert ziff_durations(ziff) == pytest.approx(durations)
+
+
+def test_ziff_sustain_is_cached():
+    """Test that repeated calls are served from the cache."""
+    from my_sardine_tools.durations import ziff_durations, ziff_sustain
+
+    ziff_sustain.cache_clear()
+    ziff_durations.cache_clear()
+    for _ in range(10):
+        assert ziff_sustain("q 0 e [1 2]", 0.5) == "0.5 0.125 0.125"
+
+    assert ziff_sustain.cache_info().hits == 9
+    assert ziff_durations.cache_info().misses == 1
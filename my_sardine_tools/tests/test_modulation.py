@@ -0,0 +1,153 @@
+"""
+Tests for the modulation engine.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def engine():
+    from my_sardine_tools.modulation import ModulationEngine
+
+    return ModulationEngine(p=0.25, seed=1)
+
+
+def test_periodic_shapes(engine):
+    """Test sine and saw values over their period."""
+    from my_sardine_tools.state import State
+
+    state = State()
+    engine.add(state.melody, "cutoff", "sine", low=1000, high=5000, period=4)
+    engine.add(state.melody, "pan", "saw", period=2, phase=0.25)
+
+    engine.step(1.0)
+    assert state.melody.cutoff == pytest.approx(3000)
+    assert state.melody.pan == pytest.approx(0.75)
+    engine.step(1.0)
+    assert state.melody.cutoff == pytest.approx(5000)
+    assert state.melody.pan == pytest.approx(0.25)
+
+
+def test_only_changed_leaves_are_written(engine):
+    """Test that leaves whose value did not change are not set again."""
+    from my_sardine_tools.state import State
+
+    state = State()
+    engine.add(state.bass, "amp", "adsr", high=0.5)  # not triggered: stays at low
+    engine.add(state.lead, "cutoff", "saw", period=4)
+
+    assert engine.step(0.5) == 2
+    version = state.bass._version
+    assert engine.step(0.5) == 1
+    assert state.bass._version == version
+
+
+def test_adsr(engine):
+    """Test the attack, decay, sustain and release stages."""
+    from my_sardine_tools.state import State
+
+    state = State()
+    env = engine.add(state.pad, "amp", "adsr", high=1.0, attack=1, decay=1, sustain=0.5, release=2)
+    engine.step(1.0)
+    assert state.pad.amp == 0.0
+
+    env.trigger()
+    levels = []
+    for _ in range(4):
+        engine.step(0.5)
+        levels.append(state.pad.amp)
+    assert levels == pytest.approx([0.5, 1.0, 0.75, 0.5])
+
+    env.release()
+    engine.step(1.0)
+    assert state.pad.amp == pytest.approx(0.25)
+    engine.step(2.0)
+    assert state.pad.amp == 0.0
+
+
+def test_random_walk_stays_in_range(engine):
+    """Test that random walks move by at most step per beat within the range."""
+    import numpy as np
+    from my_sardine_tools.state import State
+
+    state = State()
+    for i in range(20):
+        engine.add(state.grains, f"pos{i}", "random", low=-1, high=1, step=0.4)
+
+    previous = None
+    for _ in range(50):
+        engine.step(0.25)
+        values = np.array([state.grains[f"pos{i}"] for i in range(20)])
+        assert np.all((-1 <= values) & (values <= 1))
+        if previous is not None:
+            assert np.all(np.abs(values - previous) <= 2 * 0.4 * 0.25 + 1e-9)
+        previous = values
+
+
+def test_add_and_remove_keep_state(engine):
+    """Test that rebuilding the arrays keeps walk positions and envelopes."""
+    from my_sardine_tools.state import State
+
+    state = State()
+    walk = engine.add(state.fx, "room", "random", step=1.0)
+    env = engine.add(state.fx, "amp", "adsr", attack=2)
+    env.trigger()
+    engine.step(1.0)
+    room = state.fx.room
+
+    sine = engine.add(state.fx, "pan", "sine")
+    sine.remove()
+    assert len(engine) == 2
+    assert engine.values()[0] == room
+    assert engine.values()[1] == pytest.approx(0.5)
+    walk.remove()
+    assert engine.values().tolist() == [pytest.approx(0.5)]
+
+    with pytest.raises(ValueError, match="Unknown shape"):
+        engine.add(state.fx, "amp", "square")
+
+
+def test_modulate_runs_one_swimmer(monkeypatch):
+    """Test that modulate() starts a single swimmer for all the modulators."""
+    from unittest.mock import Mock
+
+    from my_sardine_tools.state import State
+
+    from my_sardine_tools import modulation
+
+    swim = Mock(return_value="runner")
+    again = Mock()
+    die = Mock()
+    monkeypatch.setattr(modulation, "swim", swim)
+    monkeypatch.setattr(modulation, "again", again)
+    monkeypatch.setattr(modulation, "die", die)
+    monkeypatch.setattr(modulation, "_ENGINE", modulation.ModulationEngine())
+    modulation.set_control_rate(0.125)
+
+    state = State()
+    for key in ("cutoff", "room", "pan"):
+        modulation.modulate(state.lead, key, period=1)
+    assert swim.call_count == 1
+
+    tick = swim.call_args.args[0]
+    tick(p=0.125)
+    again.assert_called_once_with("runner", p=0.125)
+    assert state.lead.cutoff == pytest.approx(0.5 - 0.5 * 2**-0.5)
+
+    modulation.get_modulation_engine().clear()
+    die.assert_called_once_with("runner")
+
+
+def test_engines_have_their_own_swimmer(monkeypatch):
+    """Test that two engines do not share a runner name."""
+    from unittest.mock import Mock
+
+    from my_sardine_tools import modulation
+
+    swim = Mock(side_effect=lambda func, snap: func.__name__)
+    monkeypatch.setattr(modulation, "swim", swim)
+    first, second = modulation.ModulationEngine(), modulation.ModulationEngine()
+    first.start()
+    second.start()
+    assert first.runner != second.runner
+    assert first.runner.startswith("modulation_")
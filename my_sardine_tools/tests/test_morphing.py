@@ -0,0 +1,104 @@
+"""
+Tests for morphing State scenes.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def scenes():
+    """A state in its verse, and a snapshot of its chorus."""
+    from my_sardine_tools.state import State
+
+    state = State()
+    state.melody.saw.cutoff = 1000
+    state.melody.amp = 0.1
+    state.melody.sound = "supersaw"
+    state.reverb.room = 0.2
+    state.reverb.n_steps = 8
+    verse = state.snapshot()
+
+    state.melody.saw.cutoff = 5000
+    state.melody.amp = 0.3
+    state.melody.sound = "superpiano"
+    state.reverb.n_steps = 16
+    chorus = state.snapshot()
+    state.restore(verse)
+    return state, chorus
+
+
+def test_morph_interpolates_all_numeric_leaves(scenes):
+    """Test that one set() moves every numeric leaf and only those that change."""
+    from my_sardine_tools.morphing import Morph
+
+    state, chorus = scenes
+    fade = Morph(state, chorus)
+    assert len(fade) == 2  # reverb.room does not change, n_steps is not interpolated
+
+    room = state.reverb
+    version = room._version
+    assert fade.set(0.5) == 2
+    assert state.melody.saw.cutoff == 3000
+    assert isinstance(state.melody.saw.cutoff, int)
+    assert state.melody.amp == pytest.approx(0.2)
+    assert state.melody.sound == "supersaw"
+    assert room._version == version
+
+    assert fade.set(0.5) == 0  # nothing changed since the last tick
+
+
+def test_morph_finish_reaches_target(scenes):
+    """Test that finishing applies the exact target, switches included."""
+    from my_sardine_tools.morphing import Morph
+
+    state, chorus = scenes
+    fade = Morph(state, chorus, ease=lambda x: x * x)
+    fade.set(0.5)
+    assert state.melody.saw.cutoff == 2000
+    fade.finish()
+    assert state.to_dict() == {} and chorus.diff() == {}
+    assert state.melody.sound == "superpiano"
+    assert state.reverb.n_steps == 16
+
+
+def test_morph_to_dict_target():
+    """Test a partial dict target: other keys are left alone."""
+    from my_sardine_tools.morphing import Morph
+    from my_sardine_tools.state import State
+
+    state = State()
+    state.bass.amp = 0.2
+    state.bass.lpf = 200.0
+    fade = Morph(state, {"bass": {"lpf": 800.0, "sound": "sub"}, "new": {"amp": 1}})
+    fade.set(0.25)
+    assert state.bass.lpf == 350.0
+    fade.finish()
+    assert state.bass.to_dict() == {"amp": 0.2, "lpf": 800.0, "sound": "sub"}
+    assert state.new.amp == 1
+
+
+def test_morph_swimmer(scenes, monkeypatch):
+    """Test that morph() ticks one swimmer over the beats and then stops."""
+    from unittest.mock import Mock
+
+    from my_sardine_tools import morphing
+
+    state, chorus = scenes
+    swim = Mock(return_value="runner")
+    again = Mock()
+    monkeypatch.setattr(morphing, "swim", swim)
+    monkeypatch.setattr(morphing, "again", again)
+
+    fade = morphing.morph(state, chorus, beats=1, p=0.25)
+    tick = swim.call_args.args[0]
+    assert tick.__name__.startswith("morph_")
+    assert fade.runner == "runner"
+
+    for i in range(4):
+        tick(p=0.25, i=i)
+        assert again.call_args.kwargs == {"p": 0.25, "i": i + 1}
+    assert state.melody.saw.cutoff == 4000
+    tick(p=0.25, i=4)
+    assert again.call_count == 4
+    assert chorus.diff() == {}
+    assert fade.runner is None
@@ -0,0 +1,120 @@
+"""
+Tests for the compiled pattern cache.
+The parser is the space-splitting mock from conftest.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    ("pattern", "static"),
+    [
+        ("0.5 0.25", True),
+        ("[sfx:2 .]!3", True),
+        ("(pal [1:0;8])", True),
+        ("(eu bd 3 8)", True),
+        ("0.8!6 0.2!6", True),
+        ("a || b", True),
+        ("bd ^| [bd ^| [C . E]]", True),
+        ("0.5|0.25", False),
+        ("1~5", False),
+        ("rand * 2", False),
+        ("(shuf 1 2 3)", False),
+        ("(pal (drunk 1 2))", False),
+        ("(lsin 4)", False),
+    ],
+)
+def test_is_static(pattern, static):
+    """Test that random and time-dependent patterns are recognized."""
+    from my_sardine_tools.patterns import is_static
+
+    assert is_static(pattern) is static
+
+
+def test_P_indexes_cached_pattern(mock_sardine_functions):
+    """Test that P() parses once and indexes like Sardine."""
+    from my_sardine_tools.patterns import P, pattern_cache_info
+
+    parse = mock_sardine_functions["bowl"].parser.parse
+
+    assert [P("1 2 3", i) for i in range(5)] == [1.0, 2.0, 3.0, 1.0, 2.0]
+    assert [P("1 2 3", i, div=2) for i in range(4)] == [1.0, 1.0, 2.0, 2.0]
+    assert [P("1 2 3", i, rate=2) for i in range(3)] == [1.0, 3.0, 2.0]
+    assert P("1 . 3", 1) is None
+
+    assert parse.call_count == 2
+    info = pattern_cache_info()
+    assert info["misses"] == 2
+    assert info["hits"] == 11
+    assert info["hit_rate"] == pytest.approx(11 / 13)
+
+
+def test_dynamic_patterns_are_parsed_every_time(mock_sardine_functions):
+    """Test that random patterns bypass the cache."""
+    from my_sardine_tools.patterns import P, get_pattern_cache
+
+    parse = mock_sardine_functions["bowl"].parser.parse
+    parse.side_effect = None
+    parse.return_value = [0.5]
+
+    for i in range(3):
+        P("0.5|0.25", i)
+
+    assert parse.call_count == 3
+    assert "0.5|0.25" not in get_pattern_cache()
+    assert get_pattern_cache().info()["dynamic"] == 3
+
+
+def test_cache_is_lru_bounded(mock_sardine_functions):
+    """Test that the least recently used pattern is evicted first."""
+    from my_sardine_tools.patterns import PatternCache
+
+    cache = PatternCache(maxsize=2)
+    cache.compile("1")
+    cache.compile("2")
+    cache.compile("1")  # "2" is now the oldest
+    cache.compile("3")
+
+    assert "1" in cache
+    assert "2" not in cache
+    assert "3" in cache
+    assert cache.info()["evictions"] == 1
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.info()["hits"] == 0
+
+
+def test_non_list_results_pass_through(mock_sardine_functions):
+    """Test that P() returns non-sequence parse results as they are."""
+    from my_sardine_tools.patterns import P
+
+    mock_sardine_functions["bowl"].parser.parse = Mock(return_value=7)
+    assert P("7", 3) == 7
+
+    mock_sardine_functions["bowl"].parser.parse = Mock(return_value=[])
+    with pytest.raises(ValueError, match="empty sequence"):
+        P("[]", 0)
+
+
+def test_pattern_length_is_memoized(mock_sardine_functions):
+    """Test lengths of static and dynamic patterns are parsed only once."""
+    from my_sardine_tools.patterns import infer_n_steps, pattern_length
+
+    parse = mock_sardine_functions["bowl"].parser.parse
+
+    assert pattern_length("1 2 3") == 3
+    assert pattern_length("1 2 3") == 3
+    assert pattern_length("1 None 3") == 3  # None is read as a rest
+    assert parse.call_count == 2
+
+    parse.side_effect = None
+    parse.return_value = [1, 2]
+    assert pattern_length("1|2 3") == 2
+    assert pattern_length("1|2 3") == 2
+    assert parse.call_count == 3
+
+    assert infer_n_steps(0.5, None, "0.25", "1 2 3", "1|2 3") == 3
+    assert infer_n_steps(0.5, "0.25") is None
@@ -4,6 +4,8 @@ Tests for playback utilities.
 
 from unittest.mock import Mock, call
 
+import pytest
+
 
 def test_create_player_new(patch_sardine_imports):
     """Test creating a new player."""
@@ -76,9 +78,112 @@ def test_loop_pattern_timing(patch_sardine_imports):
 
     loop(*sender_configs, n_steps=2, p="0.5 0.25")
 
-    # Should call P function for timing
-    assert patch_sardine_imports["P"].call_count == 2
-    patch_sardine_imports["P"].assert_has_calls([call("0.5 0.25", i=0), call("0.5 0.25", i=1)])
+    # Step durations come from the pattern, parsed only once
+    patch_sardine_imports["sleep"].assert_has_calls([call(0.5), call(0.25)])
+    patch_sardine_imports["bowl"].parser.parse.assert_called_once_with("0.5 0.25")
+
+
+def test_loop_infers_n_steps(patch_sardine_imports):
+    """Test that loop() plays the longest pattern when n_steps is omitted."""
+    from my_sardine_tools.playback import loop
+
+    mock_sender = Mock(return_value=None)
+    sender_configs = [
+        (mock_sender, {"pan": "0 0.5 1", "amp": 0.3}),
+        (mock_sender, {"speed": "1 2", "ziff": "q 0 1 2 3 4 5"}),
+    ]
+
+    duration = loop(*sender_configs, p="0.5 0.25")
+
+    assert patch_sardine_imports["sleep"].call_count == 3
+    assert duration == 1.25
+
+    # Lengths are memoized, so the next cycle parses nothing
+    parse = patch_sardine_imports["bowl"].parser.parse
+    parse_count = parse.call_count
+    loop(*sender_configs, p="0.5 0.25")
+    assert parse.call_count == parse_count
+
+    with pytest.raises(ValueError, match="Cannot infer n_steps"):
+        loop((mock_sender, {"amp": 0.3}), p=0.25)
+
+
+def test_loop_prerender(patch_sardine_imports):
+    """Test that a pre-rendered cycle does all pattern work before the first event."""
+    from my_sardine_tools.playback import loop
+    from my_sardine_tools.senders import D
+
+    parse = patch_sardine_imports["bowl"].parser.parse
+    parse_counts = []
+    patch_sardine_imports["original_D"].side_effect = lambda *a, **k: parse_counts.append(
+        parse.call_count
+    )
+    custom = Mock(return_value=None)
+
+    duration = loop(
+        (D, {"sound": "1 1 . 1", "n": "60 . 62 64", "amp": 0.5}),
+        (custom, {"sequence": "0 1"}),
+        p="0.5 0.25",
+        prerender=True,
+    )
+
+    # Steps 1 (note rest) and 2 (sound rest) are skipped
+    calls = patch_sardine_imports["original_D"].call_args_list
+    assert [c[1]["n"] for c in calls] == [[60.0], [64.0]]
+    assert [c[1]["i"] for c in calls] == [0, 3]
+    assert calls[0][1]["amp"] == 0.5
+    assert len(set(parse_counts)) == 1 and parse_counts[0] == parse.call_count
+
+    # Other senders get their arguments untouched
+    assert custom.call_count == 4
+    custom.assert_called_with(sequence="0 1", i=3)
+
+    sleeps = [c[0][0] for c in patch_sardine_imports["sleep"].call_args_list]
+    assert sleeps == [0.5, 0.25, 0.5, 0.25]
+    assert duration == 1.5
+
+
+def test_render_cycle_plan(patch_sardine_imports):
+    """Test the durations and events of a rendered plan."""
+    from my_sardine_tools.playback import render_cycle
+
+    sender = Mock(return_value=0.75)
+    plan = render_cycle((sender, {"pan": "0 1"}), p="1 0.5 0.25")
+
+    assert [step.duration for step in plan] == [1.0, 0.5, 0.25]
+    assert plan[2].events == [(sender, {"pan": "0 1", "i": 2})]
+
+    # Without p the duration is left to the sender's return value
+    plan = render_cycle((sender, {"pan": "0 1"}))
+    assert [step.duration for step in plan] == [None, None]
+
+
+def test_loop_bundles_each_step(patch_sardine_imports, dirt_handler):
+    """Test that with lookahead every step of a layered loop is one bundle."""
+    from unittest.mock import patch
+
+    from my_sardine_tools.dispatch import disable_lookahead, enable_lookahead
+    from my_sardine_tools.playback import loop
+    from my_sardine_tools.senders import D
+
+    clock = patch_sardine_imports["bowl"].clock
+    clock.time = clock.shifted_time = clock.phase = clock.bar = clock.beat = 0
+    clock.beats_per_bar = 4
+    dispatcher = enable_lookahead(handler=dirt_handler)
+    try:
+        with patch("my_sardine_tools.dispatch.osc_send") as osc_send:
+            loop(
+                (D, {"sound": "supersaw", "n": "60 62 64"}),
+                (D, {"sound": "supersquare", "n": "48 50 52"}),
+                n_steps=3,
+                p=0.25,
+            )
+    finally:
+        disable_lookahead()
+
+    assert osc_send.call_count == 3
+    assert [len(c.args[0].elements) for c in osc_send.call_args_list] == [2, 2, 2]
+    assert dispatcher.sent == 6
 
 
 def test_start_single_function(patch_sardine_imports):
@@ -35,7 +35,7 @@ def test_calculate_sample_lengths(mock_sf, temp_audio_files):
     from my_sardine_tools.samples import calculate_sample_lengths
 
     # Mock soundfile info
-    mock_info = Mock()
+    mock_info = Mock(frames=88200, channels=2, samplerate=44100)
     mock_info.duration = 2.0
     mock_sf.info.return_value = mock_info
 
@@ -49,6 +49,215 @@ def test_calculate_sample_lengths(mock_sf, temp_audio_files):
     assert all(lengths[key] == 2.0 for key in expected_keys)
 
 
+@patch("my_sardine_tools.samples.sf")
+def test_calculate_sample_lengths_uses_index(mock_sf, temp_audio_files, tmp_path):
+    """Test that unchanged files are read from the persistent index."""
+    from my_sardine_tools.samples import calculate_sample_lengths
+
+    index_file = tmp_path / "index.json"
+    mock_info = Mock(frames=88200, channels=2, samplerate=44100)
+    mock_info.duration = 2.0
+    mock_sf.info.return_value = mock_info
+
+    calculate_sample_lengths(temp_audio_files, index=index_file)
+    assert mock_sf.info.call_count == 6
+    assert index_file.exists()
+
+    # Warm start: nothing is probed again
+    mock_sf.info.reset_mock()
+    lengths = calculate_sample_lengths(temp_audio_files, index=index_file)
+    mock_sf.info.assert_not_called()
+    assert lengths["sfx:2"] == 2.0
+
+    # A changed file is the only one probed again
+    (temp_audio_files / "bd" / "bd01.wav").write_bytes(b"changed")
+    mock_info.duration = 3.0
+    lengths = calculate_sample_lengths(temp_audio_files, index=index_file)
+    assert mock_sf.info.call_count == 1
+    assert lengths["bd:1"] == 3.0
+    assert lengths["bd:0"] == 2.0
+
+
+@patch("my_sardine_tools.samples.sf")
+def test_calculate_sample_lengths_without_index(mock_sf, temp_audio_files, isolated_cache):
+    """Test that index=False always probes files and writes nothing."""
+    from my_sardine_tools.samples import calculate_sample_lengths
+
+    mock_info = Mock(frames=88200, channels=2, samplerate=44100)
+    mock_info.duration = 2.0
+    mock_sf.info.return_value = mock_info
+
+    calculate_sample_lengths(temp_audio_files, index=False)
+    calculate_sample_lengths(temp_audio_files, index=False)
+
+    assert mock_sf.info.call_count == 12
+    assert not isolated_cache.exists()
+
+
+@patch("my_sardine_tools.samples.sf")
+def test_calculate_sample_lengths_parallel(mock_sf, temp_audio_files):
+    """Test that a threaded scan keeps SuperDirt numbering."""
+    from my_sardine_tools.samples import calculate_sample_lengths
+
+    # Duration depends on the file so misordered results would show up
+    mock_sf.info.side_effect = lambda path: Mock(
+        duration=float(path[-6:-4]), frames=88200, channels=2, samplerate=44100
+    )
+
+    serial = calculate_sample_lengths(temp_audio_files, index=False)
+    parallel = calculate_sample_lengths(temp_audio_files, index=False, workers=4)
+
+    assert parallel == serial
+    assert list(parallel) == list(serial)
+    assert parallel["bd:2"] == 2.0
+
+
+@patch("my_sardine_tools.samples.sf")
+def test_lazy_lengths_scan_one_family(mock_sf, temp_audio_files):
+    """Test that lazy mode scans a family on its first lookup only."""
+    from my_sardine_tools.samples import calculate_sample_lengths, get_length
+
+    mock_sf.info.return_value = Mock(duration=2.0, frames=88200, channels=2, samplerate=44100)
+
+    assert calculate_sample_lengths(temp_audio_files, index=False, lazy=True) == {}
+    mock_sf.info.assert_not_called()
+
+    assert get_length("sfx:1") == 2.0
+    assert mock_sf.info.call_count == 3  # only the sfx files
+
+    get_length("sfx:2")
+    assert mock_sf.info.call_count == 3  # already cached
+
+    with pytest.raises(KeyError, match="Sample 'sfx:7' not found"):
+        get_length("sfx:7")
+    with pytest.raises(KeyError, match="Sample 'nope:0' not found"):
+        get_length("nope:0")
+    assert mock_sf.info.call_count == 3
+
+
+@patch("my_sardine_tools.samples.detect_onsets")
+@patch("my_sardine_tools.samples.sf")
+def test_calculate_sample_lengths_with_onsets(mock_sf, mock_detect, temp_audio_files, tmp_path):
+    """Test that onsets are detected once and then read from the index."""
+    from my_sardine_tools.samples import calculate_sample_lengths, get_onsets
+
+    index_file = tmp_path / "index.json"
+    mock_sf.info.return_value = Mock(duration=2.0, frames=88200, channels=2, samplerate=44100)
+    mock_detect.return_value = [0.0, 0.5]
+
+    # A plain scan does not analyze the audio
+    calculate_sample_lengths(temp_audio_files, index=index_file)
+    mock_detect.assert_not_called()
+    with pytest.raises(ValueError, match="No onsets for 'bd:0'"):
+        get_onsets("bd:0")
+
+    # Indexed files only need their onsets
+    mock_sf.info.reset_mock()
+    calculate_sample_lengths(temp_audio_files, index=index_file, onsets=True)
+    mock_sf.info.assert_not_called()
+    assert mock_detect.call_count == 6
+    assert get_onsets("bd:0") == [0.0, 0.5]
+
+    # Warm start: nothing is analyzed again
+    mock_detect.reset_mock()
+    calculate_sample_lengths(temp_audio_files, index=index_file, onsets=True)
+    mock_detect.assert_not_called()
+    assert get_onsets("sfx:2") == [0.0, 0.5]
+
+
+def test_cut_at_onsets(patch_sardine_imports):
+    """Test that slices="onsets" cuts between the detected hits."""
+    from my_sardine_tools.samples import cut, set_store
+    from my_sardine_tools.store import SampleStore
+
+    store = SampleStore()
+    store.add("break:0", 2.0, onsets=[0.0, 0.5, 1.5])
+    set_store(store)
+    patch_sardine_imports["bowl"].clock.beat_duration = 0.5
+    patch_sardine_imports["P"].side_effect = [2, 0, 4]  # 4 wraps around to slice 1
+
+    duration = cut("break:0", slices="onsets", sequence="2 0 4", n_steps=3)
+
+    calls = patch_sardine_imports["D"].call_args_list
+    assert [(c[1]["begin"], c[1]["end"]) for c in calls] == [
+        (0.75, 1.0),
+        (0.0, 0.25),
+        (0.25, 0.75),
+    ]
+    # Each step lasts as long as its slice: 0.5s, 0.5s and 1s at 0.5s per beat
+    sleeps = [c[0][0] for c in patch_sardine_imports["sleep"].call_args_list]
+    assert sleeps == pytest.approx([1.0, 1.0, 2.0])
+    assert duration == pytest.approx(4.0)
+
+
+def test_cut_at_onsets_within_range(patch_sardine_imports):
+    """Test that base_start/base_end keep only the hits inside the range."""
+    from my_sardine_tools.samples import cut, set_store
+    from my_sardine_tools.store import SampleStore
+
+    store = SampleStore()
+    store.add("break:0", 2.0, onsets=[0.0, 0.5, 1.0, 1.5])
+    set_store(store)
+    patch_sardine_imports["P"].side_effect = [0, 1]
+
+    cut("break:0", slices="onsets", base_start=0.5, sequence="0 1", n_steps=2)
+
+    calls = patch_sardine_imports["D"].call_args_list
+    assert [(c[1]["begin"], c[1]["end"]) for c in calls] == [(0.5, 0.75), (0.75, 1.0)]
+
+    with pytest.raises(ValueError, match="Unknown slices mode"):
+        cut("break:0", slices="beats")
+
+
+@patch("my_sardine_tools.samples.measure_levels")
+@patch("my_sardine_tools.samples.sf")
+def test_calculate_sample_lengths_with_levels(mock_sf, mock_levels, temp_audio_files, tmp_path):
+    """Test that levels are measured once, cached and turned into gains."""
+    from my_sardine_tools.samples import calculate_sample_lengths, get_gain, get_store
+
+    index_file = tmp_path / "index.json"
+    mock_sf.info.return_value = Mock(duration=2.0, frames=88200, channels=2, samplerate=44100)
+    mock_levels.return_value = {"peak": 0.9, "rms": 0.2, "loudness": -8.0}
+
+    calculate_sample_lengths(temp_audio_files, index=index_file, levels=True)
+    assert mock_levels.call_count == 6
+    assert get_store().get("bd:1", "rms") == pytest.approx(0.2)
+    assert get_gain("bd:1") == pytest.approx(10 ** (-12 / 20))
+    assert get_gain("bd:1", target=-8.0) == pytest.approx(1.0)
+
+    mock_levels.reset_mock()
+    calculate_sample_lengths(temp_audio_files, index=index_file, levels=True)
+    mock_levels.assert_not_called()
+
+    # Without levels in the index, normalizing is an error rather than a silent no-op
+    calculate_sample_lengths(temp_audio_files, index=False)
+    with pytest.raises(ValueError, match="No levels for 'bd:1'"):
+        get_gain("bd:1")
+
+
+def test_cut_and_granulate_normalize(patch_sardine_imports):
+    """Test that normalize= scales the amp sent for every slice and grain."""
+    from my_sardine_tools.samples import cut, granulate, set_store
+    from my_sardine_tools.store import SampleStore
+
+    store = SampleStore()
+    store.add("sfx:0", 4.0, peak=0.5, rms=0.1, loudness=-26.0)
+    set_store(store)
+    patch_sardine_imports["P"].side_effect = [0, 1]
+
+    cut("sfx:0", n_slices=2, sequence="0 1", n_steps=2, amp="0.1 0.2", normalize=-20)
+    amps = [c[1]["amp"] for c in patch_sardine_imports["D"].call_args_list]
+    assert amps == ["[0.1 0.2] * 1.99526", "[0.1 0.2] * 1.99526"]
+
+    patch_sardine_imports["P"].side_effect = [0]
+    cut("sfx:0", n_slices=2, sequence="0", n_steps=1, amp=0.1, normalize=0)
+    assert patch_sardine_imports["D"].call_args[1]["amp"] == pytest.approx(0.1 * 2)
+
+    sender = Mock()
+    granulate("sfx:0", density=2, base_amp=0.5, amp_jitter=0, sender=sender, normalize=True)
+    assert sender.call_args[1]["amp"] == pytest.approx(0.5 * 10 ** (6 / 20))
+
+
 def test_cut_logic_with_explicit_n_steps(patch_sardine_imports):
     """Test the cut function logic with explicit n_steps."""
     from my_sardine_tools.samples import cut, set_lengths
@@ -72,39 +281,36 @@ def test_cut_logic_with_explicit_n_steps(patch_sardine_imports):
 
 def test_cut_logic_with_pattern_parsing(patch_sardine_imports):
     """Test the cut function logic with pattern parsing."""
+    from my_sardine_tools.patterns import pattern_cache_info
     from my_sardine_tools.samples import cut, set_lengths
 
     # Set up sample length
     set_lengths({"test:0": 4.0})
     patch_sardine_imports["bowl"].clock.beat_duration = 0.5
 
-    # Create a P mock that handles different calls appropriately
-    def mock_p_function(pattern, i=0, j=None):
-        if pattern == "0 1 2 3":  # sequence pattern
-            return [0, 1, 2, 3][i if j is None else j]
-        elif pattern == "0.25 0.25 0.25 0.25":  # timing pattern
-            return 0.25
-        else:
-            return 0
-
-    patch_sardine_imports["P"].side_effect = mock_p_function
-
-    # Mock the parser to return a list with known length
-    mock_parser = Mock()
-    mock_parser.parse.return_value = [0, 1, 2, 3]  # Return a list with 4 elements
-    patch_sardine_imports["bowl"].parser = mock_parser
-
     # Don't provide n_steps so it uses pattern parsing
     duration = cut("test:0", n_slices=4, sequence="0 1 2 3", p="0.25 0.25 0.25 0.25")
 
     # Should call D for each slice
     assert patch_sardine_imports["D"].call_count == 4
+    begins = [c[1]["begin"] for c in patch_sardine_imports["D"].call_args_list]
+    assert begins == [0.0, 0.25, 0.5, 0.75]
 
     # Should sleep between slices
     assert patch_sardine_imports["sleep"].call_count == 4
 
     assert duration == 1.0
 
+    # n_steps inference and per-step lookups share one parse per pattern
+    assert patch_sardine_imports["bowl"].parser.parse.call_count == 2
+    info = pattern_cache_info()
+    assert info["misses"] == 2
+    assert info["hits"] == 8
+
+    # Calling again (a swimmer re-entering) parses nothing
+    cut("test:0", n_slices=4, sequence="0 1 2 3", p="0.25 0.25 0.25 0.25")
+    assert patch_sardine_imports["bowl"].parser.parse.call_count == 2
+
 
 def test_cut_with_stretch(patch_sardine_imports):
     """Test the cut function with stretch parameter."""
@@ -132,62 +338,101 @@ def test_granulate_basic(patch_sardine_imports):
     """Test basic granulate function."""
     from my_sardine_tools.samples import granulate
 
-    # Mock random to be predictable
-    with patch("my_sardine_tools.samples.random") as mock_random:
-        # Use return_value instead of side_effect for consistent behavior
-        mock_random.random.return_value = 0.5
-        mock_random.uniform.return_value = 0.0
-
-        duration = granulate(
-            "test:0", density=2, duration=1.0, grain_size=0.1, sender=patch_sardine_imports["D"]
-        )
+    duration = granulate(
+        "test:0", density=2, duration=1.0, grain_size=0.1, sender=patch_sardine_imports["D"]
+    )
 
-        # Should call D twice (density=2, duration=1.0)
-        assert patch_sardine_imports["D"].call_count == 2
+    # Should call D twice (density=2, duration=1.0)
+    assert patch_sardine_imports["D"].call_count == 2
 
-        # Should sleep twice
-        assert patch_sardine_imports["sleep"].call_count == 2
+    # Should sleep twice
+    assert patch_sardine_imports["sleep"].call_count == 2
 
-        assert duration == 1.0
+    assert duration == 1.0
 
 
 def test_granulate_with_parameters(patch_sardine_imports):
     """Test granulate with various parameters."""
     from my_sardine_tools.samples import granulate
 
-    with patch("my_sardine_tools.samples.random") as mock_random:
-        mock_random.random.return_value = 0.5
-        mock_random.uniform.return_value = 0.1
-
-        duration = granulate(
-            "test:0",
-            density=4,
-            duration=0.5,
-            grain_size=0.05,
-            position_jitter=0.1,
-            speed_range=(-1.0, 1.0),
-            amp_jitter=0.05,
-            pan_range=(0.2, 0.8),
-            base_speed=2.0,
-            base_amp=0.6,
-            base_pan=0.3,
-            sender=patch_sardine_imports["D"],
-        )
-
-        # Should call D four times (density=4, duration=0.5)
-        assert patch_sardine_imports["D"].call_count == 2  # 4 * 0.5 = 2 grains
-
-        # Check that parameters are being passed correctly
-        calls = patch_sardine_imports["D"].call_args_list
-        assert len(calls) == 2
-
-        # Check that basic parameters are in the calls
-        for call in calls:
-            args, kwargs = call
-            assert "begin" in kwargs
-            assert "end" in kwargs
-            assert "speed" in kwargs
-            assert "amp" in kwargs
-            assert "pan" in kwargs
-
-        assert duration == 0.5
+    duration = granulate(
+        "test:0",
+        density=4,
+        duration=0.5,
+        grain_size=0.05,
+        position_jitter=0.1,
+        speed_range=(-1.0, 1.0),
+        amp_jitter=0.05,
+        pan_range=(0.2, 0.8),
+        base_speed=2.0,
+        base_amp=0.6,
+        base_pan=0.3,
+        sender=patch_sardine_imports["D"],
+        rng=1,
+        cutoff=800,
+    )
+
+    # Should call D twice: 4 * 0.5 = 2 grains
+    calls = patch_sardine_imports["D"].call_args_list
+    assert len(calls) == 2
+
+    for call in calls:
+        kwargs = call[1]
+        assert 0 <= kwargs["begin"] <= 0.95
+        assert kwargs["end"] == pytest.approx(kwargs["begin"] + 0.05)
+        assert 1.0 <= kwargs["speed"] <= 3.0
+        assert 0.55 <= kwargs["amp"] <= 0.65
+        assert 0.2 <= kwargs["pan"] <= 0.8
+        assert kwargs["cutoff"] == 800
+
+    assert duration == 0.5
+
+
+def test_grain_cloud_is_seeded():
+    """Test that a seed reproduces the same cloud and ranges are respected."""
+    import numpy as np
+    from my_sardine_tools.samples import grain_cloud
+
+    cloud = grain_cloud(1000, grain_size=0.2, pan_range=(0.4, 0.6), rng=42)
+    again = grain_cloud(1000, grain_size=0.2, pan_range=(0.4, 0.6), rng=np.random.default_rng(42))
+
+    for field, values in cloud.items():
+        np.testing.assert_array_equal(values, again[field])
+    assert cloud["begin"].min() >= 0 and cloud["end"].max() <= 1.0
+    assert cloud["pan"].min() >= 0.4 and cloud["pan"].max() <= 0.6
+    assert not np.array_equal(cloud["begin"], grain_cloud(1000, grain_size=0.2, rng=43)["begin"])
+
+
+def test_granulate_with_lookahead(patch_sardine_imports, dirt_handler):
+    """Test that with lookahead the whole cloud is sent at once, stamped grain by grain."""
+    from my_sardine_tools.dispatch import disable_lookahead, enable_lookahead
+    from my_sardine_tools.samples import granulate
+    from osc4py3 import oscbuildparse
+
+    clock = patch_sardine_imports["bowl"].clock
+    clock.time = clock.shifted_time = clock.phase = clock.bar = clock.beat = 0
+    clock.beats_per_bar = 4
+    dispatcher = enable_lookahead(0.1, handler=dirt_handler)
+    try:
+        with (
+            patch("my_sardine_tools.dispatch.osc_send") as osc_send,
+            patch("my_sardine_tools.dispatch.time.time", return_value=1000.0),
+        ):
+            granulate("sfx:0", density=100, duration=1.0, rng=3, room=0.2)
+    finally:
+        disable_lookahead()
+
+    patch_sardine_imports["D"].assert_not_called()
+    patch_sardine_imports["sleep"].assert_called_once_with(1.0)
+    assert dispatcher.sent == 100
+    assert osc_send.call_count == 4  # 32 grains per packet
+
+    grains = [bundle for call in osc_send.call_args_list for bundle in call.args[0].elements]
+    times = [oscbuildparse.timetag2unixtime(bundle.timetag) for bundle in grains]
+    # 100 grains over one beat of 0.5 s
+    assert times[0] == pytest.approx(1000.1, abs=1e-6)
+    assert times[1] - times[0] == pytest.approx(0.005, abs=1e-6)
+
+    first = dict(zip(grains[0].elements[0].arguments[::2], grains[0].elements[0].arguments[1::2]))
+    assert first["sound"] == "sfx:0" and first["room"] == 0.2
+    assert first["end"] == pytest.approx(first["begin"] + 0.1)
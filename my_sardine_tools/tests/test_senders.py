@@ -2,6 +2,8 @@
 Tests for enhanced senders.
 """
 
+import pytest
+
 
 def test_parse_ziff_duration():
     """Test parsing ziffers note durations."""
@@ -17,9 +19,10 @@ def test_parse_ziff_duration():
     # Dotted notes
     assert parse_ziff_duration("h.") == 3.0  # dotted half
     assert parse_ziff_duration("q.") == 1.5  # dotted quarter
+    assert parse_ziff_duration("x") == pytest.approx(1 / 6)  # sixteenth triplet
 
     # Invalid notes
-    assert parse_ziff_duration("x") is None
+    assert parse_ziff_duration("v") is None
     assert parse_ziff_duration("") is None
 
 
@@ -27,15 +30,41 @@ def test_enhanced_D_with_rests(patch_sardine_imports):
     """Test enhanced D function with note patterns containing rests."""
     from my_sardine_tools.senders import D
 
+    parse = patch_sardine_imports["bowl"].parser.parse
+    parse.side_effect = lambda pattern: ["piano", None, "piano", "piano"]
+
     D("piano", n="C4 . E4 G4")
 
-    # Should call original D with transformed pattern
+    # Should call original D with the parsed rest-aware sound pattern
     patch_sardine_imports["original_D"].assert_called_once()
     args, kwargs = patch_sardine_imports["original_D"].call_args
+    assert args[0] == ["piano", None, "piano", "piano"]
+    assert kwargs == {"n": "C4 . E4 G4"}
+
+    # Silences come from masking the sound with the notes
+    (pattern,) = parse.call_args.args
+    assert "piano" in pattern
+    assert "^|" in pattern
+    assert "[C4 . E4 G4]" in pattern
+
+
+def test_enhanced_D_rests_parsed_once(patch_sardine_imports):
+    """Test that the rewritten pattern is built and parsed once, not per call."""
+    from my_sardine_tools.senders import D
+
+    parse = patch_sardine_imports["bowl"].parser.parse
+    parse.side_effect = lambda pattern: ["superpiano", None]
+
+    for i in range(8):
+        D("superpiano", n="E3 .", i=i)
+        D(sound="superpiano", n="E3 .", i=i)
 
-    # First argument should be transformed to handle silences
-    assert "piano" in args[0]
-    assert "^|" in args[0]  # Should contain silence pattern
+    assert parse.call_count == 1
+    sounds = [
+        c.args[0] if c.args else c.kwargs["sound"]
+        for c in patch_sardine_imports["original_D"].call_args_list
+    ]
+    assert all(sound is sounds[0] for sound in sounds)
 
 
 def test_enhanced_D_without_rests(patch_sardine_imports):
@@ -48,11 +77,43 @@ def test_enhanced_D_without_rests(patch_sardine_imports):
     patch_sardine_imports["original_D"].assert_called_once_with("piano", n="C4 E4 G4")
 
 
+def test_enhanced_D_normalize(patch_sardine_imports):
+    """Test that normalize= scales amp by the sample's precomputed gain."""
+    from my_sardine_tools.samples import set_store
+    from my_sardine_tools.senders import D
+    from my_sardine_tools.store import SampleStore
+
+    store = SampleStore()
+    store.add("sfx:0", 1.0, peak=0.5, rms=0.1, loudness=-14.0)  # 6 dB above -20
+    store.add("sfx:1", 1.0, peak=0.5, rms=0.1, loudness=-32.0)
+    set_store(store)
+
+    D("sfx", amp=0.3, normalize=True, pan=0.2)
+    kwargs = patch_sardine_imports["original_D"].call_args[1]
+    assert kwargs["amp"] == pytest.approx(0.3 * 10 ** (-6 / 20))
+    assert "normalize" not in kwargs
+    assert kwargs["pan"] == 0.2
+
+    # Boost is limited by the peak; a missing amp starts from SuperDirt's 0.4
+    D(sound="sfx:1", normalize=True)
+    assert patch_sardine_imports["original_D"].call_args[1]["amp"] == pytest.approx(0.4 * 2)
+
+    # 0 dB is a target like any other, not "off"
+    D("sfx:0", amp=0.3, normalize=0)
+    assert patch_sardine_imports["original_D"].call_args[1]["amp"] == pytest.approx(0.3 * 2)
+    D("sfx:0", amp=0.3, normalize=False)
+    assert patch_sardine_imports["original_D"].call_args[1]["amp"] == 0.3
+
+    # Patterns of sounds are sent unchanged
+    D("[sfx:0 sfx:1]", amp=0.3, normalize=True)
+    assert patch_sardine_imports["original_D"].call_args[1]["amp"] == 0.3
+
+
 def test_ZD_mono_basic(patch_sardine_imports):
     """Test ZD_mono with basic pattern."""
     from my_sardine_tools.senders import ZD_mono
 
-    ZD_mono("piano", "q e h", coef=0.5)
+    ZD_mono("piano", "q 0 e 1 h 2", coef=0.5)
 
     patch_sardine_imports["ZD"].assert_called_once()
     args, kwargs = patch_sardine_imports["ZD"].call_args
@@ -60,14 +121,14 @@ def test_ZD_mono_basic(patch_sardine_imports):
     # Should add sustain parameter
     assert "sustain" in kwargs
     assert kwargs["sustain"] == "0.5 0.25 1.0"  # q*0.5, e*0.5, h*0.5
-    assert kwargs["ziff"] == "q e h"
+    assert kwargs["ziff"] == "q 0 e 1 h 2"
 
 
 def test_zd_mono_with_custom_coef(patch_sardine_imports):
     """Test zd_mono with custom coefficient."""
     from my_sardine_tools.senders import zd_mono
 
-    zd_mono("piano", "h q e", coef=0.75)
+    zd_mono("piano", "h0 q1 e2", coef=0.75)
 
     patch_sardine_imports["zd"].assert_called_once()
     args, kwargs = patch_sardine_imports["zd"].call_args
@@ -3,6 +3,7 @@ Tests for the State management system.
 State is independent of sardine so we can test it directly.
 """
 
+import pytest
 from my_sardine_tools.state import State
 
 
@@ -138,3 +139,341 @@ class TestStateAdvanced:
         assert state.instruments.synth.oscillator.wave == "saw"
         assert state.instruments.synth.filter.cutoff == 5000
         assert state.fx.reverb.room == 0.5
+
+
+class TestStateVersioning:
+    def test_version_counts_changes(self):
+        """Test that every kind of mutation bumps the node's version."""
+        state = State(amp=0.5)
+        version = state._version
+
+        state.amp = 0.6
+        state["pan"] = 0.5
+        state.update(room=0.2)
+        state |= {"size": 0.9}
+        state.pop("size")
+        state.delete("room")
+        state.setdefault("orbit", 1)
+        state.setdefault("orbit", 2)  # already there, no change
+        del state["pan"]
+
+        assert state._version == version + 8
+        assert state == {"amp": 0.6, "orbit": 1}
+
+    def test_params_view_is_cached(self):
+        """Test that params() reuses the same filtered view until a key changes."""
+        state = State()
+        state.lead.init(n_steps=8, p=0.5, sound="supersaw", amp=0.1)
+
+        view = state.lead._skip_view(frozenset({"n_steps", "p", "i"}), None)
+        assert state.lead.params() == view
+        assert state.lead._skip_view(frozenset({"n_steps", "p", "i"}), None) is view
+        assert state.lead._skip_view(frozenset({"n_steps", "p", "i", "amp"}), None) is not view
+
+        state.lead.amp = 0.2
+        updated = state.lead._skip_view(frozenset({"n_steps", "p", "i"}), None)
+        assert updated is not view
+        assert state.lead.params() == {"sound": "supersaw", "amp": 0.2}
+        assert view == {"sound": "supersaw", "amp": 0.1}
+
+        # Nested nodes have their own versions
+        state.lead.fx.room = 0.3
+        updated = state.lead._skip_view(frozenset({"n_steps", "p", "i"}), None)
+        state.lead.fx.room = 0.4
+        assert state.lead._skip_view(frozenset({"n_steps", "p", "i"}), None) is updated
+
+    def test_params_returns_a_new_dict(self):
+        """Test that the result can be edited without touching the cache or the state."""
+        state = State(sound="bd", amp=0.5, p=1)
+        state.fx.room = 0.2
+        kwargs = state.params()
+        kwargs["amp"] = 1.0
+        kwargs.update(n=3)
+
+        assert state.params() == {"sound": "bd", "amp": 0.5}
+        assert state.skip("p") == {"sound": "bd", "amp": 0.5}
+        assert state.amp == 0.5
+        assert state.params() | state.fx == {"sound": "bd", "amp": 0.5, "room": 0.2}
+
+    def test_copy_does_not_share_views(self):
+        """Test that a copy's changes do not leak into the original's cache."""
+        import copy
+
+        state = State(sound="bd", amp=0.5)
+        view = state._skip_view(frozenset(), None)
+        clone = copy.copy(state)
+        clone.amp = 0.9
+
+        assert state._skip_view(frozenset(), None) is view
+        assert clone.params() == {"sound": "bd", "amp": 0.9}
+
+    def test_init_fast_path(self):
+        """Test that repeated init() calls return the cached result until a change."""
+        state = State()
+        state.lead.init(n_steps=32, p=0.5, amp=0.1)
+        version = state.lead._version
+        view = state.lead._views["init", "n_steps", "p", "amp"]
+
+        first = state.lead.init(n_steps=32, p=0.5, amp=0.1)
+        assert first == {"n_steps": 32, "p": 0.5, "amp": 0.1}
+        assert state.lead.init(n_steps=8, p=1, amp=0.9) == first  # same keys, values kept
+        assert state.lead._views["init", "n_steps", "p", "amp"] is view
+        assert state.lead._version == version
+
+        # The result is a new dict each time
+        first["amp"] = 0.7
+        assert state.lead.init(n_steps=32, p=0.5, amp=0.1)["amp"] == 0.1
+
+        state.lead.amp = 0.2
+        assert state.lead.init(n_steps=32, p=0.5, amp=0.1) == {"n_steps": 32, "p": 0.5, "amp": 0.2}
+
+        # A deleted key is initialized again
+        state.lead.delete("p")
+        assert state.lead.init(n_steps=32, p=0.5, amp=0.1)["p"] == 0.5
+
+    def test_declare_applies_lazily(self):
+        """Test that declared defaults appear when read and never overwrite values."""
+        state = State()
+        state.lead.declare(n_steps=32, p=0.5, sound="supersaw", fx={"room": 0.3})
+        assert "sound" not in state.lead
+
+        state.lead.p = 0.25
+        assert state.lead.n_steps == 32
+        assert state.lead.params() == {"sound": "supersaw"}
+        assert state.lead.p == 0.25
+        assert isinstance(state.lead.fx, State)
+        assert state.lead["fx"].room == 0.3
+
+        # Deleting a key brings its default back
+        state.lead.delete("sound")
+        assert state.lead.to_dict() == {"n_steps": 32, "p": 0.25, "sound": "supersaw"}
+        assert state.lead.init(sound="superpiano", amp=0.1) == {"sound": "supersaw", "amp": 0.1}
+
+
+class TestStatePaths:
+    def test_path_resolves_and_is_cached(self):
+        """Test that a path handle returns the node and is compiled once."""
+        state = State()
+        state.drums.hh.fx.room = 0.2
+
+        handle = state.path("drums.hh.fx")
+        assert handle() is state.drums.hh.fx
+        assert state.path("drums.hh.fx") is handle
+        assert state.drums.path("hh.fx")() is handle()
+
+    def test_path_survives_value_changes(self):
+        """Test that setting values keeps the cached node without re-walking."""
+        state = State()
+        handle = state.path("drums.hh.fx")
+        node = handle()
+        epoch = handle._epoch
+
+        state.drums.hh.amp = 0.3
+        state.drums.hh.fx.room = 0.1
+        assert handle() is node
+        assert handle._epoch == epoch
+
+        state.drums.kick.amp = 0.8  # a new sibling node: the handle re-resolves once
+        assert handle() is node
+
+    def test_path_follows_replaced_nodes(self):
+        """Test that replacing or deleting a node on the path is picked up."""
+        state = State()
+        old = state.path("drums.hh.fx")()
+
+        state.drums.hh = {"fx": {"room": 0.5}}
+        assert state.path("drums.hh.fx")() is not old
+        assert state.path("drums.hh.fx")().room == 0.5
+
+        state.drums.delete("hh")
+        assert state.path("drums.hh.fx")() == {}
+
+    def test_read_only_path(self):
+        """Test that create=False raises on typos instead of creating nodes."""
+        state = State()
+        state.drums.hh.fx.room = 0.2
+        state.drums.declare(snare={"amp": 0.4})
+
+        assert state.path("drums.hh.fx", create=False)().room == 0.2
+        assert state.path("drums.snare", create=False)().amp == 0.4  # declared
+
+        with pytest.raises(KeyError, match="drums.hx"):
+            state.path("drums.hx.fx", create=False)()
+        assert "hx" not in state.drums
+
+        with pytest.raises(TypeError, match="not a State node"):
+            state.path("drums.hh.fx.room")()
+
+
+class TestStateSnapshots:
+    def test_snapshot_copies_on_write(self):
+        """Test that a snapshot keeps old values and only changed nodes copy their keys."""
+        state = State()
+        state.drums.hh.amp = 0.2
+        state.drums.kick.amp = 0.8
+        verse = state.snapshot()
+        assert "_history" not in state.drums.hh.__dict__
+
+        state.drums.hh.amp = 0.5
+        state.drums.hh.amp = 0.6
+        assert len(state.drums.hh.__dict__["_history"]) == 1
+        assert "_history" not in state.drums.kick.__dict__
+        assert verse.to_dict() == {"drums": {"hh": {"amp": 0.2}, "kick": {"amp": 0.8}}}
+
+    def test_restore_swaps_nodes_back(self):
+        """Test that restore brings back values, keys and replaced nodes."""
+        state = State()
+        state.drums.hh.amp = 0.2
+        hh = state.drums.hh
+        handle = state.path("drums.hh")
+        verse = state.snapshot()
+
+        state.drums.hh = {"amp": 0.9}
+        state.drums.snare.amp = 0.5
+        state.lead.sound = "supersaw"
+        assert handle() is not hh
+
+        assert state.restore(verse) is state
+        assert state.to_dict() == {}
+        assert dict(state.drums) == {"hh": hh}
+        assert "lead" not in state
+        assert handle() is hh
+        assert state.drums.hh.params() == {"amp": 0.2}
+
+    def test_several_snapshots(self):
+        """Test that each snapshot sees the state at its own time."""
+        state = State()
+        state.bass.amp = 0.1
+        first = state.snapshot()
+        state.bass.amp = 0.2
+        second = state.snapshot()
+        state.bass.amp = 0.3
+
+        assert first.to_dict() == {"bass": {"amp": 0.1}}
+        assert second.to_dict() == {"bass": {"amp": 0.2}}
+
+        state.restore(first)
+        assert state.bass.amp == 0.1
+        state.restore(second)
+        assert state.bass.amp == 0.2
+        assert first.to_dict() == {"bass": {"amp": 0.1}}
+
+    def test_copies_dropped_with_snapshots(self):
+        """Test that copies no live snapshot needs are not kept."""
+        state = State()
+        older = state.snapshot()  # taken before the bass node existed
+        state.bass.amp = 0.1
+        snapshot = state.snapshot()
+        state.bass.amp = 0.2
+        del snapshot
+        state.snapshot()  # not kept
+        state.bass.amp = 0.3
+        assert state.bass.__dict__["_history"] == []
+        assert older.to_dict() == {}
+
+    def test_diff_lists_changed_leaves(self):
+        """Test that diff only reports leaves that changed."""
+        state = State()
+        state.drums.hh.amp = 0.2
+        state.drums.kick.amp = 0.8
+        state.lead.sound = "supersaw"
+        verse = state.snapshot()
+
+        state.drums.hh.amp = 0.3
+        state.drums.kick.amp = 0.8  # same value
+        state.lead = {"sound": "supersaw", "cutoff": 2000}
+        del state.drums.kick
+        chorus = state.snapshot()
+        state.drums.hh.amp = 0.4
+
+        assert verse.diff(chorus) == {
+            "drums.hh.amp": (0.2, 0.3),
+            "drums.kick.amp": (0.8, None),
+            "lead.cutoff": (None, 2000),
+        }
+        assert chorus.diff() == {"drums.hh.amp": (0.3, 0.4)}
+        assert state.snapshot().diff() == {}
+
+        with pytest.raises(ValueError, match="different State"):
+            verse.diff(state.drums.snapshot())
+        with pytest.raises(ValueError, match="another State"):
+            state.drums.restore(verse)
+
+
+class TestStateWatchers:
+    def test_watch_outside_event_loop(self):
+        """Test that without an event loop callbacks run on every write."""
+        state = State()
+        calls = []
+        state.drums.hh.watch("hpf", lambda key, value: calls.append((key, value)))
+
+        state.drums.hh.hpf = 3000
+        state.drums.hh.amp = 0.2  # not watched
+        del state.drums.hh.hpf
+        assert calls == [("hpf", 3000), ("hpf", None)]
+
+    def test_notifications_coalesced_per_tick(self):
+        """Test that many writes in one tick give one callback with the last value."""
+        import asyncio
+
+        state = State()
+        calls = []
+        state.fx.watch("hpf", lambda key, value: calls.append(value))
+        state.fx.watch("room", lambda key, value: calls.append(value))
+
+        async def session():
+            for value in range(50):  # an LFO writing the key in one tick
+                state.fx.hpf = value
+            state.fx.update(room=0.5)
+            assert calls == []
+            await asyncio.sleep(0)
+            assert calls == [49, 0.5]
+
+            state.fx.hpf = 100
+            await asyncio.sleep(0)
+
+        asyncio.run(session())
+        assert calls == [49, 0.5, 100]
+
+    def test_unwatched_nodes_stay_plain(self):
+        """Test that only watched nodes get the notifying class, until unwatched."""
+        state = State()
+        callback = state.bass.watch("lpf", print)
+        assert type(state) is State
+        assert type(state.bass) is not State and isinstance(state.bass, State)
+
+        state.bass.unwatch("lpf", callback)
+        assert type(state.bass) is State
+
+    def test_failing_watcher_does_not_stop_others(self, caplog):
+        """Test that an exception in a callback is reported and others still run."""
+        state = State()
+        calls = []
+        state.lead.watch("amp", lambda key, value: 1 / 0)
+        state.lead.watch("amp", lambda key, value: calls.append(value))
+
+        state.lead.amp = 0.1
+        assert calls == [0.1]
+        assert "Watcher of 'amp' failed" in caplog.text
+        assert "ZeroDivisionError" in caplog.text
+
+    def test_flush_lost_with_its_loop(self):
+        """Test that a flush that never ran (loop stopped first) does not block later ones."""
+        import asyncio
+
+        state = State()
+        calls = []
+        state.lead.watch("amp", lambda key, value: calls.append(value))
+
+        async def write_and_stop():
+            state.lead.amp = 0.1
+            asyncio.get_running_loop().stop()  # before the scheduled flush runs
+
+        loop = asyncio.new_event_loop()
+        loop.create_task(write_and_stop())
+        loop.run_forever()
+        loop.close()
+        assert calls == []
+
+        state.lead.amp = 0.2
+        assert calls == [0.2]
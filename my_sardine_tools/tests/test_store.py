@@ -0,0 +1,131 @@
+"""
+Tests for the columnar sample metadata store.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def store():
+    from my_sardine_tools.store import SampleStore
+
+    store = SampleStore()
+    store.extend(
+        [
+            ("sfx:0", 5.0, {"channels": 2, "samplerate": 44100, "frames": 220500}),
+            ("sfx:1", 1.0, {"channels": 1, "samplerate": 48000, "frames": 48000}),
+            ("sfx:2", 8.5, {"channels": 2, "samplerate": 44100}),
+            ("bd:0", 0.4, {}),
+        ]
+    )
+    return store
+
+
+def test_lookup(store):
+    """Test single-value and whole-row lookups."""
+    assert len(store) == 4
+    assert "sfx:1" in store
+    assert "sfx:9" not in store
+    assert store.get("sfx:0") == 5.0
+    assert store.get("sfx:1", "samplerate") == 48000
+
+    row = store.row("bd:0")
+    assert row["family"] == "bd"
+    assert row["frames"] == -1  # unknown
+    assert math.isnan(row["peak"])
+
+    with pytest.raises(KeyError):
+        store.get("missing:0")
+
+
+def test_add_updates_existing_row(store):
+    """Test that adding a known name overwrites it instead of duplicating it."""
+    store.add("sfx:1", 2.0, channels=2)
+
+    assert len(store) == 4
+    assert store.get("sfx:1") == 2.0
+    assert store.get("sfx:1", "channels") == 2
+
+
+def test_query(store):
+    """Test vectorized queries."""
+    assert store.query(family="sfx", min_duration=4) == ["sfx:0", "sfx:2"]
+    assert store.query(max_duration=1.0) == ["sfx:1", "bd:0"]
+    assert store.query(where=store.table["channels"] == 1) == ["sfx:1"]
+    assert store.query(family="hh") == []
+
+
+def test_replace_family(store):
+    """Test that replacing a family leaves the other families alone."""
+    store.replace_family("sfx", [("sfx:0", 3.0, {}), ("sfx:1", 4.0, {})])
+
+    assert store.lengths() == {"bd:0": 0.4, "sfx:0": 3.0, "sfx:1": 4.0}
+    assert store.families() == {"bd", "sfx"}
+
+
+def test_long_family_is_rejected(store):
+    """Test that a family name too long for the table is an error, not truncated."""
+    from my_sardine_tools.store import MAX_FAMILY_LENGTH
+
+    family = "x" * (MAX_FAMILY_LENGTH + 1)
+    with pytest.raises(ValueError, match="at most"):
+        store.extend([("sfx:3", 1.0, {}), (f"{family}:0", 1.0, {})])
+    assert len(store) == 4
+
+    store.add(f"{family[1:]}:0", 1.0)
+    assert store.row(f"{family[1:]}:0")["family"] == family[1:]
+
+
+def test_save_and_load_memory_mapped(store, tmp_path):
+    """Test the single-file round trip and copy-on-write after loading."""
+    from my_sardine_tools.store import SampleStore
+
+    path = tmp_path / "samples.npy"
+    store.save(path)
+    loaded = SampleStore.load(path)
+
+    assert isinstance(loaded.table, np.memmap) or isinstance(loaded.table.base, np.memmap)
+    assert loaded.lengths() == store.lengths()
+    assert loaded.get("sfx:1", "samplerate") == 48000
+
+    # Writes go to an in-memory copy, the file is untouched
+    loaded.add("sfx:0", 1.5)
+    loaded.add("hh:0", 0.1)
+    assert loaded.get("sfx:0") == 1.5
+    assert SampleStore.load(path).get("sfx:0") == 5.0
+
+
+def test_samples_module_uses_store(store):
+    """Test that get_length reads from the active store."""
+    from my_sardine_tools.samples import get_length, get_store, set_store
+
+    set_store(store)
+    assert get_store() is store
+    assert get_length("sfx:2") == 8.5
+
+
+def test_onsets_round_trip(store, tmp_path):
+    """Test ragged onsets through updates, family replacement and save/load."""
+    from my_sardine_tools.store import SampleStore
+
+    store.add("break:0", 2.0, onsets=[0.0, 0.5, 1.5])
+    store.add("break:1", 1.0, onsets=[])
+    store.add("break:0", 2.0, onsets=[0.0, 1.0])  # leaves unused values behind
+    store.replace_family("sfx", [("sfx:0", 3.0, {"onsets": [0.25]})])
+
+    assert store.get("bd:0", "onsets") is None
+    assert store.get("break:0", "onsets").tolist() == [0.0, 1.0]
+    assert store.get("break:1", "onsets").tolist() == []
+
+    path = tmp_path / "samples.npy"
+    store.save(path)
+    assert len(np.load(tmp_path / "samples.onsets.npy")) == 3  # compacted
+
+    loaded = SampleStore.load(path)
+    assert loaded.get("break:0", "onsets").tolist() == [0.0, 1.0]
+    assert loaded.get("sfx:0", "onsets").tolist() == [0.25]
+    assert loaded.get("break:1", "onsets").tolist() == []
+    assert loaded.get("bd:0", "onsets") is None
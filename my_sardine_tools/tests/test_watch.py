@@ -0,0 +1,146 @@
+"""
+Tests for the sample folder watcher.
+"""
+
+import os
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+
+@pytest.fixture
+def scanned_samples(temp_audio_files):
+    """Scan the temporary samples with a mocked soundfile."""
+    from my_sardine_tools.samples import calculate_sample_lengths
+
+    with patch("my_sardine_tools.samples.sf") as mock_sf:
+        mock_sf.info.return_value = Mock(duration=2.0, frames=88200, channels=2, samplerate=44100)
+        calculate_sample_lengths(temp_audio_files, index=False)
+        yield temp_audio_files
+
+
+def test_rescan_family_renumbers_in_place(scanned_samples):
+    """Test that a rescan only touches the affected family."""
+    from my_sardine_tools import samples
+
+    store = samples.get_store()
+    (scanned_samples / "bd" / "bd00.wav").unlink()
+    (scanned_samples / "bd" / "bd05.wav").touch()
+
+    with patch("my_sardine_tools.samples.sf") as mock_sf:
+        mock_sf.info.return_value = Mock(duration=3.0, frames=88200, channels=2, samplerate=44100)
+        family_lengths = samples.rescan_family("bd")
+
+    # Same store object, bd renumbered from 0, sfx untouched
+    assert samples.get_store() is store
+    assert family_lengths == {"bd:0": 3.0, "bd:1": 3.0, "bd:2": 3.0}
+    assert store.get("sfx:2") == 2.0
+
+    (scanned_samples / "bd" / "bd01.wav").unlink()
+    with patch("my_sardine_tools.samples.sf") as mock_sf:
+        mock_sf.info.return_value = Mock(duration=3.0, frames=88200, channels=2, samplerate=44100)
+        samples.rescan_family("bd")
+
+    assert "bd:2" not in store
+    assert "bd:1" in store
+
+
+def test_rescan_waits_for_the_scan_in_progress(scanned_samples):
+    """Test that a rescan from another thread waits while a scan holds the store."""
+    import threading
+
+    from my_sardine_tools import samples
+
+    (scanned_samples / "bd" / "bd03.wav").touch()
+    with patch("my_sardine_tools.samples.sf") as mock_sf:
+        mock_sf.info.return_value = Mock(duration=3.0, frames=88200, channels=2, samplerate=44100)
+        watcher = threading.Thread(target=samples.rescan_family, args=("bd",))
+        with samples._SCAN_LOCK:
+            watcher.start()
+            watcher.join(timeout=0.1)
+            assert watcher.is_alive()
+            assert "bd:3" not in samples.get_store()
+        watcher.join()
+
+    assert samples.get_store().get("bd:3") == 3.0
+
+
+def test_polling_backend_reports_changed_family(scanned_samples):
+    """Test that the polling backend only reports families whose folder changed."""
+    from my_sardine_tools.watch import _PollingBackend
+
+    backend = _PollingBackend([scanned_samples], interval=0)
+    assert backend.changes(0) == set()
+
+    sfx_dir = scanned_samples / "sfx"
+    (sfx_dir / "new.wav").touch()
+    # Make sure the directory mtime moves even on coarse filesystems
+    stat = sfx_dir.stat()
+    os.utime(sfx_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert backend.changes(0) == {"sfx"}
+    assert backend.changes(0) == set()
+
+
+def test_inotify_backend_reports_changed_family(scanned_samples):
+    """Test that inotify events are mapped to sample families."""
+    from my_sardine_tools.watch import _InotifyBackend
+
+    try:
+        backend = _InotifyBackend([scanned_samples])
+    except OSError:
+        pytest.skip("inotify not available")
+
+    try:
+        (scanned_samples / "sfx" / "new.wav").write_bytes(b"RIFF")
+        (scanned_samples / "sfx" / "notes.txt").write_bytes(b"ignored")
+        (scanned_samples / "pad").mkdir()
+
+        changed = set()
+        deadline = time.monotonic() + 2
+        while changed != {"sfx", "pad"} and time.monotonic() < deadline:
+            changed |= backend.changes(0.1)
+        assert changed == {"sfx", "pad"}
+
+        # The new family directory is watched too
+        (scanned_samples / "pad" / "pad00.wav").write_bytes(b"RIFF")
+        changed = set()
+        deadline = time.monotonic() + 2
+        while not changed and time.monotonic() < deadline:
+            changed |= backend.changes(0.1)
+        assert changed == {"pad"}
+    finally:
+        backend.close()
+
+
+def test_watcher_apply_respects_family_filter(temp_audio_files):
+    """Test that only the families chosen in calculate_sample_lengths are rescanned."""
+    from my_sardine_tools.samples import calculate_sample_lengths
+    from my_sardine_tools.watch import SampleWatcher
+
+    with patch("my_sardine_tools.samples.sf") as mock_sf:
+        mock_sf.info.return_value = Mock(duration=2.0, frames=88200, channels=2, samplerate=44100)
+        calculate_sample_lengths(temp_audio_files, sample_families=["sfx"], index=False)
+
+        on_change = Mock()
+        watcher = SampleWatcher(polling=True, on_change=on_change)
+        watcher.apply({"sfx", "bd"})
+        watcher.stop()
+
+    on_change.assert_called_once_with("sfx", {"sfx:0": 2.0, "sfx:1": 2.0, "sfx:2": 2.0})
+
+
+def test_watcher_survives_failing_on_change(scanned_samples, capsys):
+    """Test that an error in on_change is reported and the other families still update."""
+    from my_sardine_tools.watch import SampleWatcher
+
+    on_change = Mock(side_effect=[ValueError("boom"), None])
+    watcher = SampleWatcher(polling=True, on_change=on_change)
+    with patch("my_sardine_tools.samples.sf") as mock_sf:
+        mock_sf.info.return_value = Mock(duration=2.0, frames=88200, channels=2, samplerate=44100)
+        watcher.apply({"bd", "sfx"})
+    watcher.stop()
+
+    assert [c.args[0] for c in on_change.call_args_list] == ["bd", "sfx"]
+    assert "Error in on_change for sample family 'bd': boom" in capsys.readouterr().out
@@ -1,11 +1,23 @@
 import subprocess
 from pathlib import Path
 
-from my_sardine_tools import D, State, calculate_sample_lengths, cut, loop, start, stop
+from my_sardine_tools import (
+    D,
+    State,
+    calculate_sample_lengths,
+    cut,
+    enable_lookahead,
+    live_control,
+    loop,
+    start,
+    stop,
+)
 
 clock.tempo = 140
 state = State()
 calculate_sample_lengths("projects/neo/samples")
+enable_lookahead()  # timestamped bundles, one per loop() step
+live_control(state.choir.fx, orbit=1, keys=("lpf", "hpf"))  # heard on the long choir notes
 
 
 # MELODY
@@ -60,6 +72,7 @@ def arp(p=1, i=0, orbit=2):
         (D, state.arp.fx | state.arp.params()),
         n_steps=state.arp.n_steps,
         p=state.arp.p,
+        prerender=True,
     )
     again(swim(arp), p=dur, i=i + 1)
 
@@ -88,6 +101,7 @@ def hh(p=1, i=0, orbit=4):
         (D, state.drums.hh.fx | state.drums.hh.params()),
         n_steps=state.drums.hh.n_steps,
         p=state.drums.hh.p,
+        prerender=True,
     )
     again(swim(hh), p=dur, i=i + 1)
 